@@ -1,9 +1,7 @@
-import os
-from typing import Type
+from functools import lru_cache
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
-from werkzeug.utils import import_string
 
 
 class BaseConfig(BaseSettings):
@@ -24,6 +22,7 @@ class Config(BaseConfig):
     RESET_TOKEN_EXPIRE: int = Field(env='ACCESS_TOKEN_EXPIRE', default=60*60*24*3)  # 3 days
 
     MIME_TYPE: str = 'application/json'
+    JSON_BACKEND: str = Field(env='JSON_BACKEND', default='json')
 
     SECRET_KEY: str = Field(env='SECRET_KEY', default=None)
     SECURITY_PASSWORD_SALT: str = Field(env='SECURITY_PASSWORD_SALT', default=None)
@@ -35,6 +34,10 @@ class Config(BaseConfig):
     POSTGRES_USER: str = Field(env='POSTGRES_USER')
     POSTGRES_PASSWORD: str = Field(env='POSTGRES_PASSWORD')
     POSTGRES_DB: str = Field(env='POSTGRES_DB')
+    # Comma-separated "host[:port]" read replicas; reads go to the primary when unset.
+    POSTGRES_REPLICA_HOSTS: str = Field(env='POSTGRES_REPLICA_HOSTS', default='')
+    # Prepared statements kept per connection for get_one/get_many and the hot custom queries; 0 disables.
+    POSTGRES_STATEMENT_CACHE_SIZE: int = Field(env='POSTGRES_STATEMENT_CACHE_SIZE', default=64)
 
     RABBITMQ_HOST: str = Field(env='RABBITMQ_HOST')
     RABBITMQ_PORT: int = Field(env='RABBITMQ_PORT')
@@ -44,11 +47,59 @@ class Config(BaseConfig):
 
     AUTH_JWT_SECRET: str = Field(env='AUTH_JWT_SECRET')
 
+    # Audit rows are written by the triggers of migration 0000000010; set to false before it is applied.
+    AUDIT_WITH_DB_TRIGGERS: bool = Field(env='AUDIT_WITH_DB_TRIGGERS', default=True)
+    AUDIT_PARTITIONS_AHEAD: int = Field(env='AUDIT_PARTITIONS_AHEAD', default=3)
+    AUDIT_ARCHIVE_AFTER_MONTHS: int = Field(env='AUDIT_ARCHIVE_AFTER_MONTHS', default=12)
+    AUDIT_ARCHIVE_DIR: str = Field(env='AUDIT_ARCHIVE_DIR', default='audit_archive')
+    AUDIT_ARCHIVE_CHUNK_SIZE: int = Field(env='AUDIT_ARCHIVE_CHUNK_SIZE', default=5000)
+
+    # Verified access token claims, kept until the token expires.
+    VERIFIED_TOKEN_CACHE_MAX_SIZE: int = Field(env='VERIFIED_TOKEN_CACHE_MAX_SIZE', default=10000)
+    # 'memory' keeps revoked tokens per process; 'postgres' shares them between processes.
+    TOKEN_REVOCATION_BACKEND: str = Field(env='TOKEN_REVOCATION_BACKEND', default='memory')
+    TOKEN_REVOCATION_SYNC_INTERVAL: int = Field(env='TOKEN_REVOCATION_SYNC_INTERVAL', default=5)
+
+    PRINCIPAL_CACHE_TTL: int = Field(env='PRINCIPAL_CACHE_TTL', default=60)
+    PRINCIPAL_CACHE_MAX_SIZE: int = Field(env='PRINCIPAL_CACHE_MAX_SIZE', default=10000)
+
+    MEMBERSHIP_CACHE_TTL: int = Field(env='MEMBERSHIP_CACHE_TTL', default=60)
+    MEMBERSHIP_CACHE_MAX_SIZE: int = Field(env='MEMBERSHIP_CACHE_MAX_SIZE', default=10000)
+
+    PASSWORD_HASHING_USE_EXECUTOR: bool = Field(env='PASSWORD_HASHING_USE_EXECUTOR', default=True)
+    PASSWORD_HASHING_WORKERS: int = Field(env='PASSWORD_HASHING_WORKERS', default=2)
+    PASSWORD_HASHING_MAX_PENDING: int = Field(env='PASSWORD_HASHING_MAX_PENDING', default=16)
+    PASSWORD_HASHING_TIMEOUT: float = Field(env='PASSWORD_HASHING_TIMEOUT', default=10.0)
+
+    TODO_PAGE_DEFAULT_LIMIT: int = Field(env='TODO_PAGE_DEFAULT_LIMIT', default=100)
+    TODO_PAGE_MAX_LIMIT: int = Field(env='TODO_PAGE_MAX_LIMIT', default=500)
+    TODO_STREAM_CHUNK_SIZE: int = Field(env='TODO_STREAM_CHUNK_SIZE', default=1000)
+    TODO_BATCH_MAX_OPERATIONS: int = Field(env='TODO_BATCH_MAX_OPERATIONS', default=500)
+
     ROLLBAR_ACCESS_TOKEN: str = Field(env='ROLLBAR_ACCESS_TOKEN', default=None)
 
     QUEUE_NAME_PREFIX: str = Field(env='QUEUE_NAME_PREFIX', default='')
     EMAIL_SERVICE_PROCESSOR_QUEUE_NAME: str = Field(env='EmailServiceProcessor_QUEUE_NAME', default='email-transmitter')
 
+    MESSAGE_SENDER_MAX_QUEUE_SIZE: int = Field(env='MESSAGE_SENDER_MAX_QUEUE_SIZE', default=1000)
+    MESSAGE_SENDER_ENQUEUE_TIMEOUT: float = Field(env='MESSAGE_SENDER_ENQUEUE_TIMEOUT', default=1.0)
+    MESSAGE_SENDER_FLUSH_TIMEOUT: float = Field(env='MESSAGE_SENDER_FLUSH_TIMEOUT', default=10.0)
+
+    # Startup mode of the API: client libraries of unused rococo backends load on first use, not at import.
+    LAZY_IMPORTS: bool = Field(env='LAZY_IMPORTS', default=True)
+
+    # Server-Timing header and per-route histograms on /metrics. /metrics exposes traffic and cache details,
+    # so it needs `Authorization: Bearer <METRICS_TOKEN>`; without a token it is only served in local and test.
+    REQUEST_METRICS_ENABLED: bool = Field(env='REQUEST_METRICS_ENABLED', default=True)
+    METRICS_TOKEN: str = Field(env='METRICS_TOKEN', default='')
+
+    # Development/test check of the SQL each request sends, never enabled in production: '' is off, 'warn'
+    # logs the statement shapes run more than QUERY_DETECTOR_MAX_REPEATS times or slower than
+    # QUERY_DETECTOR_SLOW_MS with their EXPLAIN, and 'raise' fails the request with them.
+    QUERY_DETECTOR: str = Field(env='QUERY_DETECTOR', default='')
+    QUERY_DETECTOR_MAX_REPEATS: int = Field(env='QUERY_DETECTOR_MAX_REPEATS', default=5)
+    QUERY_DETECTOR_SLOW_MS: float = Field(env='QUERY_DETECTOR_SLOW_MS', default=100.0)
+
     @property
     def DEFAULT_USER_PASSWORD(self):
         import random, string
@@ -57,7 +108,10 @@ class Config(BaseConfig):
         else:
             return 'Default@Password123'
 
+@lru_cache(maxsize=None)
 def get_config() -> Config:
+    # Reading and validating the environment is the costly part of importing this module, so it is done
+    # once per process and shared with every caller.
     conf = Config()
     return conf
 
@@ -2,15 +2,14 @@ import logging
 import os
 import sys
 
-import rollbar
-from rollbar.logger import RollbarHandler
-
 from common.app_config import config
 
 ROLLBAR_ACCESS_TOKEN = config.ROLLBAR_ACCESS_TOKEN
 ROLLBAR_ENVIRONMENT = config.APP_ENV
 
+# Rollbar (and the requests stack under it) is only imported when a token is configured.
 if ROLLBAR_ACCESS_TOKEN:
+    import rollbar
     rollbar.init(
         access_token=config.ROLLBAR_ACCESS_TOKEN,
         environment=config.APP_ENV,
@@ -30,6 +29,7 @@ def _get_formatter():
 
 
 def rollbar_except_hook(exc_type, exc_value, traceback):
+    import rollbar
     # Report the issue to rollbar here.
     rollbar.report_exc_info((exc_type, exc_value, traceback))
     # display the error as normal here
@@ -47,6 +47,7 @@ def get_console_handler():
 
 
 def get_rollbar_handler():
+    from rollbar.logger import RollbarHandler
     loglevel = getattr(logging, config.LOGLEVEL, 'WARN')
     rollbar_handler = RollbarHandler(access_token=ROLLBAR_ACCESS_TOKEN, environment=ROLLBAR_ENVIRONMENT)
     rollbar_handler.setLevel(loglevel)
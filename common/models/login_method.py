@@ -2,17 +2,17 @@ from dataclasses import dataclass, field
 from typing import Optional
 import string
 
-from werkzeug.security import generate_password_hash
-
 from rococo.models.login_method import LoginMethodType
 from rococo.models.versioned_model import ModelValidationError
 from rococo.models import LoginMethod as BaseLoginMethod
 
+from common.tasks.password_hashing import get_password_hasher
+
 
 @dataclass
 class LoginMethod(BaseLoginMethod):
 
-    raw_password: Optional[str] = field(repr=False, default=None)  # Temporary field
+    raw_password: Optional[str] = field(repr=False, default=None, metadata={'transient': True})  # Temporary field
 
     def __post_init__(self, *args, **kwargs):
         super().__post_init__(*args, **kwargs)
@@ -21,7 +21,7 @@ class LoginMethod(BaseLoginMethod):
     def hash_password(self):
         if self.raw_password is not None:
             self.validate_raw_password()
-            self.password = generate_password_hash(self.raw_password, method='scrypt')
+            self.password = get_password_hasher().generate_password_hash(self.raw_password)
         del self.raw_password
 
     def validate_raw_password(self):
@@ -0,0 +1,145 @@
+import re
+import uuid
+from datetime import date
+from typing import Dict, Iterator, List, Tuple
+
+from rococo.data.postgresql import PostgreSQLAdapter
+
+AUDIT_TABLES = (
+    'person_audit', 'organization_audit', 'email_audit', 'login_method_audit',
+    'person_organization_role_audit', 'todo_audit',
+)
+
+
+class AuditPartitionRepository:
+    """
+    Manages the monthly `changed_on` partitions of the <table>_audit tables created by migration 0000000011.
+    Partitions are named <table>_pYYYYMM and cover one calendar month; <table>_default catches the rest.
+    """
+
+    def __init__(self, adapter: PostgreSQLAdapter):
+        self.adapter = adapter
+
+    @staticmethod
+    def get_partition_name(table: str, month: date) -> str:
+        return f"{table}_p{month:%Y%m}"
+
+    @staticmethod
+    def get_partition_month(table: str, partition: str) -> date:
+        match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", partition)
+        if not match:
+            raise ValueError(f"{partition} is not a monthly partition of {table}")
+        return date(int(match.group(1)), int(match.group(2)), 1)
+
+    def get_partitions(self, table: str) -> List[Tuple[str, bool]]:
+        """Returns the (name, attached) monthly partitions of `table`, oldest first, including detached ones."""
+        query = """
+            SELECT c.relname AS name, i.inhrelid IS NOT NULL AS attached
+            FROM pg_class c
+            LEFT JOIN pg_inherits i ON i.inhrelid = c.oid
+            WHERE c.relkind = 'r' AND c.relname ~ %s
+            ORDER BY c.relname;
+        """
+        with self.adapter:
+            rows = self.adapter.execute_query(query, (f"^{table}_p[0-9]{{6}}$",))
+        return [(row['name'], row['attached']) for row in rows]
+
+    def get_default_partition_months(self, table: str) -> List[date]:
+        """Returns the months that have rows in the default partition of `table`."""
+        query = f"SELECT DISTINCT date_trunc('month', changed_on)::date AS month FROM {table}_default;"
+        with self.adapter:
+            rows = self.adapter.execute_query(query)
+        return [row['month'] for row in rows]
+
+    def create_partition(self, table: str, month: date):
+        """
+        Creates the partition of `table` for `month`. Rows of that month that already landed in the default
+        partition are moved into it, since PostgreSQL refuses to create a partition overlapping them.
+        """
+        partition = self.get_partition_name(table, month)
+        next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        bounds = (month, next_month)
+
+        with self.adapter:
+            try:
+                self.adapter._call_cursor(
+                    'execute', f"SELECT 1 FROM {table}_default WHERE changed_on >= %s AND changed_on < %s LIMIT 1;",
+                    bounds
+                )
+                if self.adapter._call_cursor('fetchone') is None:
+                    self.adapter._call_cursor(
+                        'execute', f"CREATE TABLE {partition} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s);",
+                        bounds
+                    )
+                else:
+                    self.adapter._call_cursor('execute', f"ALTER TABLE {table} DETACH PARTITION {table}_default;")
+                    self.adapter._call_cursor(
+                        'execute', f"CREATE TABLE {partition} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s);",
+                        bounds
+                    )
+                    self.adapter._call_cursor('execute', f"""
+                        WITH moved AS (
+                            DELETE FROM {table}_default WHERE changed_on >= %s AND changed_on < %s RETURNING *
+                        )
+                        INSERT INTO {partition} SELECT * FROM moved;
+                    """, bounds)
+                    self.adapter._call_cursor('execute', f"ALTER TABLE {table} ATTACH PARTITION {table}_default DEFAULT;")
+                self.adapter._connection.commit()
+            except Exception:
+                self.adapter._connection.rollback()
+                raise
+        return partition
+
+    def detach_partition(self, table: str, partition: str):
+        """Detaches `partition` from `table`; the detached table keeps its rows until it is dropped."""
+        with self.adapter:
+            self.adapter.execute_query(f"ALTER TABLE {table} DETACH PARTITION {partition};")
+
+    def drop_partition(self, partition: str):
+        with self.adapter:
+            self.adapter.execute_query(f"DROP TABLE {partition};")
+
+    def iter_rows(self, partition: str, chunk_size: int) -> Iterator[Dict]:
+        """Yields the rows of a (detached) partition as dicts, read `chunk_size` at a time from a server-side cursor."""
+        with self.adapter:
+            connection = self.adapter._connection
+            cursor = connection.cursor(name=f"audit_archive_{uuid.uuid4().hex}")
+            try:
+                cursor.itersize = chunk_size
+                cursor.execute(f"SELECT * FROM {partition} ORDER BY changed_on, entity_id;")
+                columns = None
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    if columns is None:
+                        columns = [desc[0] for desc in cursor.description]
+                    for row in rows:
+                        yield dict(zip(columns, row))
+            finally:
+                cursor.close()
+                connection.rollback()
+
+    def insert_rows(self, table: str, rows: List[Dict]) -> int:
+        """Inserts audit rows (e.g. from an archive), skipping those already present. Returns the number inserted."""
+        if not rows:
+            return 0
+
+        columns = list(rows[0].keys())
+        row_placeholders = f"({', '.join(['%s'] * len(columns))})"
+        query = f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            VALUES {', '.join([row_placeholders] * len(rows))}
+            ON CONFLICT DO NOTHING;
+        """
+        values = tuple(row.get(column) for row in rows for column in columns)
+
+        with self.adapter:
+            try:
+                self.adapter._call_cursor('execute', query, values)
+                inserted = self.adapter._cursor.rowcount
+                self.adapter._connection.commit()
+            except Exception:
+                self.adapter._connection.rollback()
+                raise
+        return inserted
@@ -1,7 +1,12 @@
+import json
+from dataclasses import fields
 from rococo.repositories.postgresql import PostgreSQLRepository
 from rococo.data.postgresql import PostgreSQLAdapter
 from rococo.messaging.base import MessageAdapter
-from typing import Optional
+from rococo.models import VersionedModel
+from typing import Dict, Iterable, List, Optional
+
+from common.utils.metrics import record_publish
 
 
 class BaseRepository(PostgreSQLRepository):
@@ -14,7 +19,96 @@ class BaseRepository(PostgreSQLRepository):
 
     def __init__(
             self, db_adapter: PostgreSQLAdapter, message_adapter: Optional[MessageAdapter], 
-            queue_name: str, user_id: str = None
+            queue_name: str, user_id: str = None, app_side_audit: bool = True
     ):
         # Pass MODEL as the model to the BaseRepository
         super().__init__(db_adapter, self.MODEL, message_adapter, queue_name, user_id=user_id)
+        # When false, the <table>_audit rows are written by database triggers instead of by save().
+        self.app_side_audit = app_side_audit
+
+    def save(self, instance: VersionedModel, send_message: bool = False):
+        if self.app_side_audit:
+            return super().save(instance, send_message=send_message)
+
+        data = self._process_data_before_save(instance)
+        with self.adapter:
+            self.adapter.run_transaction([self.adapter.get_save_query(self.table_name, data)])
+        if send_message:
+            message = json.dumps(instance.as_dict(convert_datetime_to_iso_string=True))
+            with record_publish():
+                self.message_adapter.send_message(self.queue_name, message)
+
+        return instance
+
+    def reading(self):
+        """
+        Use `with self.reading():` instead of `with self.adapter:` for read-only queries that a
+        RoutingPostgreSQLAdapter may serve from a replica. Rows read to be modified must come from the
+        primary, so only use it for results that are not written back.
+        """
+        reading = getattr(self.adapter, 'reading', None)
+        return reading() if reading else self.adapter
+
+    def execute_prepared(self, query: str, params: tuple) -> List[Dict]:
+        """
+        Runs a frequent SELECT as a statement prepared once per connection, when the adapter supports it.
+        Must be called inside a `with self.adapter:` or `with self.reading():` block.
+        """
+        execute = getattr(self.adapter, 'execute_prepared', self.adapter.execute_query)
+        return execute(query, params)
+
+    def execute_returning(self, query: str, params: tuple) -> List[Dict]:
+        """
+        Executes a data-modifying statement that returns rows (e.g. with RETURNING), commits it and
+        returns the rows. The adapter's execute_query only fetches results for plain SELECT statements.
+        """
+        with self.adapter:
+            try:
+                self.adapter._call_cursor('execute', query, params)
+                columns = [desc[0] for desc in self.adapter._cursor.description]
+                rows = [dict(zip(columns, row)) for row in self.adapter._call_cursor('fetchall')]
+                self.adapter._connection.commit()
+            except Exception:
+                self.adapter._connection.rollback()
+                raise
+        return rows
+
+    @staticmethod
+    def get_model_columns(model) -> List[str]:
+        """Returns the table columns of a model, skipping fields marked as transient."""
+        return [f.name for f in fields(model) if not f.metadata.get('transient')]
+
+    @classmethod
+    def get_select_list(
+            cls, columns: Optional[Iterable[str]] = None, required: Iterable[str] = (), alias: Optional[str] = None
+    ) -> str:
+        """
+        Returns a select list of MODEL's table limited to `columns` (all when None), plus the `required`
+        ones the query itself needs. Column names end up in SQL, so they are checked against the model.
+        """
+        model_columns = cls.get_model_columns(cls.MODEL)
+        if columns is not None:
+            unknown = set(columns).difference(model_columns)
+            if unknown:
+                raise ValueError(f"Unknown {cls.MODEL.__name__} columns: {', '.join(sorted(unknown))}")
+            wanted = set(columns).union(required)
+            model_columns = [column for column in model_columns if column in wanted]
+        prefix = f'{alias}.' if alias else ''
+        return ', '.join(f'{prefix}{column}' for column in model_columns)
+
+    @classmethod
+    def get_prefixed_columns(cls, model, alias: str) -> str:
+        """
+        Returns a select list for `model` where each column is aliased as `<alias>__<column>`, so rows of
+        several joined tables can be split back into their models with `split_prefixed_row`.
+        """
+        return ', '.join(f'{alias}.{column} AS {alias}__{column}' for column in cls.get_model_columns(model))
+
+    @staticmethod
+    def split_prefixed_row(row: Dict, alias: str, model):
+        """Builds a `model` instance from the `<alias>__` prefixed columns of a joined row, or None if absent."""
+        prefix = f'{alias}__'
+        data = {key[len(prefix):]: value for key, value in row.items() if key.startswith(prefix)}
+        if data.get('entity_id') is None:
+            return None
+        return model.from_dict(data)
@@ -1,6 +1,44 @@
 from common.repositories.base import BaseRepository
 from common.models.email import Email
+from common.models.login_method import LoginMethod, LoginMethodType
+from common.models.person import Person
 
 
 class EmailRepository(BaseRepository):
     MODEL = Email
+
+    def _get_identity(self, condition: str, value: str):
+        query = f"""
+            SELECT {self.get_prefixed_columns(Email, 'e')},
+                   {self.get_prefixed_columns(LoginMethod, 'lm')},
+                   {self.get_prefixed_columns(Person, 'p')}
+            FROM email AS e
+            LEFT JOIN login_method AS lm
+            ON lm.email_id = e.entity_id AND lm.method_type = %s AND lm.active = true
+            LEFT JOIN person AS p
+            ON p.entity_id = e.person_id AND p.active = true
+            WHERE {condition} AND e.active = true
+            LIMIT 1;
+        """
+        params = (LoginMethodType.EMAIL_PASSWORD.value, value)
+
+        with self.adapter:
+            results = self.execute_prepared(query, params)
+
+        if not results:
+            return None, None, None
+
+        row = results[0]
+        return (
+            self.split_prefixed_row(row, 'e', Email),
+            self.split_prefixed_row(row, 'lm', LoginMethod),
+            self.split_prefixed_row(row, 'p', Person),
+        )
+
+    def get_identity_by_email_address(self, email_address: str):
+        """Returns the (email, email-password login method, person) for an email address in one query."""
+        return self._get_identity('e.email = %s', email_address)
+
+    def get_identity_by_email_id(self, email_id: str):
+        """Returns the (email, email-password login method, person) for an email id in one query."""
+        return self._get_identity('e.entity_id = %s', email_id)
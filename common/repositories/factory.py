@@ -1,8 +1,14 @@
 from common.repositories import *
+from common.repositories.unit_of_work import UnitOfWork
+from common.repositories.audit import AuditPartitionRepository
+from common.repositories.token_revocation import TokenRevocationRepository
+from common.repositories.replicas import RoutingPostgreSQLAdapter
+from common.utils.request_scope import get_request_scope
 from enum import Enum, auto
-from rococo.data.postgresql import PostgreSQLAdapter
 from rococo.messaging.rabbitmq import RabbitMqConnection
 from typing import Optional
+import psycopg2
+import threading
 from common.app_logger import logger
 
 
@@ -38,16 +44,42 @@ class MessageAdapterType(str, Enum):
         return str(self.value)
 
 
-def get_connection_resolver():
+# The adapters outlive the app context they were built in (repositories are cached per thread), so the
+# pools are looked up each time a connection is opened or closed, never when the adapter is built.
+def resolve_connection(**kwargs):
+    """Returns the current app's pooled connection, or a new connection outside an app with a pool."""
     pooled_db = get_flask_pooled_db()
     if pooled_db:
-        return pooled_db.get_connection
+        return pooled_db.get_connection()
+    return psycopg2.connect(**kwargs)
 
 
-def get_connection_closer():
-    pooled_db = get_flask_pooled_db()
-    if pooled_db:
-        return lambda *args, **kwargs: None  # No-op; let Pooled DB handle closing of connection on request teardown.
+def resolve_replica_connection():
+    """Returns a pooled replica connection, or None when the current app has no replicas."""
+    try:
+        from flask import current_app, has_app_context
+
+        if has_app_context():
+            replica_pooled_db = current_app.extensions.get("replica_pooled_db")
+            if replica_pooled_db:
+                return replica_pooled_db.get_connection()
+    except (ImportError, AttributeError):
+        pass
+
+    return None
+
+
+def close_connection(adapter):
+    if get_flask_pooled_db():
+        return  # No-op; let Pooled DB handle closing of connection on request teardown.
+
+    if adapter._cursor is not None:
+        adapter._cursor.close()
+        adapter._cursor = None
+
+    if adapter._connection is not None:
+        adapter._connection.close()
+        adapter._connection = None
 
 
 class RepoType(Enum):
@@ -68,6 +100,8 @@ class RepositoryFactory:
 
     def __init__(self, config):
         self.config = config
+        self._message_adapter = None
+        self._thread_scope = threading.local()
 
     _repositories = {
         RepoType.PERSON: PersonRepository,
@@ -85,7 +119,12 @@ class RepositoryFactory:
         password = self.config.POSTGRES_PASSWORD
         database = self.config.POSTGRES_DB
 
-        return PostgreSQLAdapter(host, port, user, password, database, connection_resolver=get_connection_resolver(), connection_closer=get_connection_closer())
+        return RoutingPostgreSQLAdapter(
+            host, port, user, password, database,
+            connection_resolver=resolve_connection, connection_closer=close_connection,
+            replica_resolver=resolve_replica_connection,
+            statement_cache_size=self.config.POSTGRES_STATEMENT_CACHE_SIZE
+        )
 
     def _get_rabbitmq_connection(self):
         return RabbitMqConnection(
@@ -97,15 +136,45 @@ class RepositoryFactory:
         )
 
     def get_adapter(self):
-        return self._get_rabbitmq_connection()
+        # The message adapter only connects lazily, so a single instance is shared for the whole process.
+        if self._message_adapter is None:
+            self._message_adapter = self._get_rabbitmq_connection()
+        return self._message_adapter
 
-    def get_repository(self, repo_type: RepoType, person_id=None, message_queue_name: str = ""):
-        adapter = self.get_db_connection()
-        message_adapter = self.get_adapter()
-        repo_class = self._repositories.get(repo_type)
+    @property
+    def app_side_audit(self) -> bool:
+        return not self.config.AUDIT_WITH_DB_TRIGGERS
 
-        if repo_class:
-            import threading
-            return repo_class(adapter, message_adapter, message_queue_name, person_id)
+    def unit_of_work(self) -> UnitOfWork:
+        return UnitOfWork(self.get_db_connection(), app_side_audit=self.app_side_audit)
 
-        raise ValueError(f"No repository found with the name '{repo_type}'")
+    def get_audit_partition_repository(self) -> AuditPartitionRepository:
+        return AuditPartitionRepository(self.get_db_connection())
+
+    def get_token_revocation_repository(self) -> TokenRevocationRepository:
+        return TokenRevocationRepository(self.get_db_connection())
+
+    def get_repository(self, repo_type: RepoType, person_id=None, message_queue_name: str = ""):
+        repo_class = self._repositories.get(repo_type)
+        if not repo_class:
+            raise ValueError(f"No repository found with the name '{repo_type}'")
+
+        # Repositories keep their DB adapter for as long as they are cached. The adapter only holds a
+        # connection inside `with` blocks (resolved from the request's pool connection), so one repository
+        # per worker thread is safe. Repositories bound to a user are scoped to the current request instead.
+        if person_id is None:
+            scope = self._thread_scope.__dict__
+        else:
+            scope = get_request_scope()
+
+        cache_key = (repo_type, person_id, message_queue_name)
+        if scope is not None and cache_key in scope:
+            return scope[cache_key]
+
+        repository = repo_class(
+            self.get_db_connection(), self.get_adapter(), message_queue_name, person_id,
+            app_side_audit=self.app_side_audit
+        )
+        if scope is not None:
+            scope[cache_key] = repository
+        return repository
@@ -0,0 +1,35 @@
+from rococo.data.postgresql import PostgreSQLAdapter
+
+from common.utils.metrics import record_db_queries
+from common.utils.query_detector import timed_statement
+
+
+class TimedCursor:
+    """
+    Wraps a psycopg2 cursor to add each statement it executes to the current request's DB timings, and to
+    its statement log when the query detector records it. `source` is the (query, vars) to log instead of
+    the ones sent, e.g. the statement behind an EXECUTE of a prepared one.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, vars=None, source=None):
+        with record_db_queries(), timed_statement(*(source or (query, vars))):
+            return self._cursor.execute(query, vars)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedPostgreSQLAdapter(PostgreSQLAdapter):
+    """
+    PostgreSQL adapter that times every statement sent through its cursor, so the query count and DB time
+    of a request cover execute_query, saves, run_transaction and prepared statements alike.
+    """
+
+    def __enter__(self):
+        super().__enter__()
+        if self._cursor is not None and not isinstance(self._cursor, TimedCursor):
+            self._cursor = TimedCursor(self._cursor)
+        return self
@@ -1,3 +1,5 @@
+from typing import List, Optional
+
 from common.repositories.base import BaseRepository
 from common.models.organization import Organization
 
@@ -5,9 +7,18 @@ from common.models.organization import Organization
 class OrganizationRepository(BaseRepository):
     MODEL = Organization
 
-    def get_organizations_by_person_id(self, person_id: str):
-        query = """
-            SELECT o.*, por.role
+    def get_organizations_by_person_id(
+            self, person_id: str, columns: Optional[List[str]] = None, include_role: bool = True
+    ):
+        """
+        Returns the organizations of a person as rows, with the person's role in each. `columns` limits the
+        organization columns, and `include_role=False` leaves out the role.
+        """
+        select_list = self.get_select_list(columns, alias='o')
+        if include_role:
+            select_list = f"{select_list}, por.role" if select_list else "por.role"
+        query = f"""
+            SELECT {select_list}
             FROM organization AS o
             JOIN person_organization_role AS por
             ON o.entity_id = por.organization_id
@@ -15,6 +26,6 @@ class OrganizationRepository(BaseRepository):
         """
         params = (person_id,)
 
-        with self.adapter:
+        with self.reading():
             results = self.adapter.execute_query(query, params)
             return results
@@ -0,0 +1,174 @@
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from common.repositories.instrumented import InstrumentedPostgreSQLAdapter
+
+_PLACEHOLDER = re.compile(r'%%|%s')
+
+
+class StatementCache:
+    """
+    The statements prepared on one database connection, as {SQL text: statement name}, least recently used
+    first. Prepared statements live as long as the server session, so the cache belongs to the connection
+    and goes away with it.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.statements = OrderedDict()
+        self._next_id = 0
+
+    def get(self, sql: str) -> Optional[str]:
+        name = self.statements.get(sql)
+        if name is not None:
+            self.statements.move_to_end(sql)
+        return name
+
+    def new_name(self) -> str:
+        # Never reuse a name, so a statement left behind by a failed PREPARE cannot clash with a new one.
+        self._next_id += 1
+        return f"stmt_{self._next_id}"
+
+    def add(self, sql: str, name: str):
+        self.statements[sql] = name
+
+    def get_evicted(self) -> Optional[str]:
+        """Removes and returns the least recently used statement's name when a new one would exceed max_size."""
+        if len(self.statements) < self.max_size:
+            return None
+        return self.statements.popitem(last=False)[1]
+
+
+_caches = weakref.WeakKeyDictionary()
+_stats_lock = threading.Lock()
+_stats = {'prepares': 0, 'hits': 0, 'evictions': 0, 'prepare_seconds': 0.0, 'execute_seconds': 0.0}
+
+
+def _record(**values):
+    with _stats_lock:
+        for key, value in values.items():
+            _stats[key] += value
+
+
+def get_statement_cache_stats() -> Dict[str, float]:
+    """
+    Returns the process-wide prepared statement counters. `prepare_seconds` is the time spent in executions
+    that also parsed and planned their statement, `execute_seconds` the time spent in those reusing one.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats['connections'] = len(_caches)
+    stats['statements'] = sum(len(cache.statements) for cache in list(_caches.values()))
+    return stats
+
+
+def _get_raw_connection(connection):
+    # DBUtils wraps the psycopg2 connection (pooled -> steady -> raw); a steady connection gets a new raw one
+    # when it reconnects, which must start with an empty cache.
+    while hasattr(connection, '_con'):
+        connection = connection._con
+    return connection
+
+
+def get_statement_cache(connection, max_size: int) -> StatementCache:
+    raw_connection = _get_raw_connection(connection)
+    cache = _caches.get(raw_connection)
+    if cache is None:
+        cache = _caches[raw_connection] = StatementCache(max_size)
+    return cache
+
+
+def to_positional(sql: str) -> str:
+    """Turns the %s placeholders of a psycopg2 query into the $1, $2, ... parameters of PREPARE."""
+    position = 0
+
+    def replace(match):
+        nonlocal position
+        if match.group() == '%%':
+            return '%%'
+        position += 1
+        return f'${position}'
+
+    return _PLACEHOLDER.sub(replace, sql)
+
+
+class PreparedStatementAdapter(InstrumentedPostgreSQLAdapter):
+    """
+    PostgreSQL adapter that can run SELECT statements as server-side prepared statements, kept per
+    connection in a bounded LRU cache, so the same statement shape is parsed (and eventually planned)
+    once per pooled connection instead of on every request.
+
+    `execute_prepared` uses it explicitly; get_one and get_many always do, since their statements only
+    vary by the conditions given. A `statement_cache_size` of 0 disables it.
+    """
+
+    def __init__(self, *args, statement_cache_size: int = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._statement_cache_size = statement_cache_size
+        self._preparing = False
+
+    @contextmanager
+    def preparing(self):
+        preparing, self._preparing = self._preparing, True
+        try:
+            yield self
+        finally:
+            self._preparing = preparing
+
+    def get_one(self, *args, **kwargs):
+        with self.preparing():
+            return super().get_one(*args, **kwargs)
+
+    def get_many(self, *args, **kwargs):
+        with self.preparing():
+            return super().get_many(*args, **kwargs)
+
+    def execute_query(self, sql, _vars=None):
+        if self._preparing:
+            return self.execute_prepared(sql, _vars)
+        return super().execute_query(sql, _vars)
+
+    def execute_prepared(self, sql: str, _vars=None) -> List[Dict]:
+        """
+        Runs a SELECT like execute_query, through a statement prepared on this connection. The PREPARE (and
+        the DEALLOCATE of the statement it evicts) is sent with the EXECUTE, so it costs no extra round trip.
+        """
+        if (
+                not self._statement_cache_size or isinstance(_vars, dict)
+                or not sql.lstrip()[:6].upper() == 'SELECT'
+        ):
+            return super().execute_query(sql, _vars)
+
+        values = tuple(_vars or ())
+        arguments = f"({', '.join(['%s'] * len(values))})" if values else ''
+        cache = get_statement_cache(self._connection, self._statement_cache_size)
+
+        started = time.perf_counter()
+        name = cache.get(sql)
+        if name is not None:
+            self._call_cursor('execute', f"EXECUTE {name}{arguments};", values, source=(sql, values))
+            rows = self._fetch_rows()
+            _record(hits=1, execute_seconds=time.perf_counter() - started)
+            return rows
+
+        name = cache.new_name()
+        statement = f"PREPARE {name} AS {to_positional(sql.strip().rstrip(';'))}; EXECUTE {name}{arguments};"
+        evicted = cache.get_evicted()
+        if evicted is not None:
+            statement = f"DEALLOCATE {evicted}; {statement}"
+        self._call_cursor('execute', statement, values, source=(sql, values))
+        cache.add(sql, name)
+        rows = self._fetch_rows()
+        _record(
+            prepares=1, evictions=int(evicted is not None), prepare_seconds=time.perf_counter() - started
+        )
+        return rows
+
+    def _fetch_rows(self) -> List[Dict]:
+        column_names = [desc[0] for desc in self._cursor.description]
+        return [dict(zip(column_names, row)) for row in self._call_cursor('fetchall')]
@@ -0,0 +1,124 @@
+import itertools
+import sys
+from contextlib import contextmanager
+from typing import Callable, List, Optional, Tuple
+
+from common.repositories.prepared import PreparedStatementAdapter
+from common.utils.request_scope import get_request_scope
+
+
+def parse_replica_hosts(hosts: Optional[str], default_port: int) -> List[Tuple[str, int]]:
+    """Parses POSTGRES_REPLICA_HOSTS ("host[:port],host[:port]") into (host, port) pairs."""
+    replicas = []
+    for entry in (hosts or '').split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(':')
+        replicas.append((host, int(port) if port else int(default_port)))
+    return replicas
+
+
+def mark_primary_sticky():
+    """Makes the rest of the current request read from the primary, e.g. after it has written."""
+    scope = get_request_scope()
+    if scope is not None:
+        scope['db_primary_sticky'] = True
+
+
+def is_primary_sticky() -> bool:
+    scope = get_request_scope()
+    return scope is not None and scope.get('db_primary_sticky', False)
+
+
+class RoutingPostgreSQLAdapter(PreparedStatementAdapter):
+    """
+    PostgreSQL adapter that runs `with adapter.reading():` blocks on a replica and `with adapter:` blocks on
+    the primary. Any write through the adapter makes the request sticky to the primary, so it reads its own
+    writes. Without a `replica_resolver` it behaves exactly like PreparedStatementAdapter.
+    """
+
+    def __init__(self, *args, replica_resolver: Optional[Callable] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._replica_resolver = replica_resolver
+        self._reading = False
+        self._on_replica = False
+
+    @contextmanager
+    def reading(self):
+        """Like `with adapter:`, but the connection may be a replica's. Only the connection choice is affected."""
+        self._reading = True
+        try:
+            self.__enter__()
+        finally:
+            self._reading = False
+        try:
+            yield self
+        finally:
+            self.__exit__(*sys.exc_info())
+
+    @property
+    def connect(self):
+        # The resolver returns None when the current app has no replicas.
+        connection = None
+        if self._reading and self._replica_resolver and not is_primary_sticky():
+            connection = self._replica_resolver()
+        self._on_replica = connection is not None
+        return connection if self._on_replica else super().connect
+
+    def _call_cursor(self, function_name, *args, **kwargs):
+        # Anything but a SELECT on the primary may have written (data-modifying CTEs start with WITH). Only
+        # SELECTs are prepared, so statements starting with DEALLOCATE, PREPARE or EXECUTE are reads too.
+        if (
+                function_name == 'execute' and not self._on_replica
+                and not args[0].lstrip().upper().startswith(('SELECT', 'DEALLOCATE', 'PREPARE', 'EXECUTE'))
+        ):
+            mark_primary_sticky()
+        return super()._call_cursor(function_name, *args, **kwargs)
+
+    def run_transaction(self, queries_list):
+        mark_primary_sticky()
+        return super().run_transaction(queries_list)
+
+
+class ReplicaPoolPlugin:
+    """
+    Flask plugin keeping a connection pool per read replica, like rococo's PooledConnectionPlugin does for
+    the primary. Each request uses one replica connection at most, taken round-robin across the replicas
+    and returned to its pool on teardown.
+    """
+
+    def __init__(self, app, replicas: List[Tuple[str, int]]):
+        from dbutils.pooled_db import PooledDB
+        import psycopg2
+
+        self.pools = [
+            PooledDB(
+                creator=psycopg2,
+                maxconnections=app.config.get('POSTGRES_POOL_MAX_CONNECTIONS'),
+                host=host,
+                port=port,
+                user=app.config.get('POSTGRES_USER'),
+                password=app.config.get('POSTGRES_PASSWORD'),
+                database=app.config.get('POSTGRES_DB'),
+            )
+            for host, port in replicas
+        ]
+        self._next_pool = itertools.cycle(self.pools)
+
+        app.extensions['replica_pooled_db'] = self
+        app.teardown_appcontext(self._teardown)
+
+    def get_connection(self, *args, **kwargs):
+        from flask import g
+
+        if getattr(g, 'replica_db_conn', None) is None:
+            g.replica_db_conn = next(self._next_pool).connection()
+        return g.replica_db_conn
+
+    def _teardown(self, exception):
+        from flask import g
+
+        db_conn = g.pop('replica_db_conn', None)
+        if db_conn:
+            db_conn.close()  # Return the connection to the pool
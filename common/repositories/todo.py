@@ -1,5 +1,369 @@
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rococo.models.versioned_model import ModelValidationError
+
 from common.repositories.base import BaseRepository
 from common.models.todo import Todo
 
 class TodoRepository(BaseRepository):
     MODEL = Todo
+
+
+    def _process_data_before_save(self, instance: Todo):
+        data = super()._process_data_before_save(instance)
+        # Keep sub-second precision so every write moves max(changed_on), which list validators rely on.
+        data['changed_on'] = instance.changed_on
+        return data
+
+    def get_list_validator(self, person_id: str) -> Tuple[int, Optional[datetime]]:
+        """
+        Returns the count and latest changed_on of a person's active todos, which change whenever any of
+        them is created, updated or deleted. Answered from the (person_id, active, changed_on) index alone.
+        """
+        query = """
+            SELECT count(*) AS count, max(changed_on) AS last_changed_on
+            FROM todo
+            WHERE person_id = %s AND active = true;
+        """
+        with self.reading():
+            row = self.execute_prepared(query, (person_id,))[0]
+        return row['count'], row['last_changed_on']
+
+    def get_todos_page(
+            self, person_id: str, limit: Optional[int], after: Optional[Tuple[datetime, str]] = None,
+            is_completed: Optional[bool] = None, columns: Optional[List[str]] = None
+    ) -> Tuple[List[Todo], Optional[Tuple[datetime, str]]]:
+        """
+        Returns one page of a person's active todos, newest first, using keyset pagination on
+        (created_on, entity_id), together with the key to pass as `after` for the next page. Updates
+        leave created_on alone, so a todo updated while a client is paging keeps its place.
+        A `limit` of None returns all of them. With `columns`, only those are loaded and the other
+        fields of the todos keep their defaults.
+        """
+        conditions = ["person_id = %s", "active = true"]
+        params = [person_id]
+
+        if is_completed is not None:
+            conditions.append("is_completed = %s")
+            params.append(is_completed)
+
+        if after is not None:
+            conditions.append("(created_on, entity_id) < (%s, %s)")
+            params += list(after)
+
+        # An explicit select list, so the generated search_vector column is never read back. created_on
+        # is set by the database and is not a field of the model.
+        query = f"""
+            SELECT {self.get_select_list(columns, required=('entity_id',))}, created_on
+            FROM todo
+            WHERE {' AND '.join(conditions)}
+            ORDER BY created_on DESC, entity_id DESC
+            LIMIT %s;
+        """
+        # Fetch one extra row to know whether there is a next page. LIMIT NULL is no limit.
+        params.append(None if limit is None else limit + 1)
+
+        with self.reading():
+            results = self.execute_prepared(query, tuple(params))
+
+        todos = [Todo.from_dict(row) for row in results[:limit]]
+        next_key = None
+        if limit is not None and len(results) > limit:
+            last = results[limit - 1]
+            next_key = (last['created_on'], last['entity_id'])
+        return todos, next_key
+
+    def search_todos(
+            self, person_id: str, search: str, limit: int, after: Optional[Tuple[float, str]] = None,
+            columns: Optional[List[str]] = None
+    ) -> Tuple[List[Todo], Optional[Tuple[float, str]]]:
+        """
+        Returns one page of a person's active todos matching the full-text `search`, best match first,
+        using keyset pagination on (rank, entity_id), together with the key to pass as `after` for the
+        next page. Matching uses the GIN-indexed search_vector column. `columns` limits the loaded fields.
+        """
+        conditions = []
+        params = [search, person_id]
+
+        if after is not None:
+            conditions.append("(rank, entity_id) < (%s, %s)")
+            params += list(after)
+
+        query = f"""
+            SELECT *
+            FROM (
+                SELECT {self.get_select_list(columns, required=('entity_id',))}, ts_rank_cd(search_vector, query) AS rank
+                FROM todo, websearch_to_tsquery('english', %s) AS query
+                WHERE person_id = %s AND active = true AND search_vector @@ query
+            ) AS matches
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            ORDER BY rank DESC, entity_id DESC
+            LIMIT %s;
+        """
+        # Fetch one extra row to know whether there is a next page.
+        params.append(limit + 1)
+
+        with self.reading():
+            results = self.adapter.execute_query(query, tuple(params))
+
+        todos = [Todo.from_dict(row) for row in results[:limit]]
+        next_key = None
+        if len(results) > limit:
+            last = results[limit - 1]
+            next_key = (last['rank'], last['entity_id'])
+        return todos, next_key
+
+    def iter_todo_rows(
+            self, person_id: str, chunk_size: int, is_completed: Optional[bool] = None,
+            columns: Optional[List[str]] = None
+    ) -> Iterator[Dict]:
+        """
+        Yields a person's active todos as row dicts, newest first, read from a server-side cursor
+        `chunk_size` rows at a time so memory stays bounded regardless of how many todos there are.
+        `columns` limits the columns of the rows.
+        """
+        conditions = ["person_id = %s", "active = true"]
+        params = [person_id]
+
+        if is_completed is not None:
+            conditions.append("is_completed = %s")
+            params.append(is_completed)
+
+        query = f"""
+            SELECT {self.get_select_list(columns)}
+            FROM todo
+            WHERE {' AND '.join(conditions)}
+            ORDER BY created_on DESC, entity_id DESC;
+        """
+
+        with self.reading():
+            connection = self.adapter._connection
+            # A named cursor makes psycopg2 keep the result set on the server and fetch it in chunks.
+            cursor = connection.cursor(name=f"todo_stream_{uuid.uuid4().hex}")
+            try:
+                cursor.itersize = chunk_size
+                cursor.execute(query, tuple(params))
+                columns = None
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    if columns is None:
+                        columns = [desc[0] for desc in cursor.description]
+                    for row in rows:
+                        yield dict(zip(columns, row))
+            finally:
+                cursor.close()
+                # End the read transaction the named cursor was opened in.
+                connection.rollback()
+
+    @staticmethod
+    def validate_changes(changes: Dict[str, Any]):
+        """
+        Checks the fields a compare_and_swap() is asked to change, which never go through a Todo's
+        validation: they must be Todo columns, and a new priority or due date must be valid.
+        """
+        errors = [f"Unknown field: {column}." for column in changes if column not in Todo.fields()]
+        if 'priority' in changes and (isinstance(changes['priority'], bool) or changes['priority'] not in (0, 1, 2)):
+            errors.append("Priority must be 0 (low), 1 (medium) or 2 (high).")
+        if changes.get('due_date') is not None and not isinstance(changes['due_date'], datetime):
+            errors.append("Due date must be a date.")
+        if errors:
+            raise ModelValidationError(errors)
+
+    def compare_and_swap(
+            self, todo_id: str, person_id: str, expected_version: str, changes: Dict[str, Any],
+            changed_by_id: Optional[str] = None
+    ) -> Tuple[str, Optional[Todo]]:
+        """
+        Applies `changes` to a todo only if it is active, owned by `person_id` and still at
+        `expected_version`, copying the previous row to todo_audit (unless database triggers do) and
+        adjusting todo_stats in the same statement. The changes are checked by validate_changes() first,
+        and the row's changed_by_id is set to `changed_by_id` (the repository's user by default).
+
+        Returns ('updated', todo) on success, ('conflict', todo) when the version did not match,
+        ('forbidden', None) when the todo belongs to someone else and ('not_found', None) otherwise.
+        """
+        self.validate_changes(changes)
+
+        assignments = ''.join(f"{column} = %s, " for column in changes)
+        # Store datetimes the same way the repository's save() does.
+        values = [
+            value.strftime('%Y-%m-%d %H:%M:%S') if isinstance(value, datetime) else value
+            for value in changes.values()
+        ]
+        new_version = uuid.uuid4().hex
+        changed_on = datetime.utcnow()
+
+        audit = " audit AS (INSERT INTO todo_audit SELECT * FROM old)," if self.app_side_audit else ""
+
+        # The FOR UPDATE in `old` makes a concurrent writer wait and then re-check the version,
+        # so only one of two writers holding the same version can succeed.
+        query = f"""
+            WITH old AS (
+                SELECT * FROM todo
+                WHERE entity_id = %s AND person_id = %s AND version = %s AND active = true
+                FOR UPDATE
+            ),{audit} updated AS (
+                UPDATE todo
+                SET {assignments}previous_version = old.version, version = %s, changed_on = %s,
+                    changed_by_id = COALESCE(%s, todo.changed_by_id)
+                FROM old
+                WHERE todo.entity_id = old.entity_id
+                RETURNING todo.*
+            ), stats AS (
+                INSERT INTO todo_stats (person_id, priority, total, completed)
+                SELECT person_id, priority, sum(total), sum(completed)
+                FROM (
+                    SELECT person_id, priority, -1 AS total, -is_completed::int AS completed FROM old
+                    UNION ALL
+                    SELECT person_id, priority, 1 AS total, is_completed::int AS completed FROM updated
+                ) AS delta
+                GROUP BY person_id, priority
+                HAVING sum(total) <> 0 OR sum(completed) <> 0
+                ON CONFLICT (person_id, priority) DO UPDATE
+                SET total = todo_stats.total + EXCLUDED.total, completed = todo_stats.completed + EXCLUDED.completed
+            )
+            SELECT updated.*, 'updated' AS cas_status FROM updated
+            UNION ALL
+            SELECT todo.*, CASE WHEN todo.person_id = %s THEN 'conflict' ELSE 'forbidden' END AS cas_status
+            FROM todo
+            WHERE todo.entity_id = %s AND todo.active = true AND NOT EXISTS (SELECT 1 FROM updated);
+        """
+        params = (
+            todo_id, person_id, expected_version,
+            *values, new_version, changed_on, changed_by_id or self.user_id,
+            person_id, todo_id,
+        )
+
+        rows = self.execute_returning(query, params)
+        if not rows:
+            return 'not_found', None
+
+        status = rows[0].pop('cas_status')
+        if status == 'forbidden':
+            return status, None
+        return status, Todo.from_dict(rows[0])
+
+    @staticmethod
+    def get_stats_key(todo: Optional[Todo]) -> Optional[Tuple[str, int, bool]]:
+        """Returns what a todo counts towards in todo_stats, or None if it does not count."""
+        if todo is None or not todo.active:
+            return None
+        return todo.person_id, todo.priority, bool(todo.is_completed)
+
+    @staticmethod
+    def get_stats_delta_query(
+            transitions: Iterable[Tuple[Optional[Tuple[str, int, bool]], Optional[Tuple[str, int, bool]]]]
+    ) -> Optional[Tuple[str, List]]:
+        """
+        Returns the upsert applying a set of (before, after) stats key transitions to todo_stats, or
+        None if they cancel out. Keys come from `get_stats_key`; None stands for "not counted".
+        """
+        deltas = {}
+        for before, after in transitions:
+            for key, sign in ((before, -1), (after, 1)):
+                if key is None:
+                    continue
+                person_id, priority, is_completed = key
+                total, completed = deltas.get((person_id, priority), (0, 0))
+                deltas[(person_id, priority)] = (total + sign, completed + sign * int(is_completed))
+
+        rows = [(person_id, priority, total, completed)
+                for (person_id, priority), (total, completed) in deltas.items() if total or completed]
+        if not rows:
+            return None
+
+        query = f"""
+            INSERT INTO todo_stats (person_id, priority, total, completed)
+            VALUES {', '.join(['(%s, %s, %s, %s)'] * len(rows))}
+            ON CONFLICT (person_id, priority) DO UPDATE
+            SET total = todo_stats.total + EXCLUDED.total, completed = todo_stats.completed + EXCLUDED.completed
+        """
+        return query, [value for row in rows for value in row]
+
+    def get_stats(self, person_id: str, now: datetime) -> Dict[str, Any]:
+        """
+        Returns a person's todo counts from todo_stats. The overdue count depends on `now`, so it is
+        counted from the partial index on open todos with a due date instead.
+        """
+        query = """
+            SELECT priority, total, completed, NULL AS overdue
+            FROM todo_stats
+            WHERE person_id = %s
+            UNION ALL
+            SELECT NULL, NULL, NULL, count(*)
+            FROM todo
+            WHERE person_id = %s AND active = true AND is_completed = false AND due_date < %s;
+        """
+        with self.reading():
+            rows = self.adapter.execute_query(query, (person_id, person_id, now.strftime('%Y-%m-%d %H:%M:%S')))
+
+        stats = {'total': 0, 'completed': 0, 'overdue': 0, 'by_priority': {}}
+        for row in rows:
+            if row['priority'] is None:
+                stats['overdue'] = row['overdue']
+            elif row['total']:
+                stats['total'] += row['total']
+                stats['completed'] += row['completed']
+                stats['by_priority'][row['priority']] = {'total': row['total'], 'completed': row['completed']}
+        return stats
+
+    def get_stats_person_ids(self, after: Optional[str], limit: int) -> List[str]:
+        """Returns the next `limit` ids, in order, of people who have todos or todo_stats rows."""
+        query = """
+            SELECT person_id FROM (
+                SELECT person_id FROM todo
+                UNION
+                SELECT person_id FROM todo_stats
+            ) AS people
+            WHERE %s IS NULL OR person_id > %s
+            ORDER BY person_id
+            LIMIT %s;
+        """
+        with self.adapter:
+            rows = self.adapter.execute_query(query, (after, after, limit))
+        return [row['person_id'] for row in rows]
+
+    def reconcile_stats(self, person_id: str) -> int:
+        """
+        Recomputes a person's todo_stats rows from their todos and returns how many rows were corrected.
+
+        The person's counter rows are locked first and the todos counted in a later statement, so a
+        concurrent writer either commits before the count (and is counted) or applies its delta after
+        the corrected values are committed.
+        """
+        lock_query = "SELECT 1 FROM todo_stats WHERE person_id = %s FOR UPDATE;"
+        reconcile_query = """
+            WITH actual AS (
+                SELECT person_id, priority, count(*) AS total, count(*) FILTER (WHERE is_completed) AS completed
+                FROM todo
+                WHERE person_id = %s AND active = true
+                GROUP BY person_id, priority
+            ), fixed AS (
+                INSERT INTO todo_stats (person_id, priority, total, completed)
+                SELECT person_id, priority, total, completed FROM actual
+                ON CONFLICT (person_id, priority) DO UPDATE
+                SET total = EXCLUDED.total, completed = EXCLUDED.completed
+                WHERE (todo_stats.total, todo_stats.completed) IS DISTINCT FROM (EXCLUDED.total, EXCLUDED.completed)
+                RETURNING 1
+            ), removed AS (
+                DELETE FROM todo_stats
+                WHERE person_id = %s AND (total <> 0 OR completed <> 0)
+                  AND priority NOT IN (SELECT priority FROM actual)
+                RETURNING 1
+            )
+            SELECT (SELECT count(*) FROM fixed) + (SELECT count(*) FROM removed) AS corrected;
+        """
+        with self.adapter:
+            try:
+                self.adapter._call_cursor('execute', lock_query, (person_id,))
+                self.adapter._call_cursor('execute', reconcile_query, (person_id, person_id))
+                corrected = self.adapter._call_cursor('fetchone')[0]
+                self.adapter._connection.commit()
+            except Exception:
+                self.adapter._connection.rollback()
+                raise
+        return corrected
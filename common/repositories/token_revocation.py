@@ -0,0 +1,42 @@
+from typing import Dict, List
+
+from rococo.data.postgresql import PostgreSQLAdapter
+
+
+class TokenRevocationRepository:
+    """Stores access token revocations in the access_token_revocation table created by migration 0000000012."""
+
+    def __init__(self, adapter: PostgreSQLAdapter):
+        self.adapter = adapter
+
+    def revoke_token(self, jti: str, expires_at: float):
+        query = "INSERT INTO access_token_revocation (jti, expires_at) VALUES (%s, %s);"
+        with self.adapter:
+            self.adapter.execute_query(query, (jti, expires_at))
+
+    def revoke_person_tokens(self, person_id: str, revoked_before: float, expires_at: float):
+        query = "INSERT INTO access_token_revocation (person_id, revoked_before, expires_at) VALUES (%s, %s, %s);"
+        with self.adapter:
+            self.adapter.execute_query(query, (person_id, revoked_before, expires_at))
+
+    def get_revocations(self, now: float) -> List[Dict]:
+        """Returns the revocations that still revoke unexpired tokens."""
+        query = """
+            SELECT jti, person_id, revoked_before, expires_at
+            FROM access_token_revocation
+            WHERE expires_at > %s;
+        """
+        with self.adapter:
+            return self.adapter.execute_query(query, (now,))
+
+    def delete_expired(self, now: float) -> int:
+        """Deletes the revocations whose tokens have all expired. Returns the number deleted."""
+        with self.adapter:
+            try:
+                self.adapter._call_cursor('execute', "DELETE FROM access_token_revocation WHERE expires_at <= %s;", (now,))
+                deleted = self.adapter._cursor.rowcount
+                self.adapter._connection.commit()
+            except Exception:
+                self.adapter._connection.rollback()
+                raise
+        return deleted
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from rococo.data.postgresql import PostgreSQLAdapter
+from rococo.models import VersionedModel
+
+
+class UnitOfWork:
+    """
+    Collects pending saves across repositories and writes them in a single transaction.
+
+    Rows are grouped by table so each table gets one multi-row audit insert (unless audit rows are
+    written by database triggers) and one multi-row upsert, and all statements are sent to PostgreSQL
+    in a single round trip with a single commit.
+
+    Used as a context manager, the unit of work holds one connection for the whole block, so rows
+    locked with `select_for_update` stay locked until the pending saves are committed.
+
+    Usage:
+        with repository_factory.unit_of_work() as uow:
+            uow.save(email_repo, email)
+            uow.save(person_repo, person)
+    """
+
+    def __init__(self, adapter: PostgreSQLAdapter, app_side_audit: bool = True):
+        self.adapter = adapter
+        self.app_side_audit = app_side_audit
+        self._pending = OrderedDict()
+        self._statements = []
+        self._in_context = False
+
+    def __enter__(self):
+        self.adapter.__enter__()
+        self._in_context = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None and self.has_pending_work():
+                self.commit()
+            else:
+                # Nothing to write (or the block failed): end the transaction and release any row locks.
+                self._clear()
+                self.adapter._connection.rollback()
+        finally:
+            self._in_context = False
+            self.adapter.__exit__(exc_type, exc_value, traceback)
+
+    def select_for_update(self, repository, conditions: Dict[str, Any]) -> List[VersionedModel]:
+        """Loads and locks the active rows matching `conditions` until this unit of work ends."""
+        if not self._in_context:
+            raise RuntimeError("select_for_update can only be used inside a `with` block of the unit of work.")
+
+        condition_strs, values = [f"{repository.table_name}.active = true"], []
+        for key, value in conditions.items():
+            if isinstance(value, (list, tuple)):
+                if not value:
+                    return []
+                condition_strs.append(f"{key} IN ({', '.join(['%s'] * len(value))})")
+                values += list(value)
+            else:
+                condition_strs.append(f"{key} = %s")
+                values.append(value)
+
+        query = f"SELECT * FROM {repository.table_name} WHERE {' AND '.join(condition_strs)} FOR UPDATE"
+        rows = self.adapter.execute_query(query, tuple(values))
+        return [repository.model.from_dict(row) for row in rows]
+
+    def save(self, repository, instance: VersionedModel) -> VersionedModel:
+        # Validation happens here, before anything is written, so a failure leaves no partial writes.
+        data = repository._process_data_before_save(instance)
+        # Saving the same entity twice keeps only its latest state, since one upsert cannot touch a row twice.
+        self._pending.setdefault(repository.table_name, OrderedDict())[data['entity_id']] = data
+        return instance
+
+    def add_statement(self, query: str, values: List[Any]):
+        """Queues a statement to run in the same transaction, after the pending saves."""
+        self._statements.append((query, list(values)))
+
+    def has_pending_work(self) -> bool:
+        return bool(self._pending or self._statements)
+
+    def _clear(self):
+        self._pending.clear()
+        self._statements = []
+
+    def _get_table_queries(self, table_name, rows):
+        columns = list(rows[0].keys())
+        entity_ids = [row['entity_id'] for row in rows]
+
+        audit_query = (
+            f"INSERT INTO {table_name}_audit "
+            f"(SELECT * FROM {table_name} WHERE entity_id IN ({', '.join(['%s'] * len(entity_ids))}))"
+        )
+
+        row_placeholders = f"({', '.join(['%s'] * len(columns))})"
+        update_columns = ', '.join(f"{column} = EXCLUDED.{column}" for column in columns if column != 'entity_id')
+        save_query = (
+            f"INSERT INTO {table_name} ({', '.join(columns)}) "
+            f"VALUES {', '.join([row_placeholders] * len(rows))} "
+            f"ON CONFLICT (entity_id) DO UPDATE SET {update_columns}"
+        )
+        save_values = [row.get(column) for row in rows for column in columns]
+
+        if not self.app_side_audit:
+            return [(save_query, save_values)]
+        return [(audit_query, entity_ids), (save_query, save_values)]
+
+    def get_queries(self):
+        queries = []
+        for table_name, rows in self._pending.items():
+            queries += self._get_table_queries(table_name, list(rows.values()))
+        return queries + self._statements
+
+    def _flush(self):
+        queries = self.get_queries()
+        sql = ';\n'.join(query for query, _ in queries)
+        values = [value for _, query_values in queries for value in query_values]
+
+        try:
+            self.adapter.run_transaction([(sql, values)])
+        except Exception:
+            # run_transaction does not roll back, which would leave the (pooled) connection unusable.
+            self.adapter._connection.rollback()
+            raise
+        finally:
+            self._clear()
+
+    def commit(self):
+        if not self.has_pending_work():
+            return
+
+        if self._in_context:
+            self._flush()
+        else:
+            with self.adapter:
+                self._flush()
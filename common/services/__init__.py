@@ -5,3 +5,5 @@ from .organization import OrganizationService
 from .person_organization_role import PersonOrganizationRoleService
 from .auth import AuthService
 from .todo import TodoService
+from .audit import AuditService
+from .container import ServiceContainer, get_container, get_service
@@ -0,0 +1,103 @@
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from common.repositories.audit import AUDIT_TABLES
+from common.repositories.factory import RepositoryFactory
+
+ARCHIVE_FILE_PATTERN = re.compile(r'(?P<table>\w+_audit)_p\d{6}\.ndjson\.gz')
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class AuditService:
+    def __init__(self, config, container=None):
+        self.config = config
+        self.repo_factory = container.repository_factory if container else RepositoryFactory(config)
+        self.audit_repo = self.repo_factory.get_audit_partition_repository()
+
+    def create_partitions(self, today: Optional[date] = None) -> List[str]:
+        """
+        Creates the missing monthly audit partitions from this month to AUDIT_PARTITIONS_AHEAD months ahead,
+        and for any month with rows in a default partition, so those rows can be archived like the rest.
+        """
+        this_month = (today or date.today()).replace(day=1)
+        upcoming = [_add_months(this_month, offset) for offset in range(self.config.AUDIT_PARTITIONS_AHEAD + 1)]
+
+        created = []
+        for table in AUDIT_TABLES:
+            existing = {name for name, _ in self.audit_repo.get_partitions(table)}
+            for month in sorted(set(upcoming) | set(self.audit_repo.get_default_partition_months(table))):
+                if self.audit_repo.get_partition_name(table, month) not in existing:
+                    created.append(self.audit_repo.create_partition(table, month))
+        return created
+
+    def archive_old_partitions(
+            self, directory: str, today: Optional[date] = None
+    ) -> List[Tuple[str, str, int]]:
+        """
+        Detaches the audit partitions older than AUDIT_ARCHIVE_AFTER_MONTHS, streams each to
+        <directory>/<partition>.ndjson.gz and drops it. Returns (partition, file, rows) per archived partition.
+
+        Partitions left detached by an interrupted run are archived too. A partition is only dropped once
+        its file is completely written, so history is never lost.
+        """
+        cutoff = _add_months((today or date.today()).replace(day=1), -self.config.AUDIT_ARCHIVE_AFTER_MONTHS)
+        os.makedirs(directory, exist_ok=True)
+
+        archived = []
+        for table in AUDIT_TABLES:
+            for partition, attached in self.audit_repo.get_partitions(table):
+                if self.audit_repo.get_partition_month(table, partition) >= cutoff:
+                    continue
+                if attached:
+                    self.audit_repo.detach_partition(table, partition)
+                path, rows = self._write_archive(partition, directory)
+                self.audit_repo.drop_partition(partition)
+                archived.append((partition, path, rows))
+        return archived
+
+    def _write_archive(self, partition: str, directory: str) -> Tuple[str, int]:
+        path = os.path.join(directory, f"{partition}.ndjson.gz")
+        partial_path = f"{path}.partial"
+        rows = 0
+        with open(partial_path, 'wb') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+                for row in self.audit_repo.iter_rows(partition, self.config.AUDIT_ARCHIVE_CHUNK_SIZE):
+                    archive.write(json.dumps(row, default=_encode_value).encode() + b'\n')
+                    rows += 1
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(partial_path, path)
+        return path, rows
+
+    def restore_archive(self, path: str) -> int:
+        """
+        Loads an archive written by archive_old_partitions back into its audit table and returns the rows inserted.
+        The rows land in the default partition, so the next maintenance run archives them again.
+        """
+        match = ARCHIVE_FILE_PATTERN.fullmatch(os.path.basename(path))
+        if not match or match.group('table') not in AUDIT_TABLES:
+            raise ValueError(f"{path} is not an audit archive")
+        table = match.group('table')
+
+        inserted, batch = 0, []
+        with gzip.open(path, 'rt') as archive:
+            for line in archive:
+                batch.append(json.loads(line))
+                if len(batch) >= self.config.AUDIT_ARCHIVE_CHUNK_SIZE:
+                    inserted += self.audit_repo.insert_rows(table, batch)
+                    batch = []
+        return inserted + self.audit_repo.insert_rows(table, batch)
@@ -4,13 +4,17 @@ from common.services import (
 )
 from common.models import Person, Email, LoginMethod, Organization, PersonOrganizationRole
 from common.models.login_method import LoginMethodType
-from common.tasks.send_message import MessageSender
+from common.repositories.factory import RepositoryFactory
+from common.services.cache import verified_token_cache
+from common.services.token_revocation import get_token_revocations
+from common.tasks.send_message import get_message_sender, MessageQueueFullError
+from common.tasks.password_hashing import get_password_hasher
 from common.app_logger import logger
 
-from werkzeug.security import check_password_hash
-
+import hashlib
 import jwt
 import time
+import uuid
 
 from app.helpers.string_utils import urlsafe_base64_encode, force_bytes
 from app.helpers.string_utils import force_str, urlsafe_base64_decode
@@ -18,18 +22,27 @@ from app.helpers.exceptions import InputValidationError, APIException
 
 
 class AuthService:
-    def __init__(self, config):
+    def __init__(self, config, container=None):
         self.config = config
 
         self.EMAIL_TRANSMITTER_QUEUE_NAME = config.QUEUE_NAME_PREFIX + config.EMAIL_SERVICE_PROCESSOR_QUEUE_NAME
         
-        self.person_service = PersonService(config)
-        self.email_service = EmailService(config)
-        self.login_method_service = LoginMethodService(config)
-        self.organization_service = OrganizationService(config)
-        self.person_organization_role_service = PersonOrganizationRoleService(config)
-
-        self.message_sender = MessageSender()
+        self.repository_factory = container.repository_factory if container else RepositoryFactory(config)
+
+        if container:
+            self.person_service = container.get(PersonService)
+            self.email_service = container.get(EmailService)
+            self.login_method_service = container.get(LoginMethodService)
+            self.organization_service = container.get(OrganizationService)
+            self.person_organization_role_service = container.get(PersonOrganizationRoleService)
+            self.message_sender = container.message_sender
+        else:
+            self.person_service = PersonService(config)
+            self.email_service = EmailService(config)
+            self.login_method_service = LoginMethodService(config)
+            self.organization_service = OrganizationService(config)
+            self.person_organization_role_service = PersonOrganizationRoleService(config)
+            self.message_sender = get_message_sender()
         
 
     def signup(self, email, first_name, last_name):
@@ -59,11 +72,13 @@ class AuthService:
             role="admin"
         )
 
-        email = self.email_service.save_email(email)
-        person = self.person_service.save_person(person)
-        login_method = self.login_method_service.save_login_method(login_method)
-        organization = self.organization_service.save_organization(organization)
-        person_organization_role = self.person_organization_role_service.save_person_organization_role(person_organization_role)
+        # Write the whole account in one transaction so a failure never leaves a partial signup behind.
+        with self.repository_factory.unit_of_work() as uow:
+            uow.save(self.email_service.email_repo, email)
+            uow.save(self.person_service.person_repo, person)
+            uow.save(self.login_method_service.login_method_repo, login_method)
+            uow.save(self.organization_service.organization_repo, organization)
+            uow.save(self.person_organization_role_service.person_organization_role_repo, person_organization_role)
 
         self.send_welcome_email(login_method, person, email.email)
 
@@ -102,27 +117,29 @@ class AuthService:
             }
             logger.info("verify_link")
             logger.info(verify_link)
-            self.message_sender.send_message(self.EMAIL_TRANSMITTER_QUEUE_NAME, message)
+            self.send_email_message(message)
 
     def login_user_by_email_password(self, email: str, password: str):
-        email_obj = self.email_service.get_email_by_email_address(email)
+        email_obj, login_method, person = self.email_service.get_identity_by_email_address(email)
         if not email_obj:
             raise InputValidationError("Email is not registered.")
         
-        login_method = self.login_method_service.get_login_method_by_email_id(email_obj.entity_id)
-        if not check_password_hash(login_method.password, password):
+        if not login_method or not get_password_hasher().check_password_hash(login_method.password, password):
             raise InputValidationError('Incorrect email or password.')
         
         access_token, expiry = self.generate_access_token(login_method)
 
-        return access_token, expiry
+        return access_token, expiry, person
 
     def generate_access_token(self, login_method: LoginMethod) -> str:
-        expiry = time.time() + int(self.config.ACCESS_TOKEN_EXPIRE)
+        issued_at = time.time()
+        expiry = issued_at + int(self.config.ACCESS_TOKEN_EXPIRE)
         token = jwt.encode(
             {
                 'email_id': login_method.email_id,
                 'person_id': login_method.person_id,
+                'jti': uuid.uuid4().hex,
+                'iat': issued_at,
                 'exp': expiry,
             },
             self.config.AUTH_JWT_SECRET,
@@ -131,17 +148,32 @@ class AuthService:
         return token, expiry
 
     def parse_access_token(self, access_token: str) -> dict:
-        try:
-            decoded_token = jwt.decode(
-                access_token,
-                self.config.AUTH_JWT_SECRET,
-                algorithms=['HS256']
-            )
-            exp_time = decoded_token['exp']
-            if time.time() <= exp_time:
-                return decoded_token
-        except jwt.ExpiredSignatureError:
-            return
+        # The signature of a token only has to be verified once; later requests find its claims by digest.
+        digest = hashlib.sha256(access_token.encode()).digest()
+        decoded_token = verified_token_cache.get(digest)
+        if decoded_token is None:
+            try:
+                decoded_token = jwt.decode(
+                    access_token,
+                    self.config.AUTH_JWT_SECRET,
+                    algorithms=['HS256']
+                )
+            except jwt.ExpiredSignatureError:
+                return
+            verified_token_cache.set(digest, decoded_token, ttl=decoded_token['exp'] - time.time())
+
+        if time.time() <= decoded_token['exp'] and not get_token_revocations().is_revoked(decoded_token):
+            return decoded_token
+
+    def revoke_access_token(self, parsed_token: dict):
+        """Revokes one access token, e.g. on logout. Tokens issued before they had a jti cannot be revoked alone."""
+        if parsed_token.get('jti'):
+            get_token_revocations().revoke_token(parsed_token['jti'], parsed_token['exp'])
+
+    def revoke_person_access_tokens(self, person_id: str):
+        """Revokes every access token issued to a person until now."""
+        now = time.time()
+        get_token_revocations().revoke_person_tokens(person_id, now, now + int(self.config.ACCESS_TOKEN_EXPIRE))
 
     @staticmethod
     def parse_reset_password_token(token, login_method: LoginMethod):
@@ -154,15 +186,13 @@ class AuthService:
             return
 
     def trigger_forgot_password_email(self, email: str):
-        email_obj = self.email_service.get_email_by_email_address(email)
+        email_obj, login_method, person = self.email_service.get_identity_by_email_address(email)
         if not email_obj:
             raise APIException("Email is not registered.")
         
-        person = self.person_service.get_person_by_id(email_obj.person_id)
         if not person:
             raise APIException("Person does not exist.")
 
-        login_method = self.login_method_service.get_login_method_by_email_id(email_obj.entity_id)
         if not login_method:
             raise APIException("Login method does not exist.")
 
@@ -178,7 +208,15 @@ class AuthService:
                 },
                 "to_emails": [email],
             }
+            self.send_email_message(message)
+
+    def send_email_message(self, message: dict):
+        # Emails are sent after the account changes are committed, so a full queue must not fail the request.
+        # The sender counts the dropped message in its metrics.
+        try:
             self.message_sender.send_message(self.EMAIL_TRANSMITTER_QUEUE_NAME, message)
+        except MessageQueueFullError as e:
+            logger.error(f"Dropped {message['event']} email to {', '.join(message['to_emails'])}: {e}")
 
 
     def reset_user_password(self, token: str, uidb64: str, password: str):
@@ -211,5 +249,8 @@ class AuthService:
         login_method = self.login_method_service.update_password(login_method, new_login_method.password)
         email_obj = self.email_service.verify_email(email_obj)
 
+        # Sessions opened with the old password must not outlive it.
+        self.revoke_person_access_tokens(person_obj.entity_id)
+
         access_token, expiry = self.generate_access_token(login_method)
         return access_token, expiry, person_obj
\ No newline at end of file
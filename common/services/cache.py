@@ -0,0 +1,13 @@
+from common.app_config import config
+from common.utils.cache import TTLCache
+
+# (email_id, person, email) of authenticated principals keyed by person_id.
+principal_cache = TTLCache(max_size=config.PRINCIPAL_CACHE_MAX_SIZE, ttl=config.PRINCIPAL_CACHE_TTL)
+
+# Organizations keyed by entity_id, and the PersonOrganizationRole of each (person_id, organization_id)
+# membership, as checked by organization_required.
+organization_cache = TTLCache(max_size=config.MEMBERSHIP_CACHE_MAX_SIZE, ttl=config.MEMBERSHIP_CACHE_TTL)
+membership_cache = TTLCache(max_size=config.MEMBERSHIP_CACHE_MAX_SIZE, ttl=config.MEMBERSHIP_CACHE_TTL)
+
+# Claims of access tokens whose signature has been verified, keyed by the token's SHA-256 digest.
+verified_token_cache = TTLCache(max_size=config.VERIFIED_TOKEN_CACHE_MAX_SIZE, ttl=config.ACCESS_TOKEN_EXPIRE)
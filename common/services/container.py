@@ -0,0 +1,50 @@
+import threading
+
+from common.repositories.factory import RepositoryFactory
+from common.utils.request_scope import get_request_scope
+
+
+class ServiceContainer:
+    """
+    Process-wide container that owns the repository factory and shared adapters,
+    and hands out services cached for the lifetime of the current request.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.repository_factory = RepositoryFactory(config)
+
+    @property
+    def message_sender(self):
+        from common.tasks.send_message import get_message_sender
+        return get_message_sender()
+
+    def get(self, service_class):
+        scope = get_request_scope()
+        if scope is None:
+            return service_class(self.config, container=self)
+
+        cache_key = ('service', service_class)
+        service = scope.get(cache_key)
+        if service is None:
+            service = service_class(self.config, container=self)
+            scope[cache_key] = service
+        return service
+
+
+_container = None
+_container_lock = threading.Lock()
+
+
+def get_container() -> ServiceContainer:
+    global _container
+    if _container is None:
+        with _container_lock:
+            if _container is None:
+                from common.app_config import config
+                _container = ServiceContainer(config)
+    return _container
+
+
+def get_service(service_class):
+    return get_container().get(service_class)
@@ -1,22 +1,32 @@
 from common.repositories.factory import RepositoryFactory, RepoType
 from common.models import Email
+from common.services.cache import principal_cache
 
 
 class EmailService:
 
-    def __init__(self, config):
+    def __init__(self, config, container=None):
         self.config = config
-        self.repository_factory = RepositoryFactory(config)
+        self.repository_factory = container.repository_factory if container else RepositoryFactory(config)
         self.email_repo = self.repository_factory.get_repository(RepoType.EMAIL)
 
     def save_email(self, email: Email):
         email = self.email_repo.save(email)
+        principal_cache.invalidate(email.person_id)
         return email
 
     def get_email_by_email_address(self, email_address: str):
         email = self.email_repo.get_one({'email': email_address})
         return email
 
+    def get_identity_by_email_address(self, email_address: str):
+        """Returns (email, login_method, person) for an email address using a single query."""
+        return self.email_repo.get_identity_by_email_address(email_address)
+
+    def get_identity_by_email_id(self, email_id: str):
+        """Returns (email, login_method, person) for an email id using a single query."""
+        return self.email_repo.get_identity_by_email_id(email_id)
+
     def get_email_by_id(self, entity_id: str):
         email = self.email_repo.get_one({'entity_id': entity_id})
         return email
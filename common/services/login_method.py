@@ -5,9 +5,9 @@ from common.models.login_method import LoginMethodType
 
 class LoginMethodService:
 
-    def __init__(self, config):
+    def __init__(self, config, container=None):
         self.config = config
-        self.repository_factory = RepositoryFactory(config)
+        self.repository_factory = container.repository_factory if container else RepositoryFactory(config)
         self.login_method_repo = self.repository_factory.get_repository(RepoType.LOGIN_METHOD)
 
     def save_login_method(self, login_method: LoginMethod):
@@ -1,22 +1,30 @@
+from typing import List, Optional
+
 from common.repositories.factory import RepositoryFactory, RepoType
 from common.models import Organization
+from common.services.cache import organization_cache
 
 
 class OrganizationService:
 
-    def __init__(self, config):
+    def __init__(self, config, container=None):
         self.config = config
-        self.repository_factory = RepositoryFactory(config)
+        self.repository_factory = container.repository_factory if container else RepositoryFactory(config)
         self.organization_repo = self.repository_factory.get_repository(RepoType.ORGANIZATION)
 
     def save_organization(self, organization: Organization):
         organization = self.organization_repo.save(organization)
+        organization_cache.invalidate(organization.entity_id)
         return organization
 
     def get_organization_by_id(self, entity_id: str):
         organization = self.organization_repo.get_one({"entity_id": entity_id})
         return organization
 
-    def get_organizations_with_roles_by_person(self, person_id: str):
-        results = self.organization_repo.get_organizations_by_person_id(person_id)
+    def get_organizations_with_roles_by_person(
+            self, person_id: str, columns: Optional[List[str]] = None, include_role: bool = True
+    ):
+        results = self.organization_repo.get_organizations_by_person_id(
+            person_id, columns=columns, include_role=include_role
+        )
         return results
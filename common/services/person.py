@@ -1,28 +1,26 @@
 from common.repositories.factory import RepositoryFactory, RepoType
 from common.models.person import Person
+from common.services.cache import principal_cache
 
 
 class PersonService:
 
-    def __init__(self, config):
+    def __init__(self, config, container=None):
         self.config = config
 
         from common.services import EmailService
-        self.email_service = EmailService(config)
+        self.email_service = container.get(EmailService) if container else EmailService(config)
 
-        self.repository_factory = RepositoryFactory(config)
+        self.repository_factory = container.repository_factory if container else RepositoryFactory(config)
         self.person_repo = self.repository_factory.get_repository(RepoType.PERSON)
 
     def save_person(self, person: Person):
         person = self.person_repo.save(person)
+        principal_cache.invalidate(person.entity_id)
         return person
 
     def get_person_by_email_address(self, email_address: str):
-        email_obj = self.email_service.get_email_by_email_address(email_address)
-        if not email_obj:
-            return
-        
-        person = self.person_repo.get_one({"entity_id": email_obj.person_id})
+        _, _, person = self.email_service.get_identity_by_email_address(email_address)
         return person
 
     def get_person_by_id(self, entity_id: str):
@@ -34,4 +32,19 @@ class PersonService:
         person.first_name = first_name
         person.last_name = last_name
         self.person_repo.save(person)
+        principal_cache.invalidate(person_id)
         return person
+
+    def get_principal(self, person_id: str, email_id: str):
+        """
+        Returns the (person, email) pair of an authenticated principal, served from an in-process
+        TTL cache when possible.
+        """
+        def load():
+            email, _, person = self.email_service.get_identity_by_email_id(email_id)
+            if person and person.entity_id != person_id:
+                person = self.get_person_by_id(person_id)
+            return email_id, person, email
+
+        _, person, email = principal_cache.get_copy(person_id, load, is_current=lambda cached: cached[0] == email_id)
+        return person, email
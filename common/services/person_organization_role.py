@@ -1,16 +1,19 @@
 from common.repositories.factory import RepositoryFactory, RepoType
 from common.models import PersonOrganizationRole
+from common.services.cache import membership_cache, organization_cache
 
 
 class PersonOrganizationRoleService:
 
-    def __init__(self, config):
+    def __init__(self, config, container=None):
         self.config = config
-        self.repository_factory = RepositoryFactory(config)
+        self.repository_factory = container.repository_factory if container else RepositoryFactory(config)
         self.person_organization_role_repo = self.repository_factory.get_repository(RepoType.PERSON_ORGANIZATION_ROLE)
+        self.organization_repo = self.repository_factory.get_repository(RepoType.ORGANIZATION)
 
     def save_person_organization_role(self, person_organization_role: PersonOrganizationRole):
         person_organization_role = self.person_organization_role_repo.save(person_organization_role)
+        membership_cache.invalidate((person_organization_role.person_id, person_organization_role.organization_id))
         return person_organization_role
 
     def get_roles_by_person_id(self, person_id: str):
@@ -21,4 +24,21 @@ class PersonOrganizationRoleService:
             "person_id": person_id,
             "organization_id": organization_id
         })
-        return person_organization_role
\ No newline at end of file
+        return person_organization_role
+
+    def get_membership(self, person_id: str, organization_id: str):
+        """
+        Returns the (organization, person_organization_role) of a person in an organization, served from
+        in-process TTL caches when possible. The role is None when the person is not a member, and both
+        are None when the organization does not exist.
+        """
+        organization = organization_cache.get_copy(
+            organization_id, lambda: self.organization_repo.get_one({"entity_id": organization_id})
+        )
+        if not organization:
+            return None, None
+
+        person_organization_role = membership_cache.get_copy(
+            (person_id, organization_id), lambda: self.get_role_of_person_in_organization(person_id, organization_id)
+        )
+        return organization, person_organization_role
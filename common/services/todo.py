@@ -1,7 +1,9 @@
 from common.repositories.factory import RepositoryFactory, RepoType
 from common.models.todo import Todo
+from common.repositories.todo import TodoRepository
+from rococo.models.versioned_model import ModelValidationError
 from datetime import datetime, timezone
-from typing import List
+from typing import Dict, Iterator, List, Optional, Tuple
 
 class TodoError(Exception):
     pass
@@ -15,20 +17,34 @@ class UnauthorizedError(TodoError):
 class ConcurrentModificationError(TodoError):
     pass
 
+class InvalidBatchOperationError(TodoError):
+    pass
+
+BATCH_OPERATIONS = ('create', 'update', 'complete', 'delete')
+TODO_UPDATABLE_FIELDS = ('title', 'description', 'priority', 'due_date')
+
 class TodoService:
-    def __init__(self, config):
+    def __init__(self, config, container=None):
         self.config = config
-        self.repo_factory = RepositoryFactory(config)
+        self.repo_factory = container.repository_factory if container else RepositoryFactory(config)
         self.todo_repo = self.repo_factory.get_repository(RepoType.TODO)
     
     def create_todo(self, todo: Todo) -> Todo:
-        return self.todo_repo.save(todo)
+        with self.repo_factory.unit_of_work() as uow:
+            uow.save(self.todo_repo, todo)
+            self._save_stats_delta(uow, [(None, TodoRepository.get_stats_key(todo))])
+        return todo
 
     def update_todo(self, todo: Todo, person_id: str) -> Todo:
         if todo.person_id != person_id:
             raise UnauthorizedError("You don't have permission to update this todo")
 
-        return self.todo_repo.save(todo)
+        with self.repo_factory.unit_of_work() as uow:
+            current = uow.select_for_update(self.todo_repo, {'entity_id': todo.entity_id})
+            uow.save(self.todo_repo, todo)
+            before = TodoRepository.get_stats_key(current[0]) if current else None
+            self._save_stats_delta(uow, [(before, TodoRepository.get_stats_key(todo))])
+        return todo
 
     def get_todo_by_id(self, todo_id: str, person_id: str) -> Todo:
         todo = self.todo_repo.get_one({'entity_id': todo_id, 'active': True})
@@ -46,25 +62,158 @@ class TodoService:
     def get_todos_by_person_id_and_status(self, person_id: str, is_completed: bool) -> List[Todo]:
         return self.todo_repo.get_many({'person_id': person_id, 'active': True, 'is_completed': is_completed})
 
-    def update_todo_status(self, todo_id: str, person_id: str, is_completed: bool, version: str) -> Todo:
-        todo = self.get_todo_by_id(todo_id, person_id)
-        if not todo:
+    def get_todos_page(
+            self, person_id: str, limit: Optional[int], after: Optional[Tuple[datetime, str]] = None,
+            is_completed: Optional[bool] = None, columns: Optional[List[str]] = None
+    ) -> Tuple[List[Todo], Optional[Tuple[datetime, str]]]:
+        return self.todo_repo.get_todos_page(person_id, limit, after=after, is_completed=is_completed, columns=columns)
+
+    def get_list_validator(self, person_id: str) -> Tuple[int, Optional[datetime]]:
+        return self.todo_repo.get_list_validator(person_id)
+
+    def search_todos(
+            self, person_id: str, search: str, limit: int, after: Optional[Tuple[float, str]] = None,
+            columns: Optional[List[str]] = None
+    ) -> Tuple[List[Todo], Optional[Tuple[float, str]]]:
+        return self.todo_repo.search_todos(person_id, search, limit, after=after, columns=columns)
+
+    def iter_todo_rows(
+            self, person_id: str, is_completed: Optional[bool] = None, columns: Optional[List[str]] = None
+    ) -> Iterator[Dict]:
+        return self.todo_repo.iter_todo_rows(
+            person_id, self.config.TODO_STREAM_CHUNK_SIZE, is_completed=is_completed, columns=columns
+        )
+
+    def update_todo_fields(self, todo_id: str, person_id: str, version: str, changes: Dict) -> Todo:
+        """Updates a todo in one conditional statement, failing if it is no longer at `version`."""
+        status, todo = self.todo_repo.compare_and_swap(todo_id, person_id, version, changes, changed_by_id=person_id)
+
+        if status == 'not_found':
             raise TodoNotFoundError(f"Todo {todo_id} not found")
 
-        if todo.person_id != person_id:
+        if status == 'forbidden':
             raise UnauthorizedError("You don't have permission to update this todo")
 
-        if todo.version != version:
+        if status == 'conflict':
             raise ConcurrentModificationError("Todo has been modified by another request")
 
-        todo.is_completed = is_completed
-        todo.completed_at = datetime.now(timezone.utc) if is_completed else None
-        return self.todo_repo.save(todo)
+        return todo
+
+    def update_todo_status(self, todo_id: str, person_id: str, is_completed: bool, version: str) -> Todo:
+        return self.update_todo_fields(todo_id, person_id, version, {
+            'is_completed': is_completed,
+            'completed_at': datetime.now(timezone.utc) if is_completed else None,
+        })
     
     def delete_todo(self, todo_id: str, person_id: str):
-        todo = self.get_todo_by_id(todo_id, person_id)
+        with self.repo_factory.unit_of_work() as uow:
+            todos = uow.select_for_update(self.todo_repo, {'entity_id': todo_id})
+            if not todos:
+                raise TodoNotFoundError(f"Todo {todo_id} not found")
+
+            todo = todos[0]
+            if todo.person_id != person_id:
+                raise UnauthorizedError("You don't have permission to access this todo")
+
+            before = TodoRepository.get_stats_key(todo)
+            todo.active = False
+            uow.save(self.todo_repo, todo)
+            self._save_stats_delta(uow, [(before, None)])
+        return todo
+
+    def get_todo_stats(self, person_id: str) -> Dict:
+        """Returns a person's todo counts (total, completed, overdue and per priority) without loading todos."""
+        return self.todo_repo.get_stats(person_id, datetime.utcnow())
+
+    def reconcile_todo_stats(self, batch_size: int = 500) -> Tuple[int, int]:
+        """
+        Recomputes todo_stats for everyone with todos, fixing any drift from the incrementally maintained
+        counters. Returns the number of people checked and the number of counter rows corrected.
+        """
+        checked, corrected, after = 0, 0, None
+        while True:
+            person_ids = self.todo_repo.get_stats_person_ids(after, batch_size)
+            if not person_ids:
+                return checked, corrected
+            for person_id in person_ids:
+                corrected += self.todo_repo.reconcile_stats(person_id)
+            checked += len(person_ids)
+            after = person_ids[-1]
+
+    def _save_stats_delta(self, uow, transitions):
+        query = TodoRepository.get_stats_delta_query(transitions)
+        if query:
+            uow.add_statement(*query)
+
+    def apply_batch(self, person_id: str, operations: List[Dict]) -> List[Tuple[Optional[Todo], Optional[str]]]:
+        """
+        Applies a list of create/update/complete/delete operations in one transaction and returns a
+        (todo, error message) result per operation. Operations that fail validation or their version
+        check are reported and skipped; the others are written together.
+
+        The referenced todos are loaded and locked with one SELECT ... FOR UPDATE, and every write,
+        including the todo_audit rows and the todo_stats changes, is sent as multi-row statements in a
+        single round trip.
+        """
+        results = [None] * len(operations)
+        todo_ids = list({op['id'] for op in operations if op.get('op') != 'create' and op.get('id')})
+
+        with self.repo_factory.unit_of_work() as uow:
+            todos = {todo.entity_id: todo for todo in uow.select_for_update(
+                self.todo_repo, {'entity_id': todo_ids, 'person_id': person_id}
+            )}
+            # What each todo counted towards in todo_stats before and after the batch
+            stats_before = {todo_id: TodoRepository.get_stats_key(todo) for todo_id, todo in todos.items()}
+            stats_after = {}
+
+            for index, op in enumerate(operations):
+                try:
+                    todo = self._apply_batch_operation(op, person_id, todos)
+                    uow.save(self.todo_repo, todo)
+                    stats_after[todo.entity_id] = TodoRepository.get_stats_key(todo)
+                    results[index] = (todo, None)
+                except TodoNotFoundError:
+                    results[index] = (None, 'Todo not found')
+                except (TodoError, ModelValidationError) as e:
+                    results[index] = (None, str(e))
+
+            self._save_stats_delta(uow, [
+                (stats_before.get(todo_id), key) for todo_id, key in stats_after.items()
+            ])
+
+        return results
+
+    @staticmethod
+    def _apply_batch_operation(op: Dict, person_id: str, todos: Dict[str, Todo]) -> Todo:
+        operation = op.get('op')
+        if operation not in BATCH_OPERATIONS:
+            raise InvalidBatchOperationError(f"Unknown operation '{operation}'")
+
+        if operation == 'create':
+            if not op.get('title'):
+                raise InvalidBatchOperationError('Title is required')
+            todo = Todo(person_id=person_id, title=op['title'])
+            for field_name in TODO_UPDATABLE_FIELDS:
+                if field_name in op:
+                    setattr(todo, field_name, op[field_name])
+            return todo
+
+        todo = todos.get(op.get('id'))
         if not todo:
-            raise TodoNotFoundError(f"Todo {todo_id} not found")
+            raise TodoNotFoundError(f"Todo {op.get('id')} not found")
 
-        todo.active = False
-        return self.todo_repo.save(todo)
+        if todo.version != op.get('version'):
+            raise ConcurrentModificationError("Todo has been modified by another request")
+
+        if operation == 'update':
+            for field_name in TODO_UPDATABLE_FIELDS:
+                if field_name in op:
+                    setattr(todo, field_name, op[field_name])
+        elif operation == 'complete':
+            is_completed = op.get('is_completed', True)
+            todo.is_completed = is_completed
+            todo.completed_at = datetime.now(timezone.utc) if is_completed else None
+        elif operation == 'delete':
+            todo.active = False
+
+        return todo
@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Callable, Dict
+
+from common.app_config import config
+from common.repositories.factory import RepositoryFactory
+
+
+class MemoryTokenRevocationBackend:
+    """
+    Access token denylist kept in this process. Tokens are revoked one at a time by their `jti` claim, or
+    all tokens of a person issued (`iat`) before a point in time. Entries are dropped once every token they
+    revoke has expired. Checking a token is a couple of dict lookups.
+    """
+
+    PURGE_INTERVAL = 60
+
+    def __init__(self, config):
+        self.config = config
+        self._tokens: Dict[str, float] = {}  # jti -> expires_at
+        self._people: Dict[str, tuple] = {}  # person_id -> (revoked_before, expires_at)
+        self._lock = threading.Lock()
+        self._purged_at = time.time()
+
+    def revoke_token(self, jti: str, expires_at: float):
+        with self._lock:
+            self._tokens[jti] = expires_at
+        self._purge_if_due()
+
+    def revoke_person_tokens(self, person_id: str, revoked_before: float, expires_at: float):
+        with self._lock:
+            previous = self._people.get(person_id)
+            if previous is None or previous[0] < revoked_before:
+                self._people[person_id] = (revoked_before, expires_at)
+        self._purge_if_due()
+
+    def is_revoked(self, claims: dict) -> bool:
+        if claims.get('jti') in self._tokens:
+            return True
+        revoked = self._people.get(claims.get('person_id'))
+        # Tokens issued before `iat` was added cannot be told apart, so they count as issued at 0.
+        return revoked is not None and claims.get('iat', 0) < revoked[0]
+
+    def purge_expired(self, now: float):
+        """Drops the revocations whose tokens have all expired."""
+        with self._lock:
+            self._tokens = {jti: expires_at for jti, expires_at in self._tokens.items() if expires_at > now}
+            self._people = {person_id: entry for person_id, entry in self._people.items() if entry[1] > now}
+            self._purged_at = now
+
+    def _purge_if_due(self):
+        now = time.time()
+        if now - self._purged_at >= self.PURGE_INTERVAL:
+            MemoryTokenRevocationBackend.purge_expired(self, now)
+
+
+class PostgresTokenRevocationBackend(MemoryTokenRevocationBackend):
+    """
+    Denylist shared by all API processes through the access_token_revocation table. Revocations are written
+    through to the table and checked against an in-memory copy that is reloaded every
+    TOKEN_REVOCATION_SYNC_INTERVAL seconds, so a revocation made by another process applies within that time.
+    """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.repository_factory = RepositoryFactory(config)
+        self.sync_interval = config.TOKEN_REVOCATION_SYNC_INTERVAL
+        self._synced_at = None
+        self._sync_lock = threading.Lock()
+
+    def revoke_token(self, jti: str, expires_at: float):
+        self.repository_factory.get_token_revocation_repository().revoke_token(jti, expires_at)
+        super().revoke_token(jti, expires_at)
+
+    def revoke_person_tokens(self, person_id: str, revoked_before: float, expires_at: float):
+        self.repository_factory.get_token_revocation_repository().revoke_person_tokens(
+            person_id, revoked_before, expires_at
+        )
+        super().revoke_person_tokens(person_id, revoked_before, expires_at)
+
+    def is_revoked(self, claims: dict) -> bool:
+        synced_at = self._synced_at
+        if synced_at is None or time.monotonic() - synced_at >= self.sync_interval:
+            self.sync()
+        return super().is_revoked(claims)
+
+    def sync(self):
+        # Only one thread reloads; the others keep using the current copy meanwhile.
+        if not self._sync_lock.acquire(blocking=self._synced_at is None):
+            return
+        try:
+            now = time.time()
+            tokens, people = {}, {}
+            for row in self.repository_factory.get_token_revocation_repository().get_revocations(now):
+                if row['jti'] is not None:
+                    tokens[row['jti']] = row['expires_at']
+                else:
+                    previous = people.get(row['person_id'])
+                    if previous is None or previous[0] < row['revoked_before']:
+                        people[row['person_id']] = (row['revoked_before'], row['expires_at'])
+            with self._lock:
+                self._tokens, self._people = tokens, people
+            self._synced_at = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    def purge_expired(self, now: float):
+        """Also deletes the expired rows of access_token_revocation, for all processes."""
+        self.repository_factory.get_token_revocation_repository().delete_expired(now)
+        super().purge_expired(now)
+
+
+TOKEN_REVOCATION_BACKENDS = {
+    'memory': MemoryTokenRevocationBackend,
+    'postgres': PostgresTokenRevocationBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def register_token_revocation_backend(name: str, factory: Callable):
+    """
+    Makes `factory(config)` selectable as TOKEN_REVOCATION_BACKEND=<name>, e.g. for a denylist in a shared
+    cache. The object it returns needs the methods of MemoryTokenRevocationBackend.
+    """
+    global _backend
+    TOKEN_REVOCATION_BACKENDS[name] = factory
+    _backend = None
+
+
+def get_token_revocations():
+    """Returns the process-wide denylist selected by TOKEN_REVOCATION_BACKEND."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = config.TOKEN_REVOCATION_BACKEND
+                if name not in TOKEN_REVOCATION_BACKENDS:
+                    raise ValueError(
+                        f"Unknown TOKEN_REVOCATION_BACKEND '{name}', expected one of {sorted(TOKEN_REVOCATION_BACKENDS)}"
+                    )
+                _backend = TOKEN_REVOCATION_BACKENDS[name](config)
+    return _backend
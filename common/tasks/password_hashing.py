@@ -0,0 +1,163 @@
+import concurrent.futures
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from werkzeug import security
+
+from common.app_config import config
+from common.app_logger import logger
+
+
+class HashingQueueFullError(Exception):
+    pass
+
+
+class HashingMetrics:
+    """Thread-safe latency counters for password hashing calls."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.completed += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def record_rejection(self):
+        with self._lock:
+            self.rejected += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_seconds': self.total_seconds / self.completed if self.completed else 0.0,
+                'max_seconds': self.max_seconds,
+            }
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification (scrypt) on a dedicated process pool, so a burst of
+    logins or password resets cannot use up the CPU of the web worker threads.
+
+    At most `max_pending` calls may be running or queued at once. Further calls fail fast with
+    `HashingQueueFullError` instead of piling up behind the pool, and so do calls waiting longer
+    than `timeout`. A pool broken by a dying worker is replaced, and its calls are tried once more.
+    """
+
+    def __init__(self, max_workers: int = None, max_pending: int = None, timeout: float = None, use_executor: bool = None):
+        self.max_workers = max_workers or config.PASSWORD_HASHING_WORKERS
+        self.max_pending = max_pending or config.PASSWORD_HASHING_MAX_PENDING
+        self.timeout = config.PASSWORD_HASHING_TIMEOUT if timeout is None else timeout
+        self.use_executor = config.PASSWORD_HASHING_USE_EXECUTOR if use_executor is None else use_executor
+        self.metrics = HashingMetrics()
+
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    # 'spawn' avoids forking a process that is already running web worker threads.
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        """Drops a pool that a dying worker (e.g. OOM-killed) broke for good, so the next call starts a new one."""
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False)
+
+    def _run(self, func, *args):
+        if not self.use_executor:
+            started = time.perf_counter()
+            result = func(*args)
+            self.metrics.record(time.perf_counter() - started)
+            return result
+
+        try:
+            return self._run_on_executor(func, *args)
+        except BrokenProcessPool:
+            logger.warning("Password hashing pool broke, retrying on a new one")
+        try:
+            return self._run_on_executor(func, *args)
+        except BrokenProcessPool:
+            self.metrics.record_rejection()
+            logger.error("Password hashing pool broke again, rejecting request")
+            raise HashingQueueFullError("The server is busy, please try again shortly.")
+
+    def _run_on_executor(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            self.metrics.record_rejection()
+            logger.warning("Password hashing queue is full, rejecting request")
+            raise HashingQueueFullError("The server is busy, please try again shortly.")
+
+        started = time.perf_counter()
+        executor = self._get_executor()
+        try:
+            future = executor.submit(func, *args)
+        except Exception as e:
+            self._slots.release()
+            if isinstance(e, BrokenProcessPool):
+                self._discard_executor(executor)
+            raise
+        # The slot is held until the job is done, not just until the caller stops waiting, so calls that
+        # timed out still count against max_pending while their jobs run.
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            result = future.result(timeout=self.timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            self.metrics.record_rejection()
+            logger.warning(f"Password hashing took over {self.timeout}s, rejecting request")
+            raise HashingQueueFullError("The server is busy, please try again shortly.")
+        except BrokenProcessPool:
+            self._discard_executor(executor)
+            raise
+
+        self.metrics.record(time.perf_counter() - started)
+        return result
+
+    def get_metrics(self) -> dict:
+        return self.metrics.as_dict()
+
+    def generate_password_hash(self, password: str) -> str:
+        return self._run(security.generate_password_hash, password, 'scrypt')
+
+    def check_password_hash(self, pwhash: str, password: str) -> bool:
+        return self._run(security.check_password_hash, pwhash, password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+_password_hasher: Optional[PasswordHasher] = None
+_password_hasher_lock = threading.Lock()
+
+
+def get_password_hasher() -> PasswordHasher:
+    global _password_hasher
+    if _password_hasher is None:
+        with _password_hasher_lock:
+            if _password_hasher is None:
+                _password_hasher = PasswordHasher()
+    return _password_hasher
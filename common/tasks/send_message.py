@@ -1,10 +1,20 @@
-import pika
+import atexit
 import json
+import queue
+import threading
 import time
+from typing import Callable, Optional
+
+import pika
 from pika.exchange_type import ExchangeType
 
 from common.app_config import config
 from common.app_logger import logger
+from common.utils.metrics import record_publish
+
+
+class MessageQueueFullError(Exception):
+    pass
 
 
 def get_connection_parameters() -> pika.ConnectionParameters:
@@ -18,53 +28,236 @@ def get_connection_parameters() -> pika.ConnectionParameters:
         )
     )
 
-def establish_connection(parameters: pika.ConnectionParameters, max_retries: int = 10) -> pika.BlockingConnection:
+def establish_connection(
+        parameters: pika.ConnectionParameters, max_retries: int = 10, max_backoff: int = 30,
+        connection_factory: Callable = pika.BlockingConnection
+) -> pika.BlockingConnection:
     retries = 0
     while retries < max_retries:
         try:
-            connection = pika.BlockingConnection(parameters)
+            connection = connection_factory(parameters)
             return connection
         except Exception as e:
             logger.debug(f"Could not connect to messaging system. Retries {retries}")
             retries += 1
             if retries < max_retries:
-                time.sleep(2 ** retries)
+                time.sleep(min(2 ** retries, max_backoff))
             else:
                 logger.error("Error connecting to RabbitMQ after multiple retries")
                 raise e
 
-class MessageSender:
+
+class PublisherMetrics:
+    """Thread-safe counters for the background publisher."""
+
     def __init__(self):
-        self.parameters = get_connection_parameters()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.failed = 0
+        self.dropped = 0
+        self.total_publish_seconds = 0.0
+        self.max_publish_seconds = 0.0
+
+    def record_publish(self, seconds: float):
+        with self._lock:
+            self.published += 1
+            self.total_publish_seconds += seconds
+            self.max_publish_seconds = max(self.max_publish_seconds, seconds)
+
+    def record_failure(self):
+        with self._lock:
+            self.failed += 1
+
+    def record_drop(self):
+        with self._lock:
+            self.dropped += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                'published': self.published,
+                'failed': self.failed,
+                'dropped': self.dropped,
+                'avg_publish_seconds': self.total_publish_seconds / self.published if self.published else 0.0,
+                'max_publish_seconds': self.max_publish_seconds,
+            }
+
+
+class MessageSender:
+    """
+    Publishes messages to RabbitMQ from a background thread.
+
+    `send_message` only enqueues onto a bounded in-memory queue. A single publisher thread owns a
+    long-lived connection and channel (pika connections are not thread-safe), caches queue and exchange
+    declarations, and publishes with publisher confirms. Pending messages are flushed on shutdown.
+    """
+
+    def __init__(
+            self, parameters: pika.ConnectionParameters = None, max_queue_size: int = None,
+            enqueue_timeout: float = None, max_publish_attempts: int = 3,
+            connection_factory: Callable = pika.BlockingConnection
+    ):
+        self.parameters = parameters or get_connection_parameters()
+        self.enqueue_timeout = config.MESSAGE_SENDER_ENQUEUE_TIMEOUT if enqueue_timeout is None else enqueue_timeout
+        self.max_publish_attempts = max_publish_attempts
+        self.connection_factory = connection_factory
+        self.metrics = PublisherMetrics()
+
+        self._queue = queue.Queue(maxsize=max_queue_size or config.MESSAGE_SENDER_MAX_QUEUE_SIZE)
+        self._connection = None
+        self._channel = None
+        self._declared_queues = set()
+        self._declared_exchanges = set()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._stopping = threading.Event()
 
     def send_message(self, queue_name: str, data: dict, properties: pika.BasicProperties = None, exchange_name: str = None) -> None:
         """
-        Sends a message to the specified RabbitMQ queue.
+        Queues a message to be sent to the specified RabbitMQ queue.
 
         :param queue_name: Name of the RabbitMQ queue to send the message to.
         :param data: The data to send to the queue as a dictionary.
         :return: None
         """
-        connection = establish_connection(self.parameters)
+        with record_publish():
+            self._ensure_started()
 
-        with connection:
-            channel = connection.channel()
+            body = json.dumps(data).encode()
+            try:
+                self._queue.put((queue_name, body, properties, exchange_name), timeout=self.enqueue_timeout)
+            except queue.Full:
+                self.metrics.record_drop()
+                raise MessageQueueFullError(f"Message queue is full, could not send message to queue: {queue_name}")
 
-            if properties is None:
-                properties = pika.BasicProperties(
-                    delivery_mode=2,  # Make the message persistent
-                )
+    def get_metrics(self) -> dict:
+        return dict(queue_depth=self._queue.qsize(), **self.metrics.as_dict())
 
-            if exchange_name is None:
-                exchange_name = ""
-            else:
-                channel.exchange_declare(exchange=exchange_name, exchange_type=ExchangeType.topic.value, durable=True)
+    def flush(self, timeout: float = None) -> bool:
+        """
+        Waits until every queued message has been published or given up on.
 
-            channel.queue_declare(queue=queue_name, durable=True)
-            channel.basic_publish(
-                exchange=exchange_name,
-                routing_key=queue_name,
-                body=json.dumps(data).encode(),
-                properties=properties,
+        :param timeout: Maximum number of seconds to wait. Waits indefinitely if None.
+        :return: True if the queue was drained, False on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float = None):
+        """Flushes pending messages, stops the publisher thread and closes the connection."""
+        if self._thread is None:
+            return
+
+        if not self.flush(config.MESSAGE_SENDER_FLUSH_TIMEOUT if timeout is None else timeout):
+            logger.error(f"Closing message sender with {self._queue.qsize()} unsent messages")
+
+        self._stopping.set()
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+
+        with self._thread_lock:
+            if self._thread is None:
+                self._stopping.clear()
+                self._thread = threading.Thread(target=self._run, name="message-sender", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    if self._stopping.is_set():
+                        break
+                    continue
+                self._publish_with_retries(*item)
+            finally:
+                self._queue.task_done()
+
+        self._close_connection()
+
+    def _publish_with_retries(self, queue_name, body, properties, exchange_name):
+        for attempt in range(1, self.max_publish_attempts + 1):
+            try:
+                started = time.perf_counter()
+                self._publish(queue_name, body, properties, exchange_name)
+                self.metrics.record_publish(time.perf_counter() - started)
+                logger.info(f"Sent message to queue: {queue_name}")
+                return
+            except Exception as e:
+                logger.warning(f"Failed to publish message to queue {queue_name} (attempt {attempt}): {e}")
+                self._close_connection()
+
+        self.metrics.record_failure()
+        logger.error(f"Giving up on message for queue {queue_name} after {self.max_publish_attempts} attempts")
+
+    def _get_channel(self):
+        if self._channel is not None and self._channel.is_open and self._connection.is_open:
+            return self._channel
+
+        self._close_connection()
+        self._connection = establish_connection(self.parameters, connection_factory=self.connection_factory)
+        self._channel = self._connection.channel()
+        self._channel.confirm_delivery()
+        return self._channel
+
+    def _publish(self, queue_name, body, properties, exchange_name):
+        channel = self._get_channel()
+
+        if properties is None:
+            properties = pika.BasicProperties(
+                delivery_mode=2,  # Make the message persistent
             )
-            logger.info(f"Sent message to queue: {queue_name}")
+
+        if exchange_name is None:
+            exchange_name = ""
+        elif exchange_name not in self._declared_exchanges:
+            channel.exchange_declare(exchange=exchange_name, exchange_type=ExchangeType.topic.value, durable=True)
+            self._declared_exchanges.add(exchange_name)
+
+        if queue_name not in self._declared_queues:
+            channel.queue_declare(queue=queue_name, durable=True)
+            self._declared_queues.add(queue_name)
+
+        # With publisher confirms enabled this raises if the broker nacks the message.
+        channel.basic_publish(
+            exchange=exchange_name,
+            routing_key=queue_name,
+            body=body,
+            properties=properties,
+        )
+
+    def _close_connection(self):
+        # Declarations are cached per connection; a new connection re-declares everything it uses.
+        self._declared_queues.clear()
+        self._declared_exchanges.clear()
+        connection, self._connection, self._channel = self._connection, None, None
+        if connection is not None and connection.is_open:
+            try:
+                connection.close()
+            except Exception as e:
+                logger.debug(f"Error closing RabbitMQ connection: {e}")
+
+
+_message_sender: Optional[MessageSender] = None
+_message_sender_lock = threading.Lock()
+
+
+def get_message_sender() -> MessageSender:
+    global _message_sender
+    if _message_sender is None:
+        with _message_sender_lock:
+            if _message_sender is None:
+                _message_sender = MessageSender()
+    return _message_sender
@@ -0,0 +1,91 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    A thread-safe, bounded LRU cache whose entries expire after a time-to-live.
+
+    Hit, miss and eviction counters are kept so the effectiveness of the cache can be measured.
+    """
+
+    _MISSING = object()
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, self._MISSING)
+            if entry is self._MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_copy(
+            self, key: Hashable, load: Callable[[], Any], is_current: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        Returns a copy of the value cached under `key`, calling `load()` on a miss or when `is_current`
+        rejects the cached value. Loaded values are only cached when complete: not None, and for tuples
+        without None items. Values (and the items of tuples) are copied, so callers cannot mutate the
+        cached objects.
+        """
+        value = self.get(key)
+        if value is None or (is_current is not None and not is_current(value)):
+            value = load()
+            if value is None or (isinstance(value, tuple) and any(item is None for item in value)):
+                return value
+            self.set(key, value)
+
+        if isinstance(value, tuple):
+            return tuple(copy.copy(item) for item in value)
+        return copy.copy(value)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
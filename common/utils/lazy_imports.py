@@ -0,0 +1,52 @@
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+# Client libraries of rococo backends this API does not use (SQS and MySQL). rococo's package __init__ files
+# import every backend, and these two are only used inside the backends' methods, so they can load lazily.
+UNUSED_BACKEND_MODULES = ('boto3', 'pymysql')
+
+_import_lock = threading.Lock()
+
+
+class DeferredModule(types.ModuleType):
+    """
+    Stands in for a module in sys.modules until one of its attributes is used, then imports the module and
+    takes on its contents. (importlib's LazyLoader does not help here: `import` statements read the
+    module's __spec__, which makes a LazyLoader module load right away.)
+    """
+
+    def __getattr__(self, attribute):
+        with _import_lock:
+            if sys.modules.get(self.__name__) is self:
+                del sys.modules[self.__name__]
+                try:
+                    module = importlib.import_module(self.__name__)
+                except BaseException:
+                    sys.modules[self.__name__] = self
+                    raise
+                self.__dict__.update(module.__dict__)
+        return object.__getattribute__(self, attribute)
+
+
+def defer_imports(*names: str):
+    """
+    Makes a later `import <name>` return a DeferredModule, so the module only runs once it is used.
+    Modules that are already imported or not installed are left alone.
+    """
+    for name in names:
+        if name in sys.modules:
+            continue
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            continue
+        module = sys.modules[name] = DeferredModule(name)
+        module.__spec__ = spec
+
+
+def is_loaded(name: str) -> bool:
+    """Whether a module has been imported and run, rather than not imported or still deferred."""
+    module = sys.modules.get(name)
+    return module is not None and not isinstance(module, DeferredModule)
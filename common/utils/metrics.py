@@ -0,0 +1,149 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from common.utils.request_scope import get_request_scope
+
+# (name, type, documentation, labels, value)
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Histogram:
+    """A thread-safe Prometheus histogram with a fixed set of label names."""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for label_values, values in sorted(series.items()):
+            labels = list(zip(self.label_names, label_values))
+            cumulative = 0
+            for bucket, count in zip(self.buckets, values):
+                cumulative += count
+                bucket_labels = _format_labels(labels + [('le', _format_value(float(bucket)))])
+                lines.append(f'{self.name}_bucket{bucket_labels} {cumulative}')
+            lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', '+Inf')])} {values[-1]}")
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(values[-2])}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {values[-1]}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collects the histograms observed by the app and the gauges/counters read from other components
+    when scraped, and renders them in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def histogram(
+            self, name: str, documentation: str, label_names: Sequence[str] = (),
+            buckets: Sequence[float] = DURATION_BUCKETS
+    ) -> Histogram:
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(name, documentation, label_names, buckets)
+        return self._histograms[name]
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        """
+        Adds a function returning (name, type, documentation, labels, value) samples of the counters and
+        gauges other components keep, called on every scrape.
+        """
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for histogram in self._histograms.values():
+            lines += histogram.render()
+
+        # The exposition format wants every sample of a metric right after its HELP and TYPE lines.
+        families: Dict[str, List[str]] = {}
+        for collector in self._collectors:
+            for name, metric_type, documentation, labels, value in collector():
+                if name not in families:
+                    families[name] = [f'# HELP {name} {documentation}', f'# TYPE {name} {metric_type}']
+                families[name].append(f'{name}{_format_labels(sorted(labels.items()))} {_format_value(value)}')
+        for family in families.values():
+            lines += family
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def get_request_timings() -> Dict[str, float]:
+    """Returns the DB and message broker work recorded so far for the current request (zeros outside one)."""
+    scope = get_request_scope()
+    timings = scope.get('request_timings') if scope is not None else None
+    if timings is None:
+        timings = {'db_queries': 0, 'db_seconds': 0.0, 'messages': 0, 'publish_seconds': 0.0}
+        if scope is not None:
+            scope['request_timings'] = timings
+    return timings
+
+
+@contextmanager
+def record_db_queries(queries: int = 1):
+    """Times a block that sends `queries` statements to the database and adds it to the request's timings."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = get_request_timings()
+        timings['db_queries'] += queries
+        timings['db_seconds'] += time.perf_counter() - started
+
+
+@contextmanager
+def record_publish():
+    """Times a block that hands a message to the broker and adds it to the request's timings."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = get_request_timings()
+        timings['messages'] += 1
+        timings['publish_seconds'] += time.perf_counter() - started
@@ -0,0 +1,174 @@
+import re
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+from common.utils.request_scope import get_request_scope
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w$])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s|\$\d+')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_ROWS = re.compile(r'\(\?\.\.\.\)(?:\s*,\s*\(\?\.\.\.\))+')
+_WHITESPACE = re.compile(r'\s+')
+
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+
+
+class QueryDetectorError(Exception):
+    pass
+
+
+def normalize_statement(sql: str) -> str:
+    """
+    Reduces a statement to its shape: literals and parameters become ?, and value lists and multi-row
+    VALUES collapse, so the same query run with different arguments groups together.
+    """
+    shape = _STRING.sub('?', sql)
+    shape = _PLACEHOLDER.sub('?', shape)
+    shape = _NUMBER.sub('?', shape)
+    shape = _LIST.sub('(?...)', shape)
+    shape = _ROWS.sub('(?...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip().rstrip(';')
+
+
+@dataclass
+class RecordedStatement:
+    sql: str
+    params: Any
+    seconds: float
+
+
+@dataclass
+class Offender:
+    reason: str
+    shape: str
+    statement: RecordedStatement
+    count: int
+    plan: Optional[str] = None
+
+    def describe(self) -> str:
+        lines = [f"{self.reason}: {self.shape}"]
+        if self.plan:
+            lines += ['    ' + line for line in self.plan.splitlines()]
+        return '\n'.join(lines)
+
+
+@dataclass
+class QueryRecorder:
+    """The statements sent to the database while recording, in order."""
+    statements: List[RecordedStatement] = field(default_factory=list)
+
+    def get_shapes(self) -> 'OrderedDict[str, List[RecordedStatement]]':
+        shapes = OrderedDict()
+        for statement in self.statements:
+            shapes.setdefault(normalize_statement(statement.sql), []).append(statement)
+        return shapes
+
+    def get_offenders(self, max_repeats: int, slow_seconds: float) -> List[Offender]:
+        """
+        Returns the shapes run more than `max_repeats` times (N+1 lookups) and, separately, each shape's
+        slowest statement when it took over `slow_seconds`.
+        """
+        offenders = []
+        for shape, statements in self.get_shapes().items():
+            if len(statements) > max_repeats:
+                offenders.append(Offender(f"ran {len(statements)} times", shape, statements[0], len(statements)))
+            slowest = max(statements, key=lambda statement: statement.seconds)
+            if slowest.seconds > slow_seconds:
+                offenders.append(
+                    Offender(f"took {slowest.seconds * 1e3:.1f}ms", shape, slowest, len(statements))
+                )
+        return offenders
+
+
+def start_recording() -> QueryRecorder:
+    """Starts recording the statements of the current request (or app context)."""
+    scope = get_request_scope()
+    recorder = QueryRecorder()
+    if scope is not None:
+        scope['query_recorder'] = recorder
+    return recorder
+
+
+def stop_recording() -> Optional[QueryRecorder]:
+    scope = get_request_scope()
+    return scope.pop('query_recorder', None) if scope is not None else None
+
+
+def record_statement(sql: str, params: Any, seconds: float):
+    scope = get_request_scope()
+    recorder = scope.get('query_recorder') if scope is not None else None
+    if recorder is not None:
+        recorder.statements.append(RecordedStatement(sql, params, seconds))
+
+
+def explain(adapter, statement: RecordedStatement) -> Optional[str]:
+    """Returns the plan PostgreSQL picks for a recorded statement, without running it (no ANALYZE)."""
+    sql = statement.sql.strip().rstrip(';')
+    # EXPLAIN only covers the first of several statements, and the others would run.
+    if not sql.upper().startswith(EXPLAINABLE) or ';' in sql:
+        return None
+    try:
+        with adapter:
+            adapter._call_cursor('execute', f"EXPLAIN {sql}", statement.params)
+            plan = '\n'.join(row[0] for row in adapter._call_cursor('fetchall'))
+            adapter._connection.rollback()
+            return plan
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+
+
+def check_statements(
+        recorder: QueryRecorder, max_repeats: int, slow_seconds: float, mode: str, context: str,
+        get_adapter: Optional[Callable] = None, warn: Callable[[str], None] = None
+) -> List[Offender]:
+    """
+    Reports the recorder's offenders, with their EXPLAIN when `get_adapter` is given: logged through
+    `warn` in 'warn' mode, raised as a QueryDetectorError in 'raise' mode.
+    """
+    offenders = recorder.get_offenders(max_repeats, slow_seconds)
+    if not offenders:
+        return offenders
+
+    if get_adapter is not None:
+        for offender in offenders:
+            offender.plan = explain(get_adapter(), offender.statement)
+
+    message = f"{context}: {len(recorder.statements)} queries\n" + '\n'.join(
+        offender.describe() for offender in offenders
+    )
+    if mode == 'raise':
+        raise QueryDetectorError(message)
+    if warn is not None:
+        warn(message)
+    return offenders
+
+
+@contextmanager
+def detect_queries(
+        max_repeats: int, slow_seconds: float, mode: str = 'raise', context: str = 'block',
+        get_adapter: Optional[Callable] = None, warn: Callable[[str], None] = None
+):
+    """
+    Checks the statements a block of code sends, e.g. a service call in a test. Needs an app context,
+    like the request scope the statements are recorded in.
+    """
+    recorder = start_recording()
+    try:
+        yield recorder
+    finally:
+        stop_recording()
+    check_statements(recorder, max_repeats, slow_seconds, mode, context, get_adapter, warn)
+
+
+@contextmanager
+def timed_statement(sql: str, params: Any):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_statement(sql, params, time.perf_counter() - started)
+
@@ -0,0 +1,19 @@
+def get_request_scope():
+    """
+    Return the dict used to cache request-scoped objects, or None outside a Flask app context.
+
+    Returns:
+        dict: A per-request dict stored on `flask.g`, or None when no app context is available.
+    """
+    try:
+        from flask import g, has_app_context
+
+        if has_app_context():
+            if '_request_scope' not in g:
+                g._request_scope = {}
+            return g._request_scope
+    except ImportError:
+        # Flask is not installed
+        pass
+
+    return None
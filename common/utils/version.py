@@ -1,17 +1,34 @@
+import os
 from configparser import ConfigParser
+from functools import lru_cache
 
-cf = ConfigParser()
+# pyproject.toml sits next to `common` in the api image, and in flask/ in a checkout of the repo. It is never
+# looked up in the working directory, which may hold another project's.
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PYPROJECT_PATHS = (
+    os.path.join(_ROOT, 'pyproject.toml'),
+    os.path.join(_ROOT, 'flask', 'pyproject.toml'),
+)
 
-cf.read('pyproject.toml')
+
+@lru_cache(maxsize=None)
+def get_pyproject() -> ConfigParser:
+    """Parses the first pyproject.toml found, once, when the version or name is first needed."""
+    cf = ConfigParser()
+    for path in PYPROJECT_PATHS:
+        if cf.read(path):
+            break
+    return cf
 
 
 def get_service_version():
-    return cf['tool.poetry']['version'].strip('"')
+    return get_pyproject()['tool.poetry']['version'].strip('"')
 
 
 def get_project_name():
-    return cf['tool.poetry']['name'].title()
+    return get_pyproject()['tool.poetry']['name'].title()
 
 
 def main():
+    cf = get_pyproject()
     print(f"{cf['tool.poetry']['name'].title()} running at version: {cf['tool.poetry']['version']}")
@@ -1,3 +1,10 @@
+from common.app_config import get_config
+from common.utils.lazy_imports import UNUSED_BACKEND_MODULES, defer_imports
+
+# Before anything imports rococo, which imports the client library of every backend it supports.
+if get_config().LAZY_IMPORTS:
+    defer_imports(*UNUSED_BACKEND_MODULES)
+
 from flask import Flask, g, Request
 from flask_restx import Api
 from flask_cors import CORS
@@ -7,8 +14,9 @@ from rococo.plugins.pooled_connection import PooledConnectionPlugin
 from rococo.models.versioned_model import ModelValidationError
 
 from app.helpers.exceptions import InputValidationError, APIException
+from common.tasks.password_hashing import HashingQueueFullError
 
-from common.app_config import get_config
+from common.repositories.replicas import ReplicaPoolPlugin, parse_replica_hosts
 from common.utils.version import get_service_version, get_project_name
 from logger import set_request_exception_signal, logger
 
@@ -37,6 +45,9 @@ def create_app():
     from app.views import initialize_views
     initialize_views(api)
 
+    from app.helpers.response import output_json
+    api.representation('application/json')(output_json)
+
     api.init_app(app)
 
     # Add simple CORS support
@@ -44,6 +55,22 @@ def create_app():
 
     PooledConnectionPlugin(app, database_type="postgres")
 
+    replicas = parse_replica_hosts(config.POSTGRES_REPLICA_HOSTS, config.POSTGRES_PORT)
+    if replicas:
+        ReplicaPoolPlugin(app, replicas)
+
+    if config.QUERY_DETECTOR and config.APP_ENV != 'production':
+        from app.query_detector import register_query_detector
+        register_query_detector(app, config.QUERY_DETECTOR)
+
+    if config.REQUEST_METRICS_ENABLED:
+        from app.metrics import register_metrics
+        register_metrics(app, token=config.METRICS_TOKEN, public=config.APP_ENV in ('local', 'test'))
+
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+
     @app.route('/')
     def hello_world():
         return 'Welcome to Rococo Sample API.'
@@ -67,4 +94,9 @@ def create_app():
         from app.helpers.response import get_failure_response
         return get_failure_response(message=str(exception))
 
+    @app.errorhandler(HashingQueueFullError)
+    def handle_hashing_queue_full_error(exception):
+        from app.helpers.response import get_failure_response
+        return get_failure_response(message=str(exception), status_code=503)
+
     return app
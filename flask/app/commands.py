@@ -0,0 +1,41 @@
+import time
+
+import click
+
+from common.app_config import config
+from common.services import get_service
+from common.services.audit import AuditService
+from common.services.todo import TodoService
+from common.services.token_revocation import get_token_revocations
+
+
+def register_commands(app):
+    @app.cli.command('reconcile-todo-stats')
+    @click.option('--batch-size', default=500, show_default=True, help='People to load per query.')
+    def reconcile_todo_stats(batch_size):
+        """Recompute the per-person todo counters from the todo table and fix any drift."""
+        checked, corrected = get_service(TodoService).reconcile_todo_stats(batch_size=batch_size)
+        click.echo(f"Checked todo stats for {checked} people, corrected {corrected} rows.")
+
+    @app.cli.command('maintain-audit')
+    @click.option('--directory', default=config.AUDIT_ARCHIVE_DIR, show_default=True, help='Where to write archives.')
+    def maintain_audit(directory):
+        """Create upcoming audit partitions and archive the ones older than AUDIT_ARCHIVE_AFTER_MONTHS."""
+        audit_service = get_service(AuditService)
+        for partition in audit_service.create_partitions():
+            click.echo(f"Created {partition}")
+        for partition, path, rows in audit_service.archive_old_partitions(directory):
+            click.echo(f"Archived {rows} rows of {partition} to {path}")
+
+    @app.cli.command('restore-audit-archive')
+    @click.argument('path')
+    def restore_audit_archive(path):
+        """Load an archived audit partition back into its audit table."""
+        inserted = get_service(AuditService).restore_archive(path)
+        click.echo(f"Restored {inserted} rows from {path}")
+
+    @app.cli.command('purge-token-revocations')
+    def purge_token_revocations():
+        """Delete the access token revocations whose tokens have all expired."""
+        get_token_revocations().purge_expired(time.time())
+        click.echo("Purged expired access token revocations.")
@@ -1,8 +1,9 @@
+import hashlib
 from functools import wraps
-from flask import request
+from flask import request, Response
 from flask import g, abort
 
-from app.helpers.response import get_failure_response
+from app.helpers.response import get_failure_response, get_not_modified_response
 from inspect import signature
 from common.app_logger import logger
 from common.app_config import config
@@ -11,7 +12,7 @@ from common.services.email import EmailService
 from common.services.person import PersonService
 from common.services.auth import AuthService
 from common.services.auth import AuthService
-from common.services import OrganizationService, PersonOrganizationRoleService
+from common.services import PersonOrganizationRoleService, get_service
 
 
 
@@ -22,9 +23,8 @@ def login_required():
             if 'Authorization' not in request.headers:
                 return get_failure_response(message="Authorization header not present", status_code=401)
             
-            auth_service = AuthService(config)
-            email_service = EmailService(config)
-            person_service = PersonService(config)
+            auth_service = get_service(AuthService)
+            person_service = get_service(PersonService)
 
             data = request.headers['Authorization']
             token = str.replace(str(data), 'Bearer ', '')
@@ -37,11 +37,11 @@ def login_required():
                 person_id = parsed_token.get('person_id')
                 email_id = parsed_token.get('email_id')
 
-                email = email_service.get_email_by_id(email_id)
-                person = person_service.get_person_by_id(person_id)
+                person, email = person_service.get_principal(person_id, email_id)
 
                 g.person = person
                 g.email = email
+                g.access_token = parsed_token
 
             except Exception as e:
                 logger.exception(e)
@@ -64,6 +64,46 @@ def login_required():
     return decorator
 
 
+def etag(get_validator):
+    """
+    Serves conditional GETs. `get_validator(person)` must return a cheap value that changes whenever the
+    response would; the ETag is derived from it, the person and the request URL. When the request's
+    If-None-Match matches, a 304 is returned without calling the view.
+
+    Should be used after the login_required decorator.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            person = getattr(g, 'person', None)
+
+            if not person:
+                raise Exception("etag decorator should be used after login_required decorator.")
+
+            validator = get_validator(person)
+            tag = hashlib.sha1(f"{person.entity_id}:{validator}:{request.full_path}".encode()).hexdigest()
+
+            if request.if_none_match.contains(tag):
+                return get_not_modified_response(tag)
+
+            result = func(self, *args, **kwargs)
+
+            if isinstance(result, Response):
+                if result.status_code == 200:
+                    result.set_etag(tag)
+                    result.headers['Cache-Control'] = 'private, no-cache'
+                return result
+
+            data, status_code = result if isinstance(result, tuple) else (result, 200)
+            if status_code != 200 or not data.get('success'):
+                return result
+            return data, status_code, {'ETag': f'"{tag}"', 'Cache-Control': 'private, no-cache'}
+
+        return wrapper
+
+    return decorator
+
+
 def organization_required(with_roles=None):
     def decorator(func):
         @wraps(func)
@@ -76,18 +116,16 @@ def organization_required(with_roles=None):
             if not person:
                 raise Exception("organization_required decorator should be used after login_required decorator.")
 
-            organization_service = OrganizationService(config)
-            person_organization_role_service = PersonOrganizationRoleService(config)
+            person_organization_role_service = get_service(PersonOrganizationRoleService)
 
             organization_id = request.headers['x-organization-id']
-            organization = organization_service.get_organization_by_id(organization_id)
+            organization, person_organization_role = person_organization_role_service.get_membership(
+                person_id=person.entity_id,
+                organization_id=organization_id
+            )
             if not organization:
                 return get_failure_response(message='Organization ID is invalid', status_code=403)
             
-            person_organization_role = person_organization_role_service.get_role_of_person_in_organization(
-                person_id=person.entity_id,
-                organization_id=organization.entity_id
-            )
             if not person_organization_role:
                 return get_failure_response(message="User is not authorized to use this organization.", status_code=401)
 
@@ -1,5 +1,6 @@
-from flask import current_app as app
+from flask import current_app as app, make_response
 from app.helpers.exceptions import InputValidationError
+from app.helpers.serializers import dumps
 
 
 def parse_request_body(request, keys, default_value=None):
@@ -18,7 +19,7 @@ def validate_required_fields(required_fields):
 
 def _get_response(data, status_code=200):
     response = app.response_class(
-        response=app.json.dumps(data),
+        response=dumps(data),
         status=status_code,
         mimetype=app.config['MIME_TYPE']
     )
@@ -33,3 +34,17 @@ def get_failure_response(message, status_code=200):
 def get_success_response(status_code=200, **data):
     response = _get_response(dict(success=True, **data), status_code)
     return response
+
+
+def get_not_modified_response(etag):
+    response = app.response_class(status=304)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def output_json(data, code, headers=None):
+    """Flask-Restx representation writing resource return values with the configured JSON backend."""
+    response = make_response(dumps(data), code)
+    response.headers.extend(headers or {})
+    return response
@@ -0,0 +1,215 @@
+import dataclasses
+import decimal
+import json
+import typing
+import uuid
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from werkzeug.http import http_date
+
+from common.app_config import config
+from common.models import Email, Organization, Person, Todo
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def format_iso_date(value: date) -> str:
+    return value.isoformat()
+
+
+# Output fields per model as {response key: model field}, and how their datetimes are written.
+# Models without a field map are written with all of their fields under their own names.
+SERIALIZER_SPECS = {
+    Todo: dict(
+        fields={
+            'id': 'entity_id',
+            'title': 'title',
+            'description': 'description',
+            'is_completed': 'is_completed',
+            'completed_at': 'completed_at',
+            'due_date': 'due_date',
+            'priority': 'priority',
+            'version': 'version',
+        },
+        format_date=format_iso_date,
+    ),
+    # These were written by Flask's JSON provider, which uses HTTP dates; keep that for existing clients.
+    Person: dict(format_date=http_date),
+    Organization: dict(format_date=http_date),
+    Email: dict(format_date=http_date),
+}
+
+_serializers = {}
+
+
+def _is_date_type(hint) -> bool:
+    if isinstance(hint, type):
+        return issubclass(hint, date)
+    return any(_is_date_type(arg) for arg in typing.get_args(hint) if arg is not type(None))
+
+
+def get_field_map(model_class) -> Dict[str, str]:
+    """Returns the {response key: model field} pairs written for `model_class`, in output order."""
+    spec = SERIALIZER_SPECS.get(model_class, {})
+    return spec.get('fields') or {f.name: f.name for f in dataclasses.fields(model_class)}
+
+
+def parse_fields(model_class, value: Optional[str], extra: Iterable[str] = ()) -> Optional[Tuple[str, ...]]:
+    """
+    Parses a sparse fieldset query parameter ("title,due_date") into response keys of `model_class`, or of
+    `extra` for keys a response adds next to the model's. Returns None when no fields were asked for and
+    raises ValueError for unknown ones.
+
+    The keys are returned in output order whatever order they were asked in, so the serializers and
+    statements built per fieldset stay bounded by the number of subsets.
+    """
+    if value is None:
+        return None
+    allowed = [*get_field_map(model_class), *extra]
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    if not requested:
+        raise ValueError('fields must name at least one field')
+    unknown = sorted(requested.difference(allowed))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Expected some of: {', '.join(allowed)}")
+    return tuple(name for name in allowed if name in requested)
+
+
+def get_field_columns(model_class, fields: Optional[Iterable[str]]) -> Optional[List[str]]:
+    """Returns the model fields to load for the response keys `fields` (None, meaning all, when None)."""
+    if fields is None:
+        return None
+    field_map = get_field_map(model_class)
+    return [field_map[name] for name in fields if name in field_map]
+
+
+def compile_serializer(
+        model_class, from_rows: bool = False, fields: Optional[Tuple[str, ...]] = None
+) -> Callable[[Any], Dict]:
+    """
+    Builds a function that turns a `model_class` instance (or, with `from_rows`, a row dict of its table)
+    into a response dict, limited to the response keys `fields` when given. The field selection, date
+    formatting and null checks are resolved once here and generated as straight-line code, instead of
+    being looked up again for every object.
+
+    Instances are read through their `__dict__`: rococo's VersionedModel.__getattribute__ scans the
+    model's fields on every attribute access, which would otherwise dominate the cost.
+    """
+    spec = SERIALIZER_SPECS.get(model_class, {})
+    field_map = get_field_map(model_class)
+    if fields is not None:
+        field_map = {key: field_name for key, field_name in field_map.items() if key in fields}
+    hints = typing.get_type_hints(model_class)
+
+    if from_rows:
+        lines = ['    values = obj']
+    else:
+        lines = [
+            '    values = get_dict(obj)',
+            # Like as_dict(), a partially loaded model only has its entity_id.
+            "    if values.get('_is_partial'):",
+            "        return {'entity_id': values['entity_id']}",
+        ]
+    items = []
+    for index, (key, field_name) in enumerate(field_map.items()):
+        if _is_date_type(hints.get(field_name)):
+            lines.append(f"    v{index} = values[{field_name!r}]")
+            items.append(f"        {key!r}: None if v{index} is None else format_date(v{index}),")
+        else:
+            items.append(f"        {key!r}: values[{field_name!r}],")
+
+    source = '\n'.join(['def serialize(obj):', *lines, '    return {', *items, '    }'])
+    namespace = {
+        'format_date': spec.get('format_date', format_iso_date),
+        'get_dict': lambda obj: object.__getattribute__(obj, '__dict__'),
+    }
+    exec(compile(source, f'<serializer {model_class.__name__}>', 'exec'), namespace)
+    return namespace['serialize']
+
+
+def get_serializer(model_class, fields: Optional[Tuple[str, ...]] = None) -> Callable[[Any], Dict]:
+    """
+    Returns the compiled serializer for instances of `model_class`, limited to the response keys `fields`
+    (as returned by parse_fields) when given, building it on first use.
+    """
+    serializer = _serializers.get((model_class, False, fields))
+    if serializer is None:
+        serializer = _serializers[(model_class, False, fields)] = compile_serializer(model_class, fields=fields)
+    return serializer
+
+
+def get_row_serializer(model_class, fields: Optional[Tuple[str, ...]] = None) -> Callable[[Dict], Dict]:
+    """Like get_serializer, for row dicts of `model_class`'s table."""
+    serializer = _serializers.get((model_class, True, fields))
+    if serializer is None:
+        serializer = _serializers[(model_class, True, fields)] = compile_serializer(
+            model_class, from_rows=True, fields=fields
+        )
+    return serializer
+
+
+def default(obj):
+    """Encodes the values JSON backends do not handle natively, like Flask's JSON provider does."""
+    if type(obj) in SERIALIZER_SPECS:
+        return get_serializer(type(obj))(obj)
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps_json(data) -> str:
+    # Keys are sorted like Flask's JSON provider sorts them.
+    return json.dumps(data, default=default, separators=(',', ':'), sort_keys=True)
+
+
+def _dumps_orjson(data) -> str:
+    # Route dataclasses and dates through `default` so both backends produce the same output.
+    options = (
+        orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_SORT_KEYS
+    )
+    return orjson.dumps(data, default=default, option=options).decode()
+
+
+JSON_BACKENDS = {
+    'json': _dumps_json,
+}
+if orjson is not None:
+    JSON_BACKENDS['orjson'] = _dumps_orjson
+
+_dumps = None
+
+
+def register_json_backend(name: str, dumps: Callable[[Any], str]):
+    """Makes `dumps(data) -> str` selectable as JSON_BACKEND=<name>. It should encode models via `default`."""
+    global _dumps
+    JSON_BACKENDS[name] = dumps
+    _dumps = None
+
+
+def get_json_backend() -> Callable[[Any], str]:
+    """
+    Returns the dumps function selected by JSON_BACKEND: 'json' (the default), 'orjson' (the `orjson`
+    extra), or 'auto', which prefers orjson when it is installed.
+    """
+    global _dumps
+    if _dumps is None:
+        name = config.JSON_BACKEND
+        if name == 'auto':
+            name = 'orjson' if 'orjson' in JSON_BACKENDS else 'json'
+        if name not in JSON_BACKENDS:
+            raise ValueError(f"Unknown JSON_BACKEND '{name}', expected one of {sorted(JSON_BACKENDS)} or 'auto'")
+        _dumps = JSON_BACKENDS[name]
+    return _dumps
+
+
+def dumps(data: Any) -> str:
+    return get_json_backend()(data)
@@ -1,6 +1,10 @@
+import json
 from datetime import datetime
 from common.models.todo import Todo
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.helpers.serializers import dumps, get_field_columns, get_row_serializer, get_serializer, parse_fields
+from app.helpers.string_utils import urlsafe_base64_encode, urlsafe_base64_decode
 
 class TodoHelper:
     @staticmethod
@@ -28,18 +32,94 @@ class TodoHelper:
     @staticmethod
     def format_todo_response(todo: Todo) -> Dict:
         """Format todo object to response format"""
-        return {
-            'id': todo.entity_id,
-            'title': todo.title,
-            'description': todo.description,
-            'is_completed': todo.is_completed,
-            'completed_at': todo.completed_at.isoformat() if todo.completed_at else None,
-            'due_date': todo.due_date.isoformat() if todo.due_date else None,
-            'priority': todo.priority,
-            'version': todo.version
-        }
-
-    @staticmethod
-    def format_todos_response(todos: List[Todo]) -> List[Dict]:
-        """Format list of todos to response format"""
-        return [TodoHelper.format_todo_response(todo) for todo in todos]
+        return get_serializer(Todo)(todo)
+
+    @staticmethod
+    def format_todos_response(todos: List[Todo], fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        """Format list of todos to response format, limited to the response keys `fields` when given"""
+        serialize = get_serializer(Todo, fields)
+        return [serialize(todo) for todo in todos]
+
+    @staticmethod
+    def format_todo_row(row: Dict) -> Dict:
+        """Format a raw todo row to response format without building a Todo model"""
+        return get_row_serializer(Todo)(row)
+
+    @staticmethod
+    def stream_todos_response(
+            rows: Iterable[Dict], chunk_size: int, fields: Optional[Tuple[str, ...]] = None
+    ) -> Iterator[str]:
+        """Yield a todo list response as JSON fragments, encoding `chunk_size` rows at a time"""
+        yield '{"success": true, "data": ['
+        serialize = get_row_serializer(Todo, fields)
+        chunk = []
+        separator = ''
+        for row in rows:
+            chunk.append(dumps(serialize(row)))
+            if len(chunk) >= chunk_size:
+                yield separator + ', '.join(chunk)
+                separator = ', '
+                chunk = []
+        if chunk:
+            yield separator + ', '.join(chunk)
+        yield '], "next_cursor": null}'
+
+    @staticmethod
+    def encode_cursor(key: Optional[Tuple[datetime, str]]) -> Optional[str]:
+        """Encode a (created_on, entity_id) pagination key to an opaque cursor"""
+        if key is None:
+            return None
+        created_on, entity_id = key
+        return urlsafe_base64_encode(json.dumps([created_on.isoformat(), entity_id]).encode())
+
+    @staticmethod
+    def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+        """Decode an opaque cursor to a (created_on, entity_id) pagination key, raising ValueError if invalid"""
+        if not cursor:
+            return None
+        try:
+            created_on, entity_id = json.loads(urlsafe_base64_decode(cursor))
+            return datetime.fromisoformat(created_on), str(entity_id)
+        except (TypeError, ValueError) as e:
+            raise ValueError('Invalid cursor') from e
+
+    @staticmethod
+    def encode_search_cursor(key: Optional[Tuple[float, str]]) -> Optional[str]:
+        """Encode a (rank, entity_id) search pagination key to an opaque cursor"""
+        if key is None:
+            return None
+        rank, entity_id = key
+        return urlsafe_base64_encode(json.dumps([rank, entity_id]).encode())
+
+    @staticmethod
+    def decode_search_cursor(cursor: Optional[str]) -> Optional[Tuple[float, str]]:
+        """Decode an opaque cursor to a (rank, entity_id) search pagination key, raising ValueError if invalid"""
+        if not cursor:
+            return None
+        try:
+            rank, entity_id = json.loads(urlsafe_base64_decode(cursor))
+            return float(rank), str(entity_id)
+        except (TypeError, ValueError) as e:
+            raise ValueError('Invalid cursor') from e
+
+    @staticmethod
+    def parse_fields(fields: Optional[str]) -> Tuple[Optional[Tuple[str, ...]], Optional[List[str]]]:
+        """
+        Parse the `fields` query parameter to the response keys to write and the todo columns to load
+        (both None for all), raising ValueError if invalid
+        """
+        fields = parse_fields(Todo, fields)
+        return fields, get_field_columns(Todo, fields)
+
+    @staticmethod
+    def parse_page_limit(limit: Optional[str], default: int, maximum: int) -> int:
+        """Parse the page size query parameter, raising ValueError if invalid"""
+        if limit is None or limit == '':
+            return default
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError('limit must be an integer')
+        if limit < 1 or limit > maximum:
+            raise ValueError(f'limit must be between 1 and {maximum}')
+        return limit
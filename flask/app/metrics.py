@@ -0,0 +1,106 @@
+import hmac
+import time
+
+from flask import Response, g, request
+
+from common.repositories.prepared import get_statement_cache_stats
+from common.services.cache import (
+    membership_cache, organization_cache, principal_cache, verified_token_cache
+)
+from common.utils.metrics import COUNT_BUCKETS, get_request_timings, registry
+
+request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Time spent handling the request.', ('method', 'route')
+)
+request_db_queries = registry.histogram(
+    'http_request_db_queries', 'Statements sent to PostgreSQL by the request.', ('method', 'route'), COUNT_BUCKETS
+)
+request_db_duration = registry.histogram(
+    'http_request_db_duration_seconds', 'Time the request spent waiting on PostgreSQL.', ('method', 'route')
+)
+request_publish_duration = registry.histogram(
+    'http_request_publish_duration_seconds', 'Time the request spent handing messages to RabbitMQ.',
+    ('method', 'route')
+)
+
+CACHES = {
+    'principal': principal_cache,
+    'organization': organization_cache,
+    'membership': membership_cache,
+    'verified_token': verified_token_cache,
+}
+
+
+def collect_publisher_metrics():
+    from common.tasks.send_message import get_message_sender
+    metrics = get_message_sender().get_metrics()
+    yield 'message_sender_queue_depth', 'gauge', 'Messages waiting to be published.', {}, metrics['queue_depth']
+    for key in ('published', 'failed', 'dropped'):
+        yield f'message_sender_{key}_total', 'counter', f'Messages {key} by the publisher thread.', {}, metrics[key]
+
+
+def collect_statement_cache_metrics():
+    stats = get_statement_cache_stats()
+    for key in ('prepares', 'hits', 'evictions'):
+        yield f'prepared_statement_{key}_total', 'counter', f'Prepared statement cache {key}.', {}, stats[key]
+    yield 'prepared_statements', 'gauge', 'Statements prepared on open connections.', {}, stats['statements']
+
+
+def collect_cache_metrics():
+    for name, cache in CACHES.items():
+        stats = cache.stats()
+        yield 'cache_entries', 'gauge', 'Entries held by the in-process cache.', {'cache': name}, stats['size']
+        for key in ('hits', 'misses', 'evictions'):
+            yield f'cache_{key}_total', 'counter', f'In-process cache {key}.', {'cache': name}, stats[key]
+
+
+def get_server_timing(timings: dict, duration: float) -> str:
+    return ', '.join([
+        f'db;dur={timings["db_seconds"] * 1e3:.2f};desc="{timings["db_queries"]} queries"',
+        f'mq;dur={timings["publish_seconds"] * 1e3:.2f};desc="{timings["messages"]} messages"',
+        f'total;dur={duration * 1e3:.2f}',
+    ])
+
+
+def register_metrics(app, token: str = '', public: bool = False):
+    """
+    Records the query count, DB time and message publish time of every request, returns them in a
+    Server-Timing header and adds them to per-route histograms served in the Prometheus text format
+    on /metrics. /metrics requires `Authorization: Bearer <token>` when a token is given, is open when
+    `public` is set, and is not served otherwise.
+    """
+    registry.add_collector(collect_publisher_metrics)
+    registry.add_collector(collect_statement_cache_metrics)
+    registry.add_collector(collect_cache_metrics)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('request_started', None)
+        if started is None:
+            return response
+
+        duration = time.perf_counter() - started
+        timings = get_request_timings()
+        # The route template rather than the path, so ids don't make a series per entity.
+        labels = (request.method, request.url_rule.rule if request.url_rule else '<unmatched>')
+        request_duration.observe(duration, *labels)
+        request_db_queries.observe(timings['db_queries'], *labels)
+        request_db_duration.observe(timings['db_seconds'], *labels)
+        request_publish_duration.observe(timings['publish_seconds'], *labels)
+
+        response.headers['Server-Timing'] = get_server_timing(timings, duration)
+        return response
+
+    if not token and not public:
+        return
+
+    @app.route('/metrics')
+    def metrics():
+        if token and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            from app.helpers.response import get_failure_response
+            return get_failure_response(message='Invalid metrics token', status_code=401)
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,20 @@
+revision = "0000000007"
+down_revision = "0000000006"
+
+
+def upgrade(migration):
+    # Composite indexes matching the keyset pagination order of GET /todos
+    migration.add_index("todo", "todo_person_active_changed_on_ind", "person_id, active, changed_on DESC, entity_id DESC")
+    migration.add_index(
+        "todo", "todo_person_active_completed_changed_on_ind",
+        "person_id, active, is_completed, changed_on DESC, entity_id DESC"
+    )
+
+    migration.update_version_table(version=revision)
+
+
+def downgrade(migration):
+    migration.remove_index("todo", "todo_person_active_completed_changed_on_ind")
+    migration.remove_index("todo", "todo_person_active_changed_on_ind")
+
+    migration.update_version_table(version=down_revision)
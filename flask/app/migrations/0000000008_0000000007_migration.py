@@ -0,0 +1,26 @@
+revision = "0000000008"
+down_revision = "0000000007"
+
+
+def upgrade(migration):
+    # Full-text search vector over title (weight A) and description (weight B), kept up to date by PostgreSQL
+    migration.execute("""
+        ALTER TABLE todo ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'B')
+        ) STORED;
+    """)
+    # Audit rows are copied with SELECT *, so the audit table needs a (plain) column in the same position
+    migration.execute("ALTER TABLE todo_audit ADD COLUMN search_vector tsvector NULL;")
+
+    migration.execute("CREATE INDEX todo_search_vector_ind ON todo USING GIN (search_vector);")
+
+    migration.update_version_table(version=revision)
+
+
+def downgrade(migration):
+    migration.remove_index("todo", "todo_search_vector_ind")
+    migration.execute("ALTER TABLE todo_audit DROP COLUMN search_vector;")
+    migration.execute("ALTER TABLE todo DROP COLUMN search_vector;")
+
+    migration.update_version_table(version=down_revision)
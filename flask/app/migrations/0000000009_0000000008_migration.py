@@ -0,0 +1,42 @@
+revision = "0000000009"
+down_revision = "0000000008"
+
+
+def upgrade(migration):
+    # Per-person counters of active todos, one row per priority, maintained by TodoService
+    migration.create_table(
+        "todo_stats",
+        """
+            "person_id" varchar(32) NOT NULL,
+            "priority" integer NOT NULL,
+            "total" integer NOT NULL DEFAULT 0,
+            "completed" integer NOT NULL DEFAULT 0,
+            PRIMARY KEY ("person_id", "priority"),
+            CONSTRAINT "fk_todo_stats_person" FOREIGN KEY ("person_id")
+                REFERENCES "person" ("entity_id") ON DELETE CASCADE
+        """
+    )
+
+    # Backfill from the existing todos
+    migration.execute("""
+        INSERT INTO todo_stats (person_id, priority, total, completed)
+        SELECT person_id, priority, count(*), count(*) FILTER (WHERE is_completed)
+        FROM todo
+        WHERE active = true
+        GROUP BY person_id, priority;
+    """)
+
+    # Overdue depends on the current time, so it is counted from this partial index instead
+    migration.execute(
+        "CREATE INDEX todo_person_open_due_date_ind ON todo (person_id, due_date) "
+        "WHERE active = true AND is_completed = false;"
+    )
+
+    migration.update_version_table(version=revision)
+
+
+def downgrade(migration):
+    migration.remove_index("todo", "todo_person_open_due_date_ind")
+    migration.drop_table(table_name="todo_stats")
+
+    migration.update_version_table(version=down_revision)
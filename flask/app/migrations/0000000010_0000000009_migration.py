@@ -0,0 +1,37 @@
+revision = "0000000010"
+down_revision = "0000000009"
+
+AUDITED_TABLES = ["person", "organization", "email", "login_method", "person_organization_role", "todo"]
+
+
+def upgrade(migration):
+    # Copies the previous version of a row into <table>_audit whenever the row is updated, which is what
+    # the repositories used to do with an extra INSERT ... SELECT before every save. Rows that the
+    # application already copied (while app-side auditing is still enabled) are skipped.
+    # (%% is escaped because the adapter always interpolates query parameters.)
+    migration.execute("""
+        CREATE OR REPLACE FUNCTION audit_previous_row() RETURNS trigger AS $$
+        BEGIN
+            EXECUTE format('INSERT INTO %%I SELECT ($1).* ON CONFLICT DO NOTHING', TG_TABLE_NAME || '_audit')
+            USING OLD;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+    """)
+
+    for table in AUDITED_TABLES:
+        migration.execute(f"""
+            CREATE TRIGGER {table}_audit_trigger
+            AFTER UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION audit_previous_row();
+        """)
+
+    migration.update_version_table(version=revision)
+
+
+def downgrade(migration):
+    for table in AUDITED_TABLES:
+        migration.execute(f"DROP TRIGGER IF EXISTS {table}_audit_trigger ON {table};")
+    migration.execute("DROP FUNCTION IF EXISTS audit_previous_row();")
+
+    migration.update_version_table(version=down_revision)
@@ -0,0 +1,66 @@
+revision = "0000000011"
+down_revision = "0000000010"
+
+AUDIT_TABLES = [
+    "person_audit", "organization_audit", "email_audit", "login_method_audit",
+    "person_organization_role_audit", "todo_audit",
+]
+
+# Monthly partitions to create past the current month; `flask maintain-audit` keeps this window filled.
+PARTITIONS_AHEAD = 3
+
+
+def upgrade(migration):
+    # Queries are always interpolated by the adapter, so literal % signs are escaped as %%.
+    for table in AUDIT_TABLES:
+        migration.execute(f"ALTER TABLE {table} RENAME TO {table}_unpartitioned;")
+        migration.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_unpartitioned_pkey;")
+
+        # Same columns in the same order, so the triggers' SELECT (OLD).* still lines up. The partition key
+        # has to be part of the primary key.
+        migration.execute(f"""
+            CREATE TABLE {table} (LIKE {table}_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (changed_on);
+        """)
+        migration.execute(f"UPDATE {table}_unpartitioned SET changed_on = 'epoch' WHERE changed_on IS NULL;")
+        migration.execute(f"""
+            ALTER TABLE {table} ALTER COLUMN changed_on SET NOT NULL, ADD PRIMARY KEY (entity_id, version, changed_on);
+        """)
+
+        # Rows outside every monthly partition land here instead of failing the write
+        migration.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT;")
+        migration.execute(f"""
+            DO $$
+            DECLARE
+                partition_start date := date_trunc('month', coalesce((SELECT min(changed_on) FROM {table}_unpartitioned), now()));
+                last_start date := date_trunc('month', now()) + interval '{PARTITIONS_AHEAD} months';
+            BEGIN
+                WHILE partition_start <= last_start LOOP
+                    EXECUTE format(
+                        'CREATE TABLE %%I PARTITION OF {table} FOR VALUES FROM (%%L) TO (%%L)',
+                        '{table}_p' || to_char(partition_start, 'YYYYMM'), partition_start, partition_start + interval '1 month'
+                    );
+                    partition_start := partition_start + interval '1 month';
+                END LOOP;
+            END $$;
+        """)
+
+        migration.execute(f"INSERT INTO {table} SELECT * FROM {table}_unpartitioned;")
+        migration.execute(f"DROP TABLE {table}_unpartitioned;")
+
+    migration.update_version_table(version=revision)
+
+
+def downgrade(migration):
+    for table in AUDIT_TABLES:
+        migration.execute(f"ALTER TABLE {table} RENAME TO {table}_partitioned;")
+        migration.execute(f"ALTER INDEX {table}_pkey RENAME TO {table}_partitioned_pkey;")
+
+        migration.execute(f"CREATE TABLE {table} (LIKE {table}_partitioned INCLUDING DEFAULTS);")
+        migration.execute(f"""
+            ALTER TABLE {table} ALTER COLUMN changed_on DROP NOT NULL, ADD PRIMARY KEY (entity_id, version);
+        """)
+        migration.execute(f"INSERT INTO {table} SELECT * FROM {table}_partitioned ON CONFLICT DO NOTHING;")
+        # Drops the partitions as well
+        migration.execute(f"DROP TABLE {table}_partitioned;")
+
+    migration.update_version_table(version=down_revision)
@@ -0,0 +1,30 @@
+revision = "0000000012"
+down_revision = "0000000011"
+
+
+def upgrade(migration):
+    # Revoked access tokens, shared by all API processes when TOKEN_REVOCATION_BACKEND=postgres. A row revokes
+    # either one token (jti) or every token of a person issued before `revoked_before` (a UNIX timestamp).
+    # Rows are only needed until `expires_at`, when the tokens they revoke have expired anyway.
+    migration.create_table(
+        "access_token_revocation",
+        """
+            "id" bigserial PRIMARY KEY,
+            "jti" varchar(32) NULL,
+            "person_id" varchar(32) NULL,
+            "revoked_before" double precision NULL,
+            "expires_at" double precision NOT NULL,
+            "revoked_on" timestamp NOT NULL DEFAULT now(),
+            CONSTRAINT "access_token_revocation_subject_chk" CHECK (("jti" IS NULL) <> ("person_id" IS NULL))
+        """
+    )
+    migration.add_index("access_token_revocation", "access_token_revocation_expires_at_ind", "expires_at")
+
+    migration.update_version_table(version=revision)
+
+
+def downgrade(migration):
+    migration.remove_index("access_token_revocation", "access_token_revocation_expires_at_ind")
+    migration.drop_table(table_name="access_token_revocation")
+
+    migration.update_version_table(version=down_revision)
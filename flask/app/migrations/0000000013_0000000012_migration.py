@@ -0,0 +1,47 @@
+revision = "0000000013"
+down_revision = "0000000012"
+
+
+def upgrade(migration):
+    # GET /todos pages on creation time: unlike changed_on it never moves, so a todo updated while a client
+    # is paging keeps its place. The column is set by its default on insert and is not part of the model.
+    migration.execute("ALTER TABLE todo ADD COLUMN created_on timestamp NOT NULL DEFAULT now();")
+    # Audit rows are copied with SELECT *, so the audit table needs the column in the same position
+    migration.execute("ALTER TABLE todo_audit ADD COLUMN created_on timestamp NULL;")
+
+    # Backfill from the oldest audited version of each todo. The audit trigger is paused so the backfill
+    # does not add an audit row per todo.
+    migration.execute("ALTER TABLE todo DISABLE TRIGGER todo_audit_trigger;")
+    migration.execute("""
+        UPDATE todo
+        SET created_on = coalesce(
+            (SELECT min(todo_audit.changed_on) FROM todo_audit WHERE todo_audit.entity_id = todo.entity_id),
+            todo.changed_on,
+            todo.created_on
+        );
+    """)
+    migration.execute("ALTER TABLE todo ENABLE TRIGGER todo_audit_trigger;")
+
+    # Replaces the changed_on pagination index of migration 0000000007; todo_person_active_changed_on_ind
+    # stays for the list validator.
+    migration.remove_index("todo", "todo_person_active_completed_changed_on_ind")
+    migration.add_index("todo", "todo_person_active_created_on_ind", "person_id, active, created_on DESC, entity_id DESC")
+    migration.add_index(
+        "todo", "todo_person_active_completed_created_on_ind",
+        "person_id, active, is_completed, created_on DESC, entity_id DESC"
+    )
+
+    migration.update_version_table(version=revision)
+
+
+def downgrade(migration):
+    migration.remove_index("todo", "todo_person_active_completed_created_on_ind")
+    migration.remove_index("todo", "todo_person_active_created_on_ind")
+    migration.add_index(
+        "todo", "todo_person_active_completed_changed_on_ind",
+        "person_id, active, is_completed, changed_on DESC, entity_id DESC"
+    )
+    migration.execute("ALTER TABLE todo_audit DROP COLUMN created_on;")
+    migration.execute("ALTER TABLE todo DROP COLUMN created_on;")
+
+    migration.update_version_table(version=down_revision)
@@ -0,0 +1,32 @@
+from flask import request
+
+from common.app_config import config
+from common.repositories.factory import RepositoryFactory
+from common.utils.query_detector import check_statements, start_recording, stop_recording
+from logger import logger
+
+
+def register_query_detector(app, mode: str):
+    """
+    Records the SQL statements of every request and reports the shapes it repeats (N+1 lookups) or that
+    run slow, with the plan PostgreSQL picks for them. In 'raise' mode the request fails, so a test
+    exercising it does too. Statements run while streaming a response come after the check and are not
+    covered.
+    """
+    if mode not in ('warn', 'raise'):
+        raise ValueError(f"QUERY_DETECTOR must be 'warn' or 'raise', not {mode!r}")
+
+    @app.before_request
+    def start_query_recording():
+        start_recording()
+
+    @app.after_request
+    def check_query_recording(response):
+        recorder = stop_recording()
+        if recorder is not None:
+            check_statements(
+                recorder, config.QUERY_DETECTOR_MAX_REPEATS, config.QUERY_DETECTOR_SLOW_MS / 1e3, mode,
+                context=f"{request.method} {request.path}",
+                get_adapter=RepositoryFactory(config).get_db_connection, warn=logger.warning
+            )
+        return response
@@ -1,8 +1,10 @@
 from flask_restx import Namespace, Resource
-from flask import request
+from flask import g, request
+from app.helpers.decorators import login_required
 from app.helpers.response import get_success_response, get_failure_response, parse_request_body, validate_required_fields
-from common.app_config import config
-from common.services import AuthService, PersonService
+from app.helpers.serializers import get_serializer
+from common.models import Person
+from common.services import AuthService, get_service
 
 # Create the auth blueprint
 auth_api = Namespace('auth', description="Auth related APIs")
@@ -31,7 +33,7 @@ class Signup(Resource):
         parsed_body = parse_request_body(request, ['first_name', 'last_name', 'email_address'])
         validate_required_fields(parsed_body)
 
-        auth_service = AuthService(config)
+        auth_service = get_service(AuthService)
 
         auth_service.signup(
             parsed_body['email_address'],
@@ -53,20 +55,25 @@ class Login(Resource):
         parsed_body = parse_request_body(request, ['email', 'password'])
         validate_required_fields(parsed_body)
 
-        auth_service = AuthService(config)
-        access_token, expiry = auth_service.login_user_by_email_password(
+        auth_service = get_service(AuthService)
+        access_token, expiry, person = auth_service.login_user_by_email_password(
             parsed_body['email'], 
             parsed_body['password']
         )
 
-        person_service = PersonService(config)
-        person = person_service.get_person_by_email_address(email_address=parsed_body['email'])
-
-        person_dict = person.as_dict()
+        person_dict = get_serializer(Person)(person)
         person_dict['email'] = parsed_body['email']
         return get_success_response(person=person_dict, access_token=access_token, expiry=expiry)
 
 
+@auth_api.route('/logout')
+class Logout(Resource):
+    @login_required()
+    def post(self):
+        get_service(AuthService).revoke_access_token(g.access_token)
+        return get_success_response(message="Logged out successfully.")
+
+
 @auth_api.route('/forgot_password', doc=dict(description="Send reset password link"))
 class ForgotPassword(Resource):
     @auth_api.expect(
@@ -78,7 +85,7 @@ class ForgotPassword(Resource):
         parsed_body = parse_request_body(request, ['email'])
         validate_required_fields(parsed_body)
 
-        auth_service = AuthService(config)
+        auth_service = get_service(AuthService)
         auth_service.trigger_forgot_password_email(parsed_body.get('email'))
 
         return get_success_response(message="Password reset email sent successfully.")
@@ -98,11 +105,11 @@ class ResetPassword(Resource):
         parsed_body = parse_request_body(request, ['password'])
         validate_required_fields(parsed_body)
 
-        auth_service = AuthService(config)
+        auth_service = get_service(AuthService)
         access_token, expiry, person_obj = auth_service.reset_user_password(token, uidb64, parsed_body.get('password'))
         return get_success_response(
             message="Your password has been updated!", 
             access_token=access_token, 
             expiry=expiry,
-            person=person_obj.as_dict()
+            person=get_serializer(Person)(person_obj)
         )
@@ -1,9 +1,10 @@
 from flask_restx import Namespace, Resource
 from flask import request
 from app.helpers.response import get_success_response, get_failure_response, parse_request_body, validate_required_fields
-from common.app_config import config
-from common.services import OrganizationService, PersonService
+from common.services import OrganizationService, PersonService, get_service
 from app.helpers.decorators import login_required, organization_required
+from app.helpers.serializers import get_field_columns, parse_fields
+from common.models import Organization
 
 # Create the organization blueprint
 organization_api = Namespace('organization', description="Organization-related APIs")
@@ -14,8 +15,17 @@ class Organizations(Resource):
     
     @login_required()
     def get(self, person):
-        organization_service = OrganizationService(config)
-        organizations = organization_service.get_organizations_with_roles_by_person(person.entity_id)
+        try:
+            fields = parse_fields(Organization, request.args.get('fields'), extra=('role',))
+        except ValueError as e:
+            return get_failure_response(message=str(e))
+
+        organization_service = get_service(OrganizationService)
+        organizations = organization_service.get_organizations_with_roles_by_person(
+            person.entity_id,
+            columns=get_field_columns(Organization, fields),
+            include_role=fields is None or 'role' in fields
+        )
         return get_success_response(organizations=organizations)
 
     @login_required()
@@ -24,7 +34,7 @@ class Organizations(Resource):
         parsed_body = parse_request_body(request, ["name"])
         validate_required_fields(parsed_body)
         
-        organization_service = OrganizationService(config)
+        organization_service = get_service(OrganizationService)
         organization.name = parsed_body["name"]
         organization_service.save_organization(organization)
 
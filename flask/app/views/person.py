@@ -1,9 +1,10 @@
 from flask_restx import Namespace, Resource
 from flask import request
-from app.helpers.response import get_success_response, parse_request_body, validate_required_fields
-from app.helpers.decorators import login_required
-from common.services import PersonService
-from common.app_config import config
+from app.helpers.response import get_success_response, get_failure_response, parse_request_body, validate_required_fields
+from app.helpers.decorators import login_required, etag
+from app.helpers.serializers import get_serializer, parse_fields
+from common.models import Person as PersonModel
+from common.services import PersonService, get_service
 
 # Create the organization blueprint
 person_api = Namespace('person', description="Person-related APIs")
@@ -13,7 +14,16 @@ person_api = Namespace('person', description="Person-related APIs")
 class Me(Resource):
     
     @login_required()
+    @etag(lambda person: person.version)
     def get(self, person):
+        try:
+            fields = parse_fields(PersonModel, request.args.get('fields'))
+        except ValueError as e:
+            return get_failure_response(message=str(e))
+
+        # The person comes from the principal cache, so the fieldset only narrows the response.
+        if fields is not None:
+            return get_success_response(person=get_serializer(PersonModel, fields)(person))
         return get_success_response(person=person)
 
 
@@ -30,7 +40,7 @@ class Person(Resource):
         parsed_body = parse_request_body(request, ['first_name', 'last_name'])
         validate_required_fields(parsed_body)
         
-        person_service = PersonService(config)
+        person_service = get_service(PersonService)
         person = person_service.update_person(
             person_id,
             first_name=parsed_body['first_name'],
@@ -1,34 +1,69 @@
 from flask_restx import Namespace, Resource
-from flask import request
-from app.helpers.decorators import login_required
+from flask import request, Response, stream_with_context
+from app.helpers.decorators import login_required, etag
 from app.helpers.todo_helper import TodoHelper
 from common.app_config import config
+from common.services import get_service
 from common.services.todo import TodoService, TodoNotFoundError, UnauthorizedError, ConcurrentModificationError
 from common.models.todo import Todo
 import uuid
 
 todo_api = Namespace('todos', description='Todo operations')
 
+
+def get_todo_list_validator(person):
+    return get_service(TodoService).get_list_validator(person.entity_id)
+
+
 @todo_api.route('/')
 class TodoList(Resource):
     @login_required()
+    @etag(get_todo_list_validator)
     def get(self, person):
-        """Get list of todos with optional filters"""
+        """Get todos with optional filters, newest first, paginated when limit or cursor is given"""
         status = request.args.get('status')
         entity_id = person.entity_id
 
-        todo_service = TodoService(config)
         try:
-            if status == 'completed':
-                todos = todo_service.get_todos_by_person_id_and_status(entity_id, True)
-            elif status == 'incomplete':
-                todos = todo_service.get_todos_by_person_id_and_status(entity_id, False)
-            else:
-                todos = todo_service.get_todos_by_person_id(entity_id)
-                
+            # Without limit or cursor every todo is returned, as callers from before pagination expect.
+            limit = None
+            if request.args.get('limit') or request.args.get('cursor'):
+                limit = TodoHelper.parse_page_limit(
+                    request.args.get('limit'), config.TODO_PAGE_DEFAULT_LIMIT, config.TODO_PAGE_MAX_LIMIT
+                )
+            after = TodoHelper.decode_cursor(request.args.get('cursor'))
+            fields, columns = TodoHelper.parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return {
+                'success': False,
+                'message': str(e)
+            }, 200
+
+        is_completed = None
+        if status == 'completed':
+            is_completed = True
+        elif status == 'incomplete':
+            is_completed = False
+
+        todo_service = get_service(TodoService)
+
+        if request.args.get('stream') in ('1', 'true'):
+            # Stream every todo from a server-side cursor instead of paginating
+            rows = todo_service.iter_todo_rows(entity_id, is_completed=is_completed, columns=columns)
+            return Response(
+                stream_with_context(TodoHelper.stream_todos_response(rows, config.TODO_STREAM_CHUNK_SIZE, fields)),
+                mimetype='application/json'
+            )
+
+        try:
+            todos, next_key = todo_service.get_todos_page(
+                entity_id, limit, after=after, is_completed=is_completed, columns=columns
+            )
+
             return {
                 'success': True,
-                'data': TodoHelper.format_todos_response(todos)
+                'data': TodoHelper.format_todos_response(todos, fields),
+                'next_cursor': TodoHelper.encode_cursor(next_key)
             }, 200
         except Exception as e:
             return {
@@ -64,7 +99,7 @@ class TodoList(Resource):
         )
 
         # Save todo
-        todo_service = TodoService(config)
+        todo_service = get_service(TodoService)
         try:
             saved_todo = todo_service.create_todo(todo)
             return {
@@ -77,41 +112,133 @@ class TodoList(Resource):
                 'message': str(e)
             }, 200
 
+@todo_api.route('/stats')
+class TodoStats(Resource):
+    @login_required()
+    def get(self, person):
+        """Get todo counts: total, completed, overdue and per priority"""
+        todo_service = get_service(TodoService)
+        try:
+            return {
+                'success': True,
+                'data': todo_service.get_todo_stats(person.entity_id)
+            }, 200
+        except Exception as e:
+            return {
+                'success': False,
+                'message': str(e)
+            }, 200
+
+@todo_api.route('/search')
+class TodoSearch(Resource):
+    @login_required()
+    def get(self, person):
+        """Search todo titles and descriptions, best match first"""
+        search = (request.args.get('q') or '').strip()
+        if not search:
+            return {
+                'success': False,
+                'message': 'q is required'
+            }, 200
+
+        try:
+            limit = TodoHelper.parse_page_limit(
+                request.args.get('limit'), config.TODO_PAGE_DEFAULT_LIMIT, config.TODO_PAGE_MAX_LIMIT
+            )
+            after = TodoHelper.decode_search_cursor(request.args.get('cursor'))
+            fields, columns = TodoHelper.parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return {
+                'success': False,
+                'message': str(e)
+            }, 200
+
+        todo_service = get_service(TodoService)
+        try:
+            todos, next_key = todo_service.search_todos(person.entity_id, search, limit, after=after, columns=columns)
+
+            return {
+                'success': True,
+                'data': TodoHelper.format_todos_response(todos, fields),
+                'next_cursor': TodoHelper.encode_search_cursor(next_key)
+            }, 200
+        except Exception as e:
+            return {
+                'success': False,
+                'message': str(e)
+            }, 200
+
+@todo_api.route('/batch')
+class TodoBatch(Resource):
+    @login_required()
+    def post(self, person):
+        """Apply a list of create/update/complete/delete operations in one transaction"""
+        data = request.get_json(silent=True) or {}
+        operations = data.get('operations')
+
+        if not isinstance(operations, list) or not operations:
+            return {
+                'success': False,
+                'message': 'operations must be a non-empty list'
+            }, 200
+
+        if len(operations) > config.TODO_BATCH_MAX_OPERATIONS:
+            return {
+                'success': False,
+                'message': f'A batch can contain at most {config.TODO_BATCH_MAX_OPERATIONS} operations'
+            }, 200
+
+        if not all(isinstance(op, dict) for op in operations):
+            return {
+                'success': False,
+                'message': 'Each operation must be an object'
+            }, 200
+
+        operations = [
+            dict(op, due_date=TodoHelper.parse_todo_date(op['due_date'])) if 'due_date' in op else op
+            for op in operations
+        ]
+
+        todo_service = get_service(TodoService)
+        try:
+            results = todo_service.apply_batch(person.entity_id, operations)
+            return {
+                'success': True,
+                'data': [
+                    {'success': True, 'data': TodoHelper.format_todo_response(todo)} if todo
+                    else {'success': False, 'message': error}
+                    for todo, error in results
+                ]
+            }, 200
+        except Exception as e:
+            return {
+                'success': False,
+                'message': str(e)
+            }, 200
+
 @todo_api.route('/<string:todo_id>')
 class TodoItem(Resource):
     @login_required()
     def put(self, person, todo_id):
         """Update a todo"""
         data = request.get_json()
-        todo_service = TodoService(config)
+        todo_service = get_service(TodoService)
         person_id = person.entity_id
         
         try:
-            # Get existing todo
-            todo = todo_service.get_todo_by_id(todo_id, person_id)
-            current_version = data.get('version')
-            if current_version != todo.version:
-                return {
-                    'success': False,
-                    'message': 'Todo has been modified by another request'
-                }, 200
-
-            # Update fields if provided
+            # Collect the fields to update
+            changes = {}
             if 'title' in data:
-                todo.title = data['title']
+                changes['title'] = data['title']
             if 'description' in data:
-                todo.description = data['description']
+                changes['description'] = data['description']
             if 'priority' in data:
-                todo.priority = data['priority']
+                changes['priority'] = data['priority']
             if 'due_date' in data:
-                todo.due_date = TodoHelper.parse_todo_date(data['due_date'])
-
-            # Update version
-            todo.previous_version = todo.version
-            todo.version = str(uuid.uuid4().hex)
+                changes['due_date'] = TodoHelper.parse_todo_date(data['due_date'])
 
-            # Save updates
-            updated_todo = todo_service.update_todo(todo, person_id)
+            # Apply them only if the todo is still at the version the client has
+            updated_todo = todo_service.update_todo_fields(todo_id, person_id, data.get('version'), changes)
             return {
                 'success': True,
                 'data': TodoHelper.format_todo_response(updated_todo)
@@ -127,6 +254,11 @@ class TodoItem(Resource):
                 'success': False,
                 'message': str(e)
             }, 200
+        except ConcurrentModificationError as e:
+            return {
+                'success': False,
+                'message': str(e)
+            }, 200
         except Exception as e:
             return {
                 'success': False,
@@ -136,7 +268,7 @@ class TodoItem(Resource):
     @login_required()
     def delete(self, person, todo_id):
         """Delete a todo (soft delete)"""
-        todo_service = TodoService(config)
+        todo_service = get_service(TodoService)
         person_id = person.entity_id
         try:
             todo_service.delete_todo(todo_id, person_id)
@@ -170,7 +302,7 @@ class TodoComplete(Resource):
         person_id = person.entity_id
         version = data.get('version')
         
-        todo_service = TodoService(config)
+        todo_service = get_service(TodoService)
         try:
             updated_todo = todo_service.update_todo_status(todo_id, person_id, is_completed, version)
             return {
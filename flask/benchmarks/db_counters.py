@@ -0,0 +1,66 @@
+"""
+Counts the statements and commits psycopg2 sends for every PostgreSQL adapter, below the app's own
+instrumentation, for benchmarks that check commits or check the app's query counts against the database.
+Where the statements of a block are enough, use the recorder of common.utils.query_detector instead.
+
+Usage in a benchmark:
+    from db_counters import count_database_calls, counters
+    count_database_calls()  # before create_app()
+    counters.reset()
+    ...
+    print(counters.statements, counters.commits)
+"""
+from rococo.data.postgresql import PostgreSQLAdapter
+
+
+class DatabaseCounters:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+
+    def reset(self):
+        self.statements = 0
+        self.commits = 0
+
+
+counters = DatabaseCounters()
+
+
+class CountingCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, *args, **kwargs):
+        counters.statements += 1
+        return self._cursor.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class CountingConnection:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def commit(self):
+        counters.commits += 1
+        return self._connection.commit()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+_enter = PostgreSQLAdapter.__enter__
+
+
+def _counting_enter(self):
+    _enter(self)
+    # Subclasses wrap the cursor after this returns, so the counting cursor is the innermost one.
+    self._cursor = CountingCursor(self._cursor)
+    self._connection = CountingConnection(self._connection)
+    return self
+
+
+def count_database_calls():
+    """Counts the calls of every adapter entered from now on into `counters`."""
+    PostgreSQLAdapter.__enter__ = _counting_enter
@@ -0,0 +1,69 @@
+"""
+Counts the statements the DB adapter sends to look up an identity (email, login method and person), and
+checks each of these paths needs exactly one: POST /auth/login, trigger_forgot_password_email, and a
+login_required request missing the principal cache.
+
+Needs a migrated database. Usage (inside the api container):
+    python benchmarks/identity_queries.py
+"""
+import re
+import uuid
+
+from app import create_app
+from common.app_config import config
+from common.services import AuthService, get_service
+from common.services.cache import principal_cache
+from common.utils.query_detector import start_recording, stop_recording
+
+IDENTITY_TABLES = re.compile(r'\bFROM\s+(email|login_method|person)\b', re.IGNORECASE)
+
+
+def get_identity_statements(recorder):
+    return [statement.sql for statement in recorder.statements if IDENTITY_TABLES.search(statement.sql)]
+
+
+def dispatch(app, method, url, **kwargs):
+    """Runs a request through the app in a context of our own, so the statements it sends can be recorded."""
+    with app.test_request_context(url, method=method, **kwargs):
+        recorder = start_recording()
+        response = app.full_dispatch_request()
+        stop_recording()
+    return response, recorder
+
+
+def check(name, recorder):
+    statements = get_identity_statements(recorder)
+    print(f"{name:40} {len(recorder.statements)} statements, {len(statements)} identity queries")
+    assert len(statements) == 1, '\n\n'.join(statements)
+
+
+def main():
+    app = create_app()
+    client = app.test_client()
+
+    email = f"identity-{uuid.uuid4().hex[:8]}@example.com"
+    client.post('/auth/signup', json={'first_name': 'Identity', 'last_name': 'Queries', 'email_address': email})
+
+    response, recorder = dispatch(
+        app, 'POST', '/auth/login', json={'email': email, 'password': config.DEFAULT_USER_PASSWORD}
+    )
+    assert response.status_code == 200, response.get_data(as_text=True)
+    check('POST /auth/login', recorder)
+    headers = {'Authorization': f"Bearer {response.json['access_token']}"}
+
+    with app.test_request_context():
+        recorder = start_recording()
+        get_service(AuthService).trigger_forgot_password_email(email)
+        stop_recording()
+    check('trigger_forgot_password_email', recorder)
+
+    principal_cache.clear()
+    response, recorder = dispatch(app, 'GET', '/person/me', headers=headers)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    check('login_required (principal cache miss)', recorder)
+
+    print("OK: each path looks the identity up with one query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Checks the cold-start cost of the API against a budget: runs `from main import create_app; create_app()`
+in fresh interpreters under `python -X importtime`, and fails when the best run's import time goes over
+the budget or a module that should load lazily (the unused rococo backends' boto3 and pymysql, and rollbar
+without a ROLLBAR_ACCESS_TOKEN) was loaded. Runs in CI (.github/workflows/checks.yml).
+
+Usage (inside the api container):
+    python benchmarks/import_time.py [--budget-ms 1000] [--runs 5] [--top 15]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+FLASK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP = (
+    "import json, sys, time; started = time.perf_counter(); "
+    "from main import create_app; create_app(); "
+    "seconds = time.perf_counter() - started; "
+    "from common.utils.lazy_imports import is_loaded; "
+    "print(json.dumps([seconds, [name for name in sys.argv[1:] if is_loaded(name)]]))"
+)
+
+# Modules that should not have run by the end of create_app().
+LAZY_MODULES = ('boto3', 'pymysql', 'rollbar')
+
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def measure(lazy_modules):
+    """
+    Returns the wall time of the startup, the (self µs, cumulative µs, depth, module) of each import, and
+    which of `lazy_modules` were loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP, *lazy_modules], cwd=FLASK_DIR, capture_output=True,
+        text=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [FLASK_DIR, os.environ.get('PYTHONPATH')])))
+    )
+    if result.returncode:
+        sys.exit(f"Starting the app failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((int(self_us), int(cumulative_us), len(indent) // 2, module))
+    seconds, loaded = json.loads(result.stdout.strip().splitlines()[-1])
+    return seconds, imports, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget-ms', type=float, default=1000, help='Allowed import time of the best run.')
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to start; the fastest counts.')
+    parser.add_argument('--top', type=int, default=15, help='Slowest top-level imports to list.')
+    args = parser.parse_args()
+
+    # rollbar is needed at startup when errors are reported to it.
+    lazy = [module for module in LAZY_MODULES if module != 'rollbar' or not os.environ.get('ROLLBAR_ACCESS_TOKEN')]
+    runs = [measure(lazy) for _ in range(args.runs)]
+    wall, imports, loaded = min(
+        runs, key=lambda run: sum(cumulative for _, cumulative, depth, _ in run[1] if depth == 0)
+    )
+    total_ms = sum(cumulative for _, cumulative, depth, _ in imports if depth == 0) / 1e3
+
+    print(f"{'cumulative ms':>13} {'self ms':>8}  module")
+    slowest = sorted((entry for entry in imports if entry[2] <= 2), key=lambda entry: -entry[1])
+    for self_us, cumulative_us, depth, module in slowest[:args.top]:
+        print(f"{cumulative_us / 1e3:13.1f} {self_us / 1e3:8.1f}  {'  ' * depth}{module}")
+    print(f"\nimports: {total_ms:.0f}ms, create_app() total: {wall * 1e3:.0f}ms (best of {args.runs})")
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"imports took {total_ms:.0f}ms, over the {args.budget_ms:.0f}ms budget")
+
+    failures += [f"{module} was loaded at startup" for module in loaded]
+
+    if failures:
+        sys.exit('FAILED: ' + '; '.join(failures))
+    print(f"OK: within the {args.budget_ms:.0f}ms budget")
+
+
+if __name__ == '__main__':
+    main()
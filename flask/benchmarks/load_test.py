@@ -0,0 +1,384 @@
+"""
+Load harness: runs the API from main:create_app under waitress, with the schema of app/migrations applied
+to the PostgreSQL configured by the POSTGRES_* settings and RabbitMQ replaced by an in-memory fake, seeds
+users with todos, and drives a mix of login, todo list, create, complete and organization listing
+requests from concurrent clients.
+
+Throughput, p50/p95/p99 latency and the DB time reported in Server-Timing are written per endpoint to a
+JSON report, optionally compared with the report of an earlier run.
+
+Needs a local PostgreSQL the settings point at, waitress (in the dev dependency group, so
+`poetry install --with dev` or `pip install waitress` outside the image) and the rococo-postgres command
+that comes with rococo, which applies the migrations. Usage (inside the api container):
+    python benchmarks/load_test.py [--users 20] [--todos 50] [--concurrency 16] [--duration 30]
+                                   [--output load_test.json] [--compare previous.json]
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+FLASK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relative weights of the requests a client sends.
+DEFAULT_MIX = {'login': 5, 'list_todos': 50, 'create_todo': 20, 'complete_todo': 15, 'list_organizations': 10}
+
+_SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+class FakeChannel:
+    def __init__(self, broker):
+        self.broker = broker
+        self.is_open = True
+
+    def confirm_delivery(self):
+        pass
+
+    def exchange_declare(self, **kwargs):
+        pass
+
+    def queue_declare(self, **kwargs):
+        pass
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        with self.broker.lock:
+            self.broker.published[routing_key] += 1
+
+
+class FakeBroker:
+    """Stands in for RabbitMQ as the message sender's connection factory, counting what is published."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.published = defaultdict(int)
+
+    def __call__(self, parameters):
+        return self
+
+    @property
+    def is_open(self):
+        return True
+
+    def channel(self):
+        return FakeChannel(self)
+
+    def close(self):
+        pass
+
+
+def serve(port: int, threads: int):
+    """Runs the API under waitress in this process, publishing to a FakeBroker."""
+    from waitress import serve as waitress_serve
+
+    from common.tasks.send_message import get_message_sender
+    from main import create_app
+
+    get_message_sender().connection_factory = FakeBroker()
+    waitress_serve(create_app(), host='127.0.0.1', port=port, threads=threads, _quiet=True)
+
+
+def migrate():
+    # Prefer the migration tool installed next to this interpreter, e.g. in a virtualenv that is not on PATH.
+    command = os.path.join(os.path.dirname(sys.executable), 'rococo-postgres')
+    subprocess.run([command if os.path.exists(command) else 'rococo-postgres', 'rf'], cwd=FLASK_DIR, check=True)
+
+
+def start_server(port: int, threads: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), 'serve', '--port', str(port), '--threads', str(threads)],
+        cwd=FLASK_DIR, stdout=subprocess.DEVNULL,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [FLASK_DIR, os.environ.get('PYTHONPATH')])))
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"The API server exited with {server.returncode}")
+        try:
+            Client(port).request('GET', '/')
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("The API server did not start within 60 seconds")
+
+
+class Client:
+    """A keep-alive HTTP connection to the API, reconnecting when the server drops it."""
+
+    def __init__(self, port: int, token: str = None):
+        self.port = port
+        self.token = token
+        self._connection = None
+
+    def request(self, method: str, path: str, body: dict = None):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        payload = json.dumps(body) if body is not None else None
+
+        for attempt in range(2):
+            if self._connection is None:
+                self._connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            try:
+                self._connection.request(method, path, payload, headers)
+                response = self._connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                self._connection.close()
+                self._connection = None
+                if attempt:
+                    raise
+
+        content = json.loads(data) if response.getheader('Content-Type', '').startswith('application/json') else None
+        return response.status, content, response.getheader('Server-Timing')
+
+
+class Account:
+    def __init__(self, email: str, client: Client):
+        self.email = email
+        self.client = client
+        self.open_todos = []  # (id, version) of todos to complete
+        self.lock = threading.Lock()
+
+
+def seed(port: int, users: int, todos: int, password: str):
+    accounts = []
+    run_id = uuid.uuid4().hex[:8]
+    for i in range(users):
+        client = Client(port)
+        email = f"load-{run_id}-{i}@example.com"
+        client.request('POST', '/auth/signup', {'first_name': 'Load', 'last_name': f'User {i}', 'email_address': email})
+        status, login, _ = client.request('POST', '/auth/login', {'email': email, 'password': password})
+        if not (login or {}).get('success'):
+            raise RuntimeError(f"Could not log in the seeded user {email}: {login}")
+        client.token = login['access_token']
+        account = Account(email, client)
+
+        for start in range(0, todos, 100):
+            operations = [{'op': 'create', 'title': f'seeded todo {n}'} for n in range(start, min(todos, start + 100))]
+            _, created, _ = client.request('POST', '/todos/batch', {'operations': operations})
+            account.open_todos += [(result['data']['id'], result['data']['version']) for result in created['data']]
+        accounts.append(account)
+    return accounts
+
+
+def run_operation(name: str, account: Account, client: Client, password: str, rng: random.Random):
+    if name == 'login':
+        status, body, timing = client.request('POST', '/auth/login', {'email': account.email, 'password': password})
+    elif name == 'list_todos':
+        status, body, timing = client.request('GET', '/todos/')
+    elif name == 'create_todo':
+        status, body, timing = client.request('POST', '/todos/', {'title': 'load test todo'})
+        if (body or {}).get('success'):
+            with account.lock:
+                account.open_todos.append((body['data']['id'], body['data']['version']))
+    elif name == 'complete_todo':
+        with account.lock:
+            todo = account.open_todos.pop(rng.randrange(len(account.open_todos))) if account.open_todos else None
+        if todo is None:
+            return run_operation('create_todo', account, client, password, rng)
+        todo_id, version = todo
+        status, body, timing = client.request(
+            'PUT', f'/todos/{todo_id}/complete', {'is_completed': True, 'version': version}
+        )
+    elif name == 'list_organizations':
+        status, body, timing = client.request('GET', '/organization/')
+    else:
+        raise ValueError(f"Unknown operation {name}")
+    return name, status == 200 and bool((body or {}).get('success')), timing
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    return values[max(0, min(len(values) - 1, int(round(fraction * len(values) + 0.5)) - 1))]
+
+
+def drive(port: int, accounts, concurrency: int, duration: float, warmup: float, mix: dict, password: str, seed_value):
+    names, weights = list(mix), list(mix.values())
+    samples = defaultdict(list)  # endpoint -> [(seconds, ok, db_ms, queries)]
+    lock = threading.Lock()
+    measure_from = time.monotonic() + warmup
+    stop_at = measure_from + duration
+
+    def worker(index):
+        rng = random.Random(None if seed_value is None else seed_value + index)
+        # Each client acts as one account on its own connection; several clients may share an account.
+        account = accounts[index % len(accounts)]
+        client = Client(port, account.client.token)
+        local = defaultdict(list)
+        while True:
+            started = time.monotonic()
+            if started >= stop_at:
+                break
+            try:
+                name, ok, timing = run_operation(rng.choices(names, weights)[0], account, client, password, rng)
+            except OSError:
+                name, ok, timing = 'connection_error', False, None
+            finished = time.monotonic()
+            if started >= measure_from:
+                match = _SERVER_TIMING_DB.search(timing or '')
+                local[name].append((
+                    finished - started, ok, float(match.group(1)) if match else None,
+                    int(match.group(2)) if match else None
+                ))
+        with lock:
+            for name, values in local.items():
+                samples[name] += values
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def summarize(samples, duration: float):
+    endpoints = {}
+    for name, values in sorted(samples.items()):
+        latencies = sorted(seconds * 1e3 for seconds, _, _, _ in values)
+        db_ms = [value for _, _, value, _ in values if value is not None]
+        queries = [value for _, _, _, value in values if value is not None]
+        endpoints[name] = {
+            'requests': len(values),
+            'errors': sum(1 for _, ok, _, _ in values if not ok),
+            'throughput_rps': round(len(values) / duration, 2),
+            'latency_ms': {
+                'mean': round(sum(latencies) / len(latencies), 3),
+                'p50': round(percentile(latencies, 0.50), 3),
+                'p95': round(percentile(latencies, 0.95), 3),
+                'p99': round(percentile(latencies, 0.99), 3),
+                'max': round(latencies[-1], 3),
+            },
+            'db_ms_mean': round(sum(db_ms) / len(db_ms), 3) if db_ms else None,
+            'db_queries_mean': round(sum(queries) / len(queries), 2) if queries else None,
+        }
+    total = sum(endpoint['requests'] for endpoint in endpoints.values())
+    return {
+        'requests': total,
+        'errors': sum(endpoint['errors'] for endpoint in endpoints.values()),
+        'throughput_rps': round(total / duration, 2),
+    }, endpoints
+
+
+def get_git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=FLASK_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report, previous=None):
+    print(f"{'endpoint':20} {'requests':>9} {'errors':>7} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'db ms':>7} {'queries':>7}")
+    for name, endpoint in report['endpoints'].items():
+        latency = endpoint['latency_ms']
+        print(
+            f"{name:20} {endpoint['requests']:9} {endpoint['errors']:7} {endpoint['throughput_rps']:8.1f} "
+            f"{latency['p50']:8.2f} {latency['p95']:8.2f} {latency['p99']:8.2f} "
+            f"{endpoint['db_ms_mean'] or 0:7.2f} {endpoint['db_queries_mean'] or 0:7.1f}"
+        )
+    total = report['total']
+    print(f"{'total':20} {total['requests']:9} {total['errors']:7} {total['throughput_rps']:8.1f}")
+
+    if previous is None:
+        return
+    print(f"\nchange from {previous.get('git_commit') or 'the previous run'}:")
+    for name, endpoint in report['endpoints'].items():
+        before = previous['endpoints'].get(name)
+        if before is None:
+            continue
+        changes = [
+            f"{key} {(endpoint['latency_ms'][key] / before['latency_ms'][key] - 1) * 100:+.1f}%"
+            for key in ('p50', 'p95', 'p99') if before['latency_ms'][key]
+        ]
+        if before['throughput_rps']:
+            changes.append(f"rps {(endpoint['throughput_rps'] / before['throughput_rps'] - 1) * 100:+.1f}%")
+        print(f"{name:20} {', '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    subcommands = parser.add_subparsers(dest='command')
+    serve_parser = subcommands.add_parser('serve', help='Run the API server the harness drives.')
+    serve_parser.add_argument('--port', type=int, required=True)
+    serve_parser.add_argument('--threads', type=int, default=8)
+
+    parser.add_argument('--users', type=int, default=20, help='Seeded users.')
+    parser.add_argument('--todos', type=int, default=50, help='Seeded todos per user.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients.')
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds.')
+    parser.add_argument('--warmup', type=float, default=5, help='Seconds of load before measuring.')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--threads', type=int, default=8, help='Waitress worker threads.')
+    parser.add_argument('--mix', type=json.loads, default=DEFAULT_MIX, help='JSON {operation: weight}.')
+    parser.add_argument('--seed', type=int, default=None, help='Seed of the request mix.')
+    parser.add_argument('--skip-migrations', action='store_true')
+    parser.add_argument('--output', default='load_test.json', help='Where to write the JSON report.')
+    parser.add_argument('--compare', help='JSON report of an earlier run to compare with.')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.port, args.threads)
+        return
+
+    from common.app_config import config
+
+    started_at = datetime.now(timezone.utc).isoformat()
+    if not args.skip_migrations:
+        migrate()
+    server = start_server(args.port, args.threads)
+    try:
+        accounts = seed(args.port, args.users, args.todos, config.DEFAULT_USER_PASSWORD)
+        samples = drive(
+            args.port, accounts, args.concurrency, args.duration, args.warmup, args.mix,
+            config.DEFAULT_USER_PASSWORD, args.seed
+        )
+    finally:
+        # An interrupt lets the server shut down like on Ctrl+C, including its password hashing processes.
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    total, endpoints = summarize(samples, args.duration)
+    report = {
+        'started_at': started_at,
+        'git_commit': get_git_commit(),
+        'python': platform.python_version(),
+        'settings': {
+            key: getattr(args, key)
+            for key in ('users', 'todos', 'concurrency', 'duration', 'warmup', 'threads', 'mix', 'seed')
+        },
+        'total': total,
+        'endpoints': endpoints,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+    print_report(report, previous)
+    print(f"\nReport written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
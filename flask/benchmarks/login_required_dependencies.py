@@ -0,0 +1,47 @@
+"""
+Measures the cost of constructing the dependencies used by `login_required`.
+
+Usage (inside the api container):
+    python benchmarks/login_required_dependencies.py [iterations]
+"""
+import sys
+import timeit
+
+from flask import Flask
+
+from common.app_config import config
+from common.services import AuthService, EmailService, PersonService, ServiceContainer
+
+
+def build_per_call():
+    AuthService(config)
+    EmailService(config)
+    PersonService(config)
+
+
+def build_from_container(container):
+    container.get(AuthService)
+    container.get(EmailService)
+    container.get(PersonService)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    app = Flask(__name__)
+    container = ServiceContainer(config)
+
+    def per_call():
+        with app.test_request_context():
+            build_per_call()
+
+    def from_container():
+        with app.test_request_context():
+            build_from_container(container)
+
+    for name, func in (("per-call construction", per_call), ("service container", from_container)):
+        elapsed = timeit.timeit(func, number=iterations)
+        print(f"{name}: {elapsed / iterations * 1e6:.1f} us/request over {iterations} requests")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Counts the queries organization_required runs per request once its membership cache is warm, and checks
+that saving the organization or the person's role is seen by the next request.
+
+Needs a migrated database. Usage (inside the api container):
+    python benchmarks/organization_membership.py [requests]
+"""
+import sys
+import time
+import uuid
+
+from flask import g
+
+from app import create_app
+from app.helpers.decorators import organization_required
+from common.app_config import config
+from common.models import Organization, Person, PersonOrganizationRole
+from common.repositories.factory import RepositoryFactory, RepoType
+from common.services import OrganizationService, PersonOrganizationRoleService, get_service
+from common.utils.query_detector import start_recording, stop_recording
+
+
+@organization_required(with_roles=['admin', 'member'])
+def org_scoped_view(self, organization, role):
+    return organization, role
+
+
+def call_view(app, person, organization_id):
+    """Returns the view's organization and role, and the number of statements the request sent."""
+    with app.test_request_context(headers={'x-organization-id': organization_id}):
+        g.person = person
+        start_recording()
+        organization, role = org_scoped_view(None)
+        return organization, role, len(stop_recording().statements)
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    app = create_app()
+
+    with app.test_request_context():
+        factory = RepositoryFactory(config)
+        person = factory.get_repository(RepoType.PERSON).save(
+            Person(first_name='Member', last_name=uuid.uuid4().hex[:8])
+        )
+        organization = factory.get_repository(RepoType.ORGANIZATION).save(Organization(name='Members'))
+        role = factory.get_repository(RepoType.PERSON_ORGANIZATION_ROLE).save(PersonOrganizationRole(
+            person_id=person.entity_id, organization_id=organization.entity_id, role='admin'
+        ))
+
+    call_view(app, person, organization.entity_id)
+    queries, started = 0, time.perf_counter()
+    for _ in range(requests):
+        cached_organization, cached_role, statements = call_view(app, person, organization.entity_id)
+        queries += statements
+    elapsed = (time.perf_counter() - started) / requests
+    print(f"warm organization_required: {queries / requests:.2f} queries, {elapsed * 1e6:.0f}us per request")
+    assert queries == 0 and cached_role.role == 'admin'
+
+    with app.test_request_context():
+        role.role = 'member'
+        get_service(PersonOrganizationRoleService).save_person_organization_role(role)
+        organization.name = 'Members renamed'
+        get_service(OrganizationService).save_organization(organization)
+
+    cached_organization, cached_role, queries = call_view(app, person, organization.entity_id)
+    print(f"after saving the role and organization: {queries} queries")
+    assert (cached_organization.name, cached_role.role) == ('Members renamed', 'member')
+    print("OK: warm requests run no membership queries, and saves invalidate the cache")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Measures p99 latency of GET /todos/ while a storm of POST /auth/login requests verifies passwords
+concurrently, with password hashing inline on the worker threads and on the dedicated hashing executor.
+Requests go through the app with Flask's test client, one client per thread.
+
+Needs a migrated database. Usage (inside the api container):
+    python benchmarks/password_hashing_storm.py [login_threads] [seconds]
+"""
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+from app import create_app
+from common.app_config import config
+from common.tasks import password_hashing
+from common.tasks.password_hashing import PasswordHasher
+
+
+def run(app, use_executor, login_threads, seconds):
+    hasher = password_hashing._password_hasher = PasswordHasher(use_executor=use_executor)
+    client = app.test_client()
+
+    email = f"storm-{uuid.uuid4().hex[:8]}@example.com"
+    client.post('/auth/signup', json={'first_name': 'Hashing', 'last_name': 'Storm', 'email_address': email})
+    credentials = {'email': email, 'password': config.DEFAULT_USER_PASSWORD}
+    login = client.post('/auth/login', json=credentials).json
+    headers = {'Authorization': f"Bearer {login['access_token']}"}
+    for i in range(20):
+        client.post('/todos/', json={'title': f'todo {i}'}, headers=headers)
+
+    stop = threading.Event()
+    statuses = {}
+    statuses_lock = threading.Lock()
+
+    def login_storm():
+        storm_client = app.test_client()
+        while not stop.is_set():
+            status = storm_client.post('/auth/login', json=credentials).status_code
+            with statuses_lock:
+                statuses[status] = statuses.get(status, 0) + 1
+            if status == 503:
+                time.sleep(0.01)
+
+    storm = [threading.Thread(target=login_storm) for _ in range(login_threads)]
+    for thread in storm:
+        thread.start()
+
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        response = client.get('/todos/', headers=headers)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.status_code
+        time.sleep(0.001)
+
+    stop.set()
+    for thread in storm:
+        thread.join()
+    hasher.shutdown()
+
+    p99 = statistics.quantiles(latencies, n=100)[98]
+    print(f"executor={use_executor}: GET /todos/ p50={statistics.median(latencies) * 1e3:.2f}ms "
+          f"p99={p99 * 1e3:.2f}ms over {len(latencies)} reads, logins by status={statuses}, "
+          f"hashing={hasher.get_metrics()}")
+
+
+def main():
+    login_threads = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    app = create_app()
+    run(app, False, login_threads, seconds)
+    run(app, True, login_threads, seconds)
+
+
+if __name__ == '__main__':
+    main()
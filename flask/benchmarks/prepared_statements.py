@@ -0,0 +1,94 @@
+"""
+Measures the per-query latency of the hot repository queries with and without the per-connection
+prepared statement cache (POSTGRES_STATEMENT_CACHE_SIZE), and prints the cache's counters.
+
+Needs a migrated database. Usage (inside the api container):
+    python benchmarks/prepared_statements.py [iterations]
+"""
+import sys
+import time
+import uuid
+
+from app import create_app
+from common.app_config import config
+from common.models import Email, Person
+from common.models.todo import Todo
+from common.repositories.factory import RepositoryFactory, RepoType
+from common.repositories.prepared import get_statement_cache_stats
+
+ROUNDS = 10
+
+
+def get_queries(factory, person, email, todos):
+    person_repo = factory.get_repository(RepoType.PERSON)
+    email_repo = factory.get_repository(RepoType.EMAIL)
+    todo_repo = factory.get_repository(RepoType.TODO)
+    # get_one/get_many are timed at the adapter, since building rococo models would dwarf the query time.
+    return {
+        'email by address': lambda: email_repo.get_identity_by_email_address(email.email),
+        'person by entity_id': lambda: person_repo.adapter.get_one('person', {'entity_id': person.entity_id}),
+        'todo by entity_id + active': lambda: todo_repo.adapter.get_one(
+            'todo', {'entity_id': todos[0].entity_id, 'active': True}
+        ),
+        'todos by person_id + active': lambda: todo_repo.adapter.get_many(
+            'todo', {'person_id': person.entity_id, 'active': True}
+        ),
+        'todos by person_id + active + is_completed': lambda: todo_repo.adapter.get_many(
+            'todo', {'person_id': person.entity_id, 'active': True, 'is_completed': False}
+        ),
+        'todos page (1 row)': lambda: todo_repo.get_todos_page(person.entity_id, limit=1),
+        'todos list validator': lambda: todo_repo.get_list_validator(person.entity_id),
+    }, [person_repo.adapter, email_repo.adapter, todo_repo.adapter]
+
+
+def run(statement_cache_size, person, email, todos):
+    config.POSTGRES_STATEMENT_CACHE_SIZE = statement_cache_size
+    return get_queries(RepositoryFactory(config), person, email, todos)
+
+
+def time_query(query, adapters, iterations):
+    for adapter in adapters:
+        adapter.__enter__()
+    try:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            query()
+        return time.perf_counter() - started
+    finally:
+        for adapter in adapters:
+            adapter.__exit__(None, None, None)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    app = create_app()
+
+    with app.test_request_context():
+        factory = RepositoryFactory(config)
+        person = factory.get_repository(RepoType.PERSON).save(
+            Person(first_name='Prepared', last_name=uuid.uuid4().hex[:8])
+        )
+        email = factory.get_repository(RepoType.EMAIL).save(
+            Email(person_id=person.entity_id, email=f"prepared-{uuid.uuid4().hex[:8]}@example.com")
+        )
+        todo_repo = factory.get_repository(RepoType.TODO)
+        todos = [todo_repo.save(Todo(person_id=person.entity_id, title=f'todo {i}')) for i in range(20)]
+
+    # Both variants share the request's pooled connection; alternate them in rounds so drift affects both.
+    with app.test_request_context():
+        plain_queries, plain_adapters = run(0, person, email, todos)
+        prepared_queries, prepared_adapters = run(64, person, email, todos)
+
+        print(f"{'query':45} {'plain':>9} {'prepared':>9} {'gain':>6}")
+        for name in plain_queries:
+            plain = prepared = 0
+            for _ in range(ROUNDS):
+                plain += time_query(plain_queries[name], plain_adapters, iterations // ROUNDS)
+                prepared += time_query(prepared_queries[name], prepared_adapters, iterations // ROUNDS)
+            plain, prepared = plain / iterations, prepared / iterations
+            print(f"{name:45} {plain * 1e6:7.0f}us {prepared * 1e6:7.0f}us {1 - prepared / plain:6.0%}")
+    print(get_statement_cache_stats())
+
+
+if __name__ == '__main__':
+    main()
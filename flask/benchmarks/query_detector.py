@@ -0,0 +1,83 @@
+"""
+Runs the query detector in 'raise' mode over the common endpoints, which must pass, and over an N+1 view
+and a slow view, which must fail with the offending statement shape and its EXPLAIN.
+
+Needs a migrated database. Usage (inside the api container):
+    python benchmarks/query_detector.py
+"""
+import os
+import uuid
+
+os.environ['QUERY_DETECTOR'] = 'raise'
+
+from app import create_app
+from common.app_config import config
+from common.models import Todo
+from common.repositories.factory import RepositoryFactory, RepoType
+from common.utils.query_detector import QueryDetectorError, normalize_statement
+
+
+def check_normalization():
+    same = [
+        "SELECT * FROM todo WHERE entity_id = %s AND active = true LIMIT 1",
+        "SELECT *   FROM todo\n WHERE entity_id = 'abc' AND active = true LIMIT 20",
+    ]
+    assert len({normalize_statement(sql) for sql in same}) == 1, [normalize_statement(sql) for sql in same]
+    assert normalize_statement("SELECT 1 FROM todo WHERE id IN (%s, %s, %s)") == \
+        normalize_statement("SELECT 2 FROM todo WHERE id IN (4, 5)")
+    assert normalize_statement("INSERT INTO t VALUES (%s, %s), (%s, %s)") == \
+        normalize_statement("INSERT INTO t VALUES ($1, $2)")
+
+
+def main():
+    check_normalization()
+    app = create_app()
+    app.config['PROPAGATE_EXCEPTIONS'] = True
+
+    @app.route('/_n_plus_one')
+    def n_plus_one():
+        todo_repo = RepositoryFactory(config).get_repository(RepoType.TODO)
+        todos = todo_repo.get_many({'person_id': person_id}, limit=20)
+        return {'titles': [todo_repo.get_one({'entity_id': todo.entity_id}).title for todo in todos]}
+
+    @app.route('/_slow')
+    def slow():
+        todo_repo = RepositoryFactory(config).get_repository(RepoType.TODO)
+        with todo_repo.adapter:
+            todo_repo.adapter.execute_query("SELECT pg_sleep(%s) AS slept", (config.QUERY_DETECTOR_SLOW_MS / 1e3 * 1.5,))
+        return {}
+
+    client = app.test_client()
+    email = f"detector-{uuid.uuid4().hex[:8]}@example.com"
+    client.post('/auth/signup', json={'first_name': 'Query', 'last_name': 'Detector', 'email_address': email})
+    login = client.post('/auth/login', json={'email': email, 'password': config.DEFAULT_USER_PASSWORD}).json
+    headers = {'Authorization': f"Bearer {login['access_token']}"}
+    person_id = login['person']['entity_id']
+
+    with app.test_request_context():
+        todo_repo = RepositoryFactory(config).get_repository(RepoType.TODO)
+        for i in range(config.QUERY_DETECTOR_MAX_REPEATS + 3):
+            todo_repo.save(Todo(person_id=person_id, title=f'todo {i}'))
+
+    todo_id = client.post('/todos/', json={'title': 'one more'}, headers=headers).json['data']['id']
+    for method, url in [
+        ('get', '/todos/'), ('get', '/todos/stats'), ('put', f'/todos/{todo_id}/complete'),
+        ('get', '/organization/'), ('get', '/person/me'),
+    ]:
+        response = getattr(client, method)(url, json={} if method == 'put' else None, headers=headers)
+        assert response.status_code == 200, response.status_code
+        print(f"{method.upper():4} {url:48} passed")
+
+    for url in ('/_n_plus_one', '/_slow'):
+        try:
+            client.get(url)
+        except QueryDetectorError as e:
+            print(f"\n{url} failed as expected:\n{e}")
+            assert 'EXPLAIN failed' not in str(e)
+        else:
+            raise AssertionError(f"{url} was not flagged")
+    print("\nOK: common endpoints pass, the N+1 and slow views are flagged")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Checks read-replica routing: read-only todo queries use the replica pool, and once a request has written,
+the rest of it reads from the primary (read-your-writes). Without POSTGRES_REPLICA_HOSTS the primary is
+also used as the "replica", which is enough to see where each query goes.
+
+Needs a migrated database. Usage (inside the api container):
+    python benchmarks/replica_routing.py
+"""
+import os
+import uuid
+from collections import Counter
+
+os.environ.setdefault('POSTGRES_REPLICA_HOSTS', f"{os.environ['POSTGRES_HOST']}:{os.environ['POSTGRES_PORT']}")
+
+from app import create_app
+from common.app_config import config
+from common.models import Person
+from common.models.todo import Todo
+from common.repositories.factory import RepositoryFactory, RepoType
+from common.repositories.replicas import RoutingPostgreSQLAdapter
+from common.services.todo import TodoService
+
+connections = Counter()
+_enter = RoutingPostgreSQLAdapter.__enter__
+
+
+def counting_enter(self):
+    _enter(self)
+    connections['replica' if self._on_replica else 'primary'] += 1
+    return self
+
+
+def read_todos(todo_service, person_id):
+    todos, _ = todo_service.get_todos_page(person_id, limit=50)
+    todo_service.get_todo_stats(person_id)
+    todo_service.get_list_validator(person_id)
+    return todos
+
+
+def main():
+    RoutingPostgreSQLAdapter.__enter__ = counting_enter
+
+    app = create_app()
+    assert 'replica_pooled_db' in app.extensions, "POSTGRES_REPLICA_HOSTS is not configured"
+
+    with app.test_request_context():
+        # Like get_service() does, build the service inside the app so its adapters use the connection pools.
+        todo_service = TodoService(config, container=None)
+        person = RepositoryFactory(config).get_repository(RepoType.PERSON).save(
+            Person(first_name='Replica', last_name=uuid.uuid4().hex[:8])
+        )
+
+    with app.test_request_context():
+        connections.clear()
+        read_todos(todo_service, person.entity_id)
+        print(f"read-only request: {dict(connections)}")
+        assert connections == {'replica': 3}
+
+    with app.test_request_context():
+        todo = todo_service.create_todo(Todo(person_id=person.entity_id, title='replica'))
+        connections.clear()
+        todos = read_todos(todo_service, person.entity_id)
+        print(f"reads after a write in the same request: {dict(connections)}")
+        assert connections == {'primary': 3}
+        assert todo.entity_id in [t.entity_id for t in todos]
+
+    with app.test_request_context():
+        connections.clear()
+        read_todos(todo_service, person.entity_id)
+        print(f"next request: {dict(connections)}")
+        assert connections == {'replica': 3}
+
+    print("OK: reads routed to the replica, and to the primary after a write")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Prints the Server-Timing header of a few typical requests, checks its query count against the statements
+PostgreSQL actually received, and shows the per-route histograms served on /metrics.
+
+Needs a migrated database. Usage (inside the api container):
+    python benchmarks/request_metrics.py
+"""
+import re
+import uuid
+
+from app import create_app
+from common.app_config import config
+from db_counters import count_database_calls, counters
+
+def main():
+    count_database_calls()
+    app = create_app()
+    client = app.test_client()
+
+    email = f"metrics-{uuid.uuid4().hex[:8]}@example.com"
+    client.post('/auth/signup', json={'first_name': 'Request', 'last_name': 'Metrics', 'email_address': email})
+    login = client.post('/auth/login', json={'email': email, 'password': config.DEFAULT_USER_PASSWORD}).json
+    headers = {'Authorization': f"Bearer {login['access_token']}"}
+    todo_id = client.post('/todos/', json={'title': 'measure me'}, headers=headers).json['data']['id']
+
+    for method, url, body in [
+        ('post', '/todos/', {'title': 'another'}),
+        ('get', '/todos/', None),
+        ('put', f'/todos/{todo_id}', {'is_completed': True}),
+        ('get', '/person/me', None),
+        ('post', '/auth/forgot_password', {'email': email}),
+    ]:
+        counters.reset()
+        response = getattr(client, method)(url, json=body, headers=headers)
+        timing = response.headers['Server-Timing']
+        reported = int(re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', timing).group(1))
+        print(f"{method.upper():5} {url:48} {timing}")
+        assert reported == counters.statements, (reported, counters.statements)
+
+    metrics = client.get('/metrics').data.decode()
+    print()
+    print('\n'.join(line for line in metrics.splitlines() if '/todos/' in line and '_count' in line))
+    assert 'http_request_db_queries_bucket{method="GET",route="/todos/",le="+Inf"}' in metrics
+    print("OK: Server-Timing query counts match the statements sent")
+
+
+if __name__ == '__main__':
+    main()
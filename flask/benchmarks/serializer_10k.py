@@ -0,0 +1,84 @@
+"""
+Compares the previous response encoding path (hand-written dicts / rococo as_dict() and Flask's JSON
+provider) with the compiled serializers and the configured JSON backend on 10k-row lists.
+
+Usage (inside the api container):
+    python benchmarks/serializer_10k.py [rows] [repeats]
+"""
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app import create_app
+from app.helpers import serializers
+from app.helpers.todo_helper import TodoHelper
+from common.models import Person
+from common.models.todo import Todo
+
+
+def legacy_format_todo(todo):
+    return {
+        'id': todo.entity_id,
+        'title': todo.title,
+        'description': todo.description,
+        'is_completed': todo.is_completed,
+        'completed_at': todo.completed_at.isoformat() if todo.completed_at else None,
+        'due_date': todo.due_date.isoformat() if todo.due_date else None,
+        'priority': todo.priority,
+        'version': todo.version
+    }
+
+
+def best_of(repeats, func):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def report(name, legacy, compiled):
+    print(f"{name}: legacy={legacy * 1e3:.1f}ms compiled={compiled * 1e3:.1f}ms speedup={legacy / compiled:.1f}x")
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    now = datetime.utcnow()
+    todos = [
+        Todo(person_id='p', title=f'todo {i}', description='description' if i % 2 else None,
+             due_date=now + timedelta(days=i) if i % 3 else None, completed_at=now if i % 4 else None,
+             is_completed=bool(i % 4), priority=i % 3, changed_on=now)
+        for i in range(rows)
+    ]
+    people = [Person(first_name=f'first {i}', last_name=f'last {i}', changed_on=now) for i in range(rows)]
+
+    app = create_app()
+    with app.app_context():
+        # Output must not change for clients: the same bytes as Flask's compact responses, keys sorted
+        assert serializers.dumps(TodoHelper.format_todos_response(todos[:100])) == \
+            app.json.dumps([legacy_format_todo(todo) for todo in todos[:100]], separators=(',', ':'))
+        assert serializers.dumps(people[:100]) == app.json.dumps(people[:100], separators=(',', ':'))
+
+        print(f"{rows} rows, JSON backend: {serializers.get_json_backend().__name__}")
+        report(
+            'todos',
+            best_of(repeats, lambda: app.json.dumps({'data': [legacy_format_todo(todo) for todo in todos]})),
+            best_of(repeats, lambda: serializers.dumps({'data': TodoHelper.format_todos_response(todos)})),
+        )
+        report(
+            'people (as_dict)',
+            best_of(repeats, lambda: app.json.dumps({'data': [person.as_dict() for person in people]})),
+            best_of(repeats, lambda: serializers.dumps({'data': people})),
+        )
+        report(
+            'people (dataclass)',
+            best_of(repeats, lambda: app.json.dumps({'data': people})),
+            best_of(repeats, lambda: serializers.dumps({'data': people})),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Compares the writes of a signup saved one repository at a time (the path before the unit of work) with
+the unit of work AuthService.signup uses, counting round trips and commits to PostgreSQL.
+
+Needs a migrated database. Usage (inside the api container):
+    python benchmarks/signup_unit_of_work.py [signups]
+"""
+import sys
+import time
+import uuid
+
+from app import create_app
+from common.app_config import config
+from common.models import Email, LoginMethod, Organization, Person, PersonOrganizationRole
+from common.models.login_method import LoginMethodType
+from common.services import AuthService, get_service
+from db_counters import count_database_calls, counters
+
+def build_account(first_name, last_name):
+    """The models AuthService.signup creates for a new account."""
+    login_method = LoginMethod(
+        method_type=LoginMethodType.EMAIL_PASSWORD, raw_password=config.DEFAULT_USER_PASSWORD
+    )
+    person = Person(first_name=first_name, last_name=last_name)
+    email = Email(person_id=person.entity_id, email=f"signup-{uuid.uuid4().hex}@example.com")
+    login_method.person_id = person.entity_id
+    login_method.email_id = email.entity_id
+    organization = Organization(name=f"{first_name}'s Organization")
+    role = PersonOrganizationRole(person_id=person.entity_id, organization_id=organization.entity_id, role="admin")
+    return email, person, login_method, organization, role
+
+
+def save_per_repository(auth_service, account):
+    email, person, login_method, organization, role = account
+    auth_service.email_service.save_email(email)
+    auth_service.person_service.save_person(person)
+    auth_service.login_method_service.save_login_method(login_method)
+    auth_service.organization_service.save_organization(organization)
+    auth_service.person_organization_role_service.save_person_organization_role(role)
+
+
+def save_unit_of_work(auth_service, account):
+    email, person, login_method, organization, role = account
+    with auth_service.repository_factory.unit_of_work() as uow:
+        uow.save(auth_service.email_service.email_repo, email)
+        uow.save(auth_service.person_service.person_repo, person)
+        uow.save(auth_service.login_method_service.login_method_repo, login_method)
+        uow.save(auth_service.organization_service.organization_repo, organization)
+        uow.save(auth_service.person_organization_role_service.person_organization_role_repo, role)
+
+
+def run(name, save, auth_service, signups):
+    # Hashing the password is the same on both paths, so it is left out of the timings.
+    accounts = [build_account('Signup', str(i)) for i in range(signups)]
+    counters.reset()
+    started = time.perf_counter()
+    for account in accounts:
+        save(auth_service, account)
+    elapsed = (time.perf_counter() - started) / signups
+    result = (counters.statements / signups, counters.commits / signups)
+    print(f"{name:16} {result[0]:.1f} round trips, {result[1]:.1f} commits, {elapsed * 1e3:.2f}ms per signup")
+    return result, elapsed
+
+
+def main():
+    signups = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    count_database_calls()
+
+    app = create_app()
+    with app.test_request_context():
+        auth_service = get_service(AuthService)
+        run('warm-up', save_unit_of_work, auth_service, 5)
+        per_save, per_save_elapsed = run('per repository', save_per_repository, auth_service, signups)
+        unit, unit_elapsed = run('unit of work', save_unit_of_work, auth_service, signups)
+
+    assert unit == (1, 1), unit
+    print(f"OK: one round trip and one commit per signup instead of {per_save[0]:.0f} and {per_save[1]:.0f}, "
+          f"{per_save_elapsed / unit_elapsed:.1f}x faster")
+
+
+if __name__ == '__main__':
+    main()
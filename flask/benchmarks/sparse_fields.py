@@ -0,0 +1,71 @@
+"""
+Compares GET /todos with and without a sparse fieldset (?fields=) on todos with long descriptions:
+response size, rows bytes read from PostgreSQL and request latency.
+
+Needs a migrated database. Usage (inside the api container):
+    python benchmarks/sparse_fields.py [todos] [requests]
+"""
+import sys
+import time
+import uuid
+
+from app import create_app
+from common.app_config import config
+from common.models.todo import Todo
+from common.repositories.factory import RepositoryFactory, RepoType
+
+FIELDSETS = [None, 'id,title,is_completed,due_date', 'id,title']
+
+
+def get_page_bytes(todo_repo, person_id, columns):
+    """Returns the size of the values the page query reads, as PostgreSQL stores them."""
+    select_list = todo_repo.get_select_list(columns, required=('changed_on', 'entity_id'))
+    query = f"""
+        SELECT coalesce(sum(pg_column_size(page)), 0) AS bytes FROM (
+            SELECT {select_list} FROM todo
+            WHERE person_id = %s AND active = true
+            ORDER BY changed_on DESC, entity_id DESC
+            LIMIT %s
+        ) AS page;
+    """
+    with todo_repo.adapter:
+        return todo_repo.adapter.execute_query(query, (person_id, config.TODO_PAGE_MAX_LIMIT))[0]['bytes']
+
+
+def main():
+    todos = int(sys.argv[1]) if len(sys.argv) > 1 else config.TODO_PAGE_MAX_LIMIT
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    app = create_app()
+    client = app.test_client()
+
+    email = f"sparse-{uuid.uuid4().hex[:8]}@example.com"
+    client.post('/auth/signup', json={'first_name': 'Sparse', 'last_name': 'Fields', 'email_address': email})
+    login = client.post('/auth/login', json={'email': email, 'password': config.DEFAULT_USER_PASSWORD}).json
+    headers = {'Authorization': f"Bearer {login['access_token']}"}
+    person_id = login['person']['entity_id']
+
+    with app.test_request_context():
+        todo_repo = RepositoryFactory(config).get_repository(RepoType.TODO)
+        for i in range(todos):
+            todo_repo.save(Todo(person_id=person_id, title=f'todo {i}', description='lorem ipsum ' * 200))
+
+        print(f"{'fields':32} {'db bytes':>9} {'response':>9} {'latency':>9}")
+        for fields in FIELDSETS:
+            url = f"/todos/?limit={config.TODO_PAGE_MAX_LIMIT}" + (f"&fields={fields}" if fields else '')
+            response = client.get(url, headers=headers)
+            assert response.json['success'], response.json
+
+            started = time.perf_counter()
+            for _ in range(requests):
+                client.get(url, headers=headers)
+            latency = (time.perf_counter() - started) / requests
+
+            columns = fields and [
+                'entity_id' if name == 'id' else name for name in fields.split(',')
+            ]
+            db_bytes = get_page_bytes(todo_repo, person_id, columns)
+            print(f"{fields or '(all)':32} {db_bytes:9} {len(response.data):9} {latency * 1e3:7.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
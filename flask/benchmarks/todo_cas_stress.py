@@ -0,0 +1,77 @@
+"""
+Stress test for the compare-and-swap todo update path against a live database.
+
+Many threads race to update the same todo from the same version; exactly one must win and every
+other attempt must fail with ConcurrentModificationError. Repeated for a number of rounds. Also checks
+that the update is validated by the model and records who made it. Exits non-zero on any failure;
+runs in CI (.github/workflows/checks.yml).
+
+Usage (inside the api container, against a migrated database):
+    python benchmarks/todo_cas_stress.py [threads] [rounds]
+"""
+import sys
+import threading
+
+from rococo.models.versioned_model import ModelValidationError
+
+from common.app_config import config
+from common.models import Person
+from common.models.todo import Todo
+from common.services import PersonService, TodoService
+from common.services.todo import ConcurrentModificationError
+
+
+def main():
+    thread_count = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    person = PersonService(config).save_person(Person(first_name='Stress', last_name='Test'))
+    todo = TodoService(config).create_todo(Todo(person_id=person.entity_id, title='stress'))
+
+    todo_service = TodoService(config)
+    for invalid in ({'priority': 7}, {'due_date': 'someday'}):
+        try:
+            todo_service.update_todo_fields(todo.entity_id, person.entity_id, todo.version, invalid)
+        except ModelValidationError:
+            pass
+        else:
+            sys.exit(f"FAILED: the invalid update {invalid} was applied")
+
+    for round_number in range(rounds):
+        version = todo.version
+        barrier = threading.Barrier(thread_count)
+        winners, conflicts, errors = [], [], []
+
+        def attempt(index):
+            # Services are built per thread: each thread gets its own repository and connection.
+            todo_service = TodoService(config)
+            barrier.wait()
+            try:
+                winners.append(todo_service.update_todo_fields(
+                    todo.entity_id, person.entity_id, version, {'title': f'round {round_number} thread {index}'}
+                ))
+            except ConcurrentModificationError:
+                conflicts.append(index)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=attempt, args=(i,)) for i in range(thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if errors or len(winners) != 1 or len(conflicts) != thread_count - 1:
+            sys.exit(
+                f"FAILED round {round_number}: {len(winners)} writers won, {len(conflicts)} conflicted, "
+                f"errors: {errors}"
+            )
+        todo = winners[0]
+        if todo.changed_by_id != person.entity_id:
+            sys.exit(f"FAILED round {round_number}: changed_by_id is {todo.changed_by_id}")
+
+    print(f"OK: {rounds} rounds x {thread_count} writers, exactly one winner per round")
+
+
+if __name__ == '__main__':
+    main()
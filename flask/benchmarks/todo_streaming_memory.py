@@ -0,0 +1,60 @@
+"""
+Compares peak memory of the buffered GET /todos serialization path against the streaming path.
+
+Rows are generated in-process to stand in for the database: the buffered path materializes them
+like a fetchall(), while the streaming path consumes them like a server-side cursor.
+
+Usage (inside the api container):
+    python benchmarks/todo_streaming_memory.py [todo_count] [chunk_size]
+"""
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime
+
+from app.helpers.todo_helper import TodoHelper
+from common.models.todo import Todo
+
+
+def generate_rows(count):
+    now = datetime.utcnow()
+    for i in range(count):
+        yield {
+            'entity_id': uuid.uuid4().hex, 'version': uuid.uuid4().hex, 'previous_version': None,
+            'active': True, 'changed_by_id': None, 'changed_on': now, 'person_id': uuid.uuid4().hex,
+            'title': f'Todo number {i}', 'description': 'Some description text ' * 4,
+            'is_completed': bool(i % 2), 'completed_at': now if i % 2 else None, 'due_date': None, 'priority': i % 3,
+        }
+
+
+def buffered(count, chunk_size):
+    rows = list(generate_rows(count))
+    todos = [Todo.from_dict(row) for row in rows]
+    return len(json.dumps({'success': True, 'data': TodoHelper.format_todos_response(todos)}))
+
+
+def streamed(count, chunk_size):
+    return sum(len(fragment) for fragment in TodoHelper.stream_todos_response(generate_rows(count), chunk_size))
+
+
+def measure(name, func, count, chunk_size):
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = func(count, chunk_size)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name}: peak={peak / 2 ** 20:.1f}MiB time={elapsed:.2f}s bytes={size}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    measure("buffered", buffered, count, chunk_size)
+    measure("streamed", streamed, count, chunk_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Compares TodoService.update_todo (and a plain repository save) with app-side audit writes and with the
+audit triggers of migration 0000000010, counting round trips to PostgreSQL, and checks that both modes
+leave the same rows in todo_audit.
+
+Needs a migrated database. Usage (inside the api container):
+    python benchmarks/todo_update_audit.py [updates]
+"""
+import sys
+import time
+import uuid
+
+from app import create_app
+from common.app_config import config
+from common.models import Person
+from common.models.todo import Todo
+from common.repositories.factory import RepositoryFactory, RepoType
+from common.services.todo import TodoService
+from common.utils.query_detector import start_recording, stop_recording
+
+AUDIT_COLUMNS = "previous_version, version, title, priority, is_completed, description, active"
+
+
+def run(app_side_audit, person, updates):
+    config.AUDIT_WITH_DB_TRIGGERS = not app_side_audit
+    todo_service = TodoService(config, container=None)
+    todo_repo = RepositoryFactory(config).get_repository(RepoType.TODO)
+
+    todo = todo_service.create_todo(Todo(person_id=person.entity_id, title='audit'))
+    start_recording()
+    started = time.perf_counter()
+    for i in range(updates):
+        todo.title, todo.priority = f'audit {i}', i % 3
+        todo_service.update_todo(todo, person.entity_id)
+    elapsed = time.perf_counter() - started
+    update_todo = (len(stop_recording().statements) / updates, elapsed / updates)
+
+    start_recording()
+    started = time.perf_counter()
+    for i in range(updates):
+        todo.description = f'save {i}'
+        todo_repo.save(todo)
+    elapsed = time.perf_counter() - started
+    save = (len(stop_recording().statements) / updates, elapsed / updates)
+
+    with todo_repo.adapter:
+        audit = todo_repo.adapter.execute_query(
+            f"SELECT {AUDIT_COLUMNS} FROM todo_audit WHERE entity_id = %s ORDER BY changed_on", (todo.entity_id,)
+        )
+
+    print(f"app_side_audit={app_side_audit}: "
+          f"update_todo {update_todo[0]:.1f} round trips, {update_todo[1] * 1e3:.2f}ms; "
+          f"save {save[0]:.1f} round trips, {save[1] * 1e3:.2f}ms; {len(audit)} audit rows")
+    # Versions are random, so compare the audit rows by their content and position in the history
+    return [(row['title'], row['priority'], row['description'], row['active']) for row in audit]
+
+
+def main():
+    updates = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    app = create_app()
+    with app.app_context():
+        person = RepositoryFactory(config).get_repository(RepoType.PERSON).save(
+            Person(first_name='Audit', last_name=uuid.uuid4().hex[:8])
+        )
+        app_side = run(True, person, updates)
+        triggers = run(False, person, updates)
+
+    assert app_side == triggers, "audit contents differ between app-side and trigger auditing"
+    print("OK: identical audit contents")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,20 +2,21 @@ import logging
 import os
 import sys
 
-import rollbar
-import rollbar.contrib.flask
 from flask import got_request_exception
-from rollbar.logger import RollbarHandler
 
 from common.app_config import get_config
 
 config = get_config()
 
-config.ROLLBAR_ACCESS_TOKEN = None
+# Rollbar reporting is disabled for the API logger. The config is shared with the rest of the process, so
+# it is switched off here rather than by clearing config.ROLLBAR_ACCESS_TOKEN.
+ROLLBAR_ACCESS_TOKEN = None
 
-if config.ROLLBAR_ACCESS_TOKEN:
+# Rollbar (and the requests stack under it) is only imported when a token is configured.
+if ROLLBAR_ACCESS_TOKEN:
+    import rollbar
     rollbar.init(
-        access_token=config.ROLLBAR_ACCESS_TOKEN,
+        access_token=ROLLBAR_ACCESS_TOKEN,
         environment=config.APP_ENV,
         root=os.path.dirname(os.path.realpath(__file__)),
         allow_logging_basic_config=False
@@ -33,6 +34,7 @@ def _get_formatter():
 
 
 def rollbar_except_hook(exc_type, exc_value, traceback):
+    import rollbar
     # Report the issue to rollbar here.
     rollbar.report_exc_info((exc_type, exc_value, traceback))
     # display the error as normal here
@@ -50,8 +52,9 @@ def get_console_handler():
 
 
 def get_rollbar_handler():
+    from rollbar.logger import RollbarHandler
     loglevel = getattr(logging, config.LOGLEVEL, 'WARN')
-    rollbar_handler = RollbarHandler(access_token=config.ROLLBAR_ACCESS_TOKEN, environment=config.APP_ENV)
+    rollbar_handler = RollbarHandler(access_token=ROLLBAR_ACCESS_TOKEN, environment=config.APP_ENV)
     rollbar_handler.setLevel(loglevel)
     return rollbar_handler
 
@@ -64,7 +67,7 @@ def get_logger(logger_name):
     logger.setLevel(_get_log_level())  # better to have too much log than not enough
     logger.addHandler(get_console_handler())
 
-    if config.ROLLBAR_ACCESS_TOKEN:
+    if ROLLBAR_ACCESS_TOKEN:
         logger.addHandler(get_rollbar_handler())
 
     logger.propagate = False
@@ -72,7 +75,11 @@ def get_logger(logger_name):
 
 
 def set_request_exception_signal(app):
-    got_request_exception.connect(rollbar.contrib.flask.report_exception, app)
+    # Rollbar is initialized process-wide by common.app_logger when a token is configured, and there is
+    # nothing to report to without it.
+    if config.ROLLBAR_ACCESS_TOKEN:
+        import rollbar.contrib.flask
+        got_request_exception.connect(rollbar.contrib.flask.report_exception, app)
 
 
 logger = get_logger(__name__)